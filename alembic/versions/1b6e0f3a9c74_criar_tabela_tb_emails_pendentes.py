@@ -0,0 +1,48 @@
+"""Criar tabela tb_emails_pendentes
+
+Revision ID: 1b6e0f3a9c74
+Revises: f92c4d7e1b08
+Create Date: 2026-10-18 14:05:51.372816
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1b6e0f3a9c74"
+down_revision: Union[str, Sequence[str], None] = "f92c4d7e1b08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tb_emails_pendentes",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("destinatario", sa.String(length=150), nullable=False),
+        sa.Column("assunto", sa.String(length=200), nullable=False),
+        sa.Column("corpo", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("tentativas", sa.Integer(), nullable=False),
+        sa.Column("proxima_tentativa", sa.DateTime(), nullable=False),
+        sa.Column("ultimo_erro", sa.Text(), nullable=True),
+        sa.Column("data_criacao", sa.DateTime(), nullable=True),
+        sa.Column("data_envio", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_tb_emails_pendentes_fila",
+        "tb_emails_pendentes",
+        ["status", "proxima_tentativa"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tb_emails_pendentes_fila", table_name="tb_emails_pendentes")
+    op.drop_table("tb_emails_pendentes")
@@ -0,0 +1,47 @@
+"""Criar tabela tb_relatorios
+
+Revision ID: 2c6e8a4f9d35
+Revises: 7b2d9e4f6c18
+Create Date: 2026-10-18 18:36:52.107493
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2c6e8a4f9d35"
+down_revision: Union[str, Sequence[str], None] = "7b2d9e4f6c18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tb_relatorios",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("chave", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("tentativas", sa.Integer(), nullable=False),
+        sa.Column("proxima_tentativa", sa.DateTime(), nullable=False),
+        sa.Column("ultimo_erro", sa.Text(), nullable=True),
+        sa.Column("data_criacao", sa.DateTime(), nullable=True),
+        sa.Column("concluido_em", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index(
+        "ix_tb_relatorios_fila",
+        "tb_relatorios",
+        ["status", "proxima_tentativa"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tb_relatorios_fila", table_name="tb_relatorios")
+    op.drop_table("tb_relatorios")
@@ -0,0 +1,58 @@
+"""Adicionar contador notificacoes_nao_lidas em user
+
+Revision ID: 3d8a5f1c2e90
+Revises: 1b6e0f3a9c74
+Create Date: 2026-10-18 14:02:17.402981
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3d8a5f1c2e90"
+down_revision: Union[str, Sequence[str], None] = "1b6e0f3a9c74"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+usuarios = sa.table(
+    "user",
+    sa.column("id", sa.Integer),
+    sa.column("notificacoes_nao_lidas", sa.Integer),
+)
+notificacoes = sa.table(
+    "tb_notificacoes",
+    sa.column("id", sa.Integer),
+    sa.column("user_id", sa.Integer),
+    sa.column("lida", sa.Boolean),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user",
+        sa.Column(
+            "notificacoes_nao_lidas", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+    # Preencher o contador a partir das notificações existentes
+    op.execute(
+        usuarios.update().values(
+            notificacoes_nao_lidas=sa.select(sa.func.count(notificacoes.c.id))
+            .where(
+                notificacoes.c.user_id == usuarios.c.id,
+                notificacoes.c.lida.is_(False),
+            )
+            .scalar_subquery()
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("user", "notificacoes_nao_lidas")
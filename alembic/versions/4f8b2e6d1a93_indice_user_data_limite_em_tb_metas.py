@@ -0,0 +1,33 @@
+"""Índice (user_id, data_limite) em tb_metas
+
+Revision ID: 4f8b2e6d1a93
+Revises: 9c3f5a8e2d61
+Create Date: 2026-10-18 17:41:09.372815
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f8b2e6d1a93"
+down_revision: Union[str, Sequence[str], None] = "9c3f5a8e2d61"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_tb_metas_user_data_limite",
+        "tb_metas",
+        ["user_id", "data_limite"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tb_metas_user_data_limite", table_name="tb_metas")
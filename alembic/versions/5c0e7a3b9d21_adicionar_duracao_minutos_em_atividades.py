@@ -0,0 +1,70 @@
+"""Adicionar coluna duracao_minutos em tb_atividades
+
+Revision ID: 5c0e7a3b9d21
+Revises: 741e1f18573e
+Create Date: 2026-10-18 10:12:40.118230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c0e7a3b9d21"
+down_revision: Union[str, Sequence[str], None] = "741e1f18573e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TAMANHO_LOTE = 1000
+
+atividades = sa.table(
+    "tb_atividades",
+    sa.column("id", sa.Integer),
+    sa.column("duracao", sa.String),
+    sa.column("duracao_minutos", sa.Integer),
+)
+
+
+def _minutos(duracao):
+    """Converte duração HH:MM para minutos"""
+    try:
+        horas, minutos = map(int, duracao.split(":"))
+        return horas * 60 + minutos
+    except (AttributeError, ValueError):
+        return 0
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "tb_atividades", sa.Column("duracao_minutos", sa.Integer(), nullable=True)
+    )
+
+    # Preencher a nova coluna em lotes, percorrendo a chave primária
+    conn = op.get_bind()
+    ultimo_id = 0
+    while True:
+        linhas = conn.execute(
+            sa.select(atividades.c.id, atividades.c.duracao)
+            .where(atividades.c.id > ultimo_id, atividades.c.duracao.isnot(None))
+            .order_by(atividades.c.id)
+            .limit(TAMANHO_LOTE)
+        ).all()
+        if not linhas:
+            break
+
+        conn.execute(
+            atividades.update()
+            .where(atividades.c.id == sa.bindparam("_id"))
+            .values(duracao_minutos=sa.bindparam("_minutos")),
+            [{"_id": id_, "_minutos": _minutos(duracao)} for id_, duracao in linhas],
+        )
+        ultimo_id = linhas[-1][0]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tb_atividades", "duracao_minutos")
@@ -0,0 +1,40 @@
+"""Índices (user_id, data) e (user_id, data_criacao) em tb_atividades
+
+Revision ID: 6a1e3d9b7c52
+Revises: d2a9c6e4f157
+Create Date: 2026-10-18 16:22:48.906115
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6a1e3d9b7c52"
+down_revision: Union[str, Sequence[str], None] = "d2a9c6e4f157"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_tb_atividades_user_data",
+        "tb_atividades",
+        ["user_id", "data"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_tb_atividades_user_data_criacao",
+        "tb_atividades",
+        ["user_id", "data_criacao"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tb_atividades_user_data_criacao", table_name="tb_atividades")
+    op.drop_index("ix_tb_atividades_user_data", table_name="tb_atividades")
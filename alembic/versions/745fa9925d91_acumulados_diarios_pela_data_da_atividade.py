@@ -0,0 +1,115 @@
+"""Acumulados diários pela data da atividade
+
+Revision ID: 745fa9925d91
+Revises: 2c6e8a4f9d35
+Create Date: 2026-10-18 21:14:36.418205
+
+"""
+
+from datetime import timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "745fa9925d91"
+down_revision: Union[str, Sequence[str], None] = "2c6e8a4f9d35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TAMANHO_LOTE = 1000
+FUSO_PADRAO = "America/Sao_Paulo"
+
+usuarios = sa.table(
+    "user",
+    sa.column("id", sa.Integer),
+    sa.column("fuso_horario", sa.String),
+)
+atividades = sa.table(
+    "tb_atividades",
+    sa.column("id", sa.Integer),
+    sa.column("user_id", sa.Integer),
+    sa.column("data", sa.Date),
+    sa.column("data_criacao", sa.DateTime),
+    sa.column("duracao_minutos", sa.Integer),
+)
+atividades_diarias = sa.table(
+    "tb_atividades_diarias",
+    sa.column("user_id", sa.Integer),
+    sa.column("dia", sa.Date),
+    sa.column("quantidade", sa.Integer),
+    sa.column("minutos", sa.Integer),
+)
+
+
+def _fuso(nome):
+    try:
+        return ZoneInfo(nome or FUSO_PADRAO)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def _recalcular(usar_data):
+    """Refaz tb_atividades_diarias a partir das atividades, em lotes"""
+    conn = op.get_bind()
+    fusos = {
+        user_id: _fuso(nome)
+        for user_id, nome in conn.execute(
+            sa.select(usuarios.c.id, usuarios.c.fuso_horario)
+        )
+    }
+    acumulados = {}
+    ultimo_id = 0
+    while True:
+        linhas = conn.execute(
+            sa.select(
+                atividades.c.id,
+                atividades.c.user_id,
+                atividades.c.data,
+                atividades.c.data_criacao,
+                atividades.c.duracao_minutos,
+            )
+            .where(atividades.c.id > ultimo_id)
+            .order_by(atividades.c.id)
+            .limit(TAMANHO_LOTE)
+        ).all()
+        if not linhas:
+            break
+        for _, user_id, data, data_criacao, minutos in linhas:
+            if usar_data and data is not None:
+                dia = data
+            elif data_criacao is not None:
+                dia = (
+                    data_criacao.replace(tzinfo=timezone.utc)
+                    .astimezone(fusos.get(user_id, timezone.utc))
+                    .date()
+                )
+            else:
+                continue
+            quantidade, total = acumulados.get((user_id, dia), (0, 0))
+            acumulados[(user_id, dia)] = (quantidade + 1, total + (minutos or 0))
+        ultimo_id = linhas[-1][0]
+
+    conn.execute(atividades_diarias.delete())
+    if acumulados:
+        conn.execute(
+            atividades_diarias.insert(),
+            [
+                {"user_id": user_id, "dia": dia, "quantidade": q, "minutos": m}
+                for (user_id, dia), (q, m) in acumulados.items()
+            ],
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Atividades com data informada passam a contar no dia dessa data
+    _recalcular(usar_data=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recalcular(usar_data=False)
@@ -0,0 +1,35 @@
+"""Adicionar token_calendario em user
+
+Revision ID: 7b2d9e4f6c18
+Revises: 4f8b2e6d1a93
+Create Date: 2026-10-18 18:02:37.514260
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b2d9e4f6c18"
+down_revision: Union[str, Sequence[str], None] = "4f8b2e6d1a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user", sa.Column("token_calendario", sa.String(length=64), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_user_token_calendario"), "user", ["token_calendario"], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_user_token_calendario"), table_name="user")
+    op.drop_column("user", "token_calendario")
@@ -0,0 +1,33 @@
+"""Índice (user_id, lida, tipo, data_criacao) em tb_notificacoes
+
+Revision ID: 8e4c1b7d5a23
+Revises: 3d8a5f1c2e90
+Create Date: 2026-10-18 14:41:52.730164
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e4c1b7d5a23"
+down_revision: Union[str, Sequence[str], None] = "3d8a5f1c2e90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_tb_notificacoes_caixa_entrada",
+        "tb_notificacoes",
+        ["user_id", "lida", "tipo", "data_criacao"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tb_notificacoes_caixa_entrada", table_name="tb_notificacoes")
@@ -0,0 +1,63 @@
+"""Índices de busca textual em tb_atividades e tb_metas
+
+Revision ID: 9c3f5a8e2d61
+Revises: 6a1e3d9b7c52
+Create Date: 2026-10-18 17:03:26.158402
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c3f5a8e2d61"
+down_revision: Union[str, Sequence[str], None] = "6a1e3d9b7c52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialeto = op.get_bind().dialect.name
+    if dialeto == "mysql":
+        op.create_index(
+            "ft_tb_atividades_busca",
+            "tb_atividades",
+            ["assunto_primario", "materia", "descricao"],
+            mysql_prefix="FULLTEXT",
+        )
+        op.create_index(
+            "ft_tb_metas_busca",
+            "tb_metas",
+            ["titulo", "descricao"],
+            mysql_prefix="FULLTEXT",
+        )
+    elif dialeto == "sqlite":
+        # Tabela FTS5 mantida pela aplicação (servicos/busca.py);
+        # rowid = id * 2 para atividades e id * 2 + 1 para metas
+        op.execute(
+            "CREATE VIRTUAL TABLE tb_busca USING fts5("
+            "titulo, conteudo, user_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO tb_busca (rowid, titulo, conteudo, user_id) "
+            "SELECT id * 2, assunto_primario, "
+            "materia || ' ' || coalesce(descricao, ''), user_id FROM tb_atividades"
+        )
+        op.execute(
+            "INSERT INTO tb_busca (rowid, titulo, conteudo, user_id) "
+            "SELECT id * 2 + 1, titulo, coalesce(descricao, ''), user_id FROM tb_metas"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialeto = op.get_bind().dialect.name
+    if dialeto == "mysql":
+        op.drop_index("ft_tb_metas_busca", table_name="tb_metas")
+        op.drop_index("ft_tb_atividades_busca", table_name="tb_atividades")
+    elif dialeto == "sqlite":
+        op.execute("DROP TABLE tb_busca")
@@ -0,0 +1,42 @@
+"""Criar tabela tb_user_stats
+
+Revision ID: a41f6d2c8e57
+Revises: 5c0e7a3b9d21
+Create Date: 2026-10-18 11:03:12.540981
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a41f6d2c8e57"
+down_revision: Union[str, Sequence[str], None] = "5c0e7a3b9d21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Os contadores são preenchidos sob demanda ou com
+    # `flask reconstruir-estatisticas`
+    op.create_table(
+        "tb_user_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("total_atividades", sa.Integer(), nullable=False),
+        sa.Column("total_materias", sa.Integer(), nullable=False),
+        sa.Column("total_minutos", sa.Integer(), nullable=False),
+        sa.Column("metas_ativas", sa.Integer(), nullable=False),
+        sa.Column("metas_concluidas", sa.Integer(), nullable=False),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("tb_user_stats")
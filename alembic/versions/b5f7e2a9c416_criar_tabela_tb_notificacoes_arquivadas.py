@@ -0,0 +1,62 @@
+"""Criar tabela tb_notificacoes_arquivadas
+
+Revision ID: b5f7e2a9c416
+Revises: 8e4c1b7d5a23
+Create Date: 2026-10-18 15:08:33.519276
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b5f7e2a9c416"
+down_revision: Union[str, Sequence[str], None] = "8e4c1b7d5a23"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tb_notificacoes_arquivadas",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(length=50), nullable=False),
+        sa.Column("titulo", sa.String(length=200), nullable=False),
+        sa.Column("mensagem", sa.Text(), nullable=False),
+        sa.Column("lida", sa.Boolean(), nullable=True),
+        sa.Column("data_criacao", sa.DateTime(), nullable=True),
+        sa.Column("link", sa.String(length=255), nullable=True),
+        sa.Column("icone", sa.String(length=50), nullable=True),
+        sa.Column("data_arquivamento", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_tb_notificacoes_arquivadas_user_id"),
+        "tb_notificacoes_arquivadas",
+        ["user_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_tb_notificacoes_arquivadas_data_arquivamento"),
+        "tb_notificacoes_arquivadas",
+        ["data_arquivamento"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_tb_notificacoes_arquivadas_data_arquivamento"),
+        table_name="tb_notificacoes_arquivadas",
+    )
+    op.drop_index(
+        op.f("ix_tb_notificacoes_arquivadas_user_id"),
+        table_name="tb_notificacoes_arquivadas",
+    )
+    op.drop_table("tb_notificacoes_arquivadas")
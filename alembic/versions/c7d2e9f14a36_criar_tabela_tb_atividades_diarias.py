@@ -0,0 +1,49 @@
+"""Criar tabela tb_atividades_diarias
+
+Revision ID: c7d2e9f14a36
+Revises: a41f6d2c8e57
+Create Date: 2026-10-18 11:48:27.903114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d2e9f14a36"
+down_revision: Union[str, Sequence[str], None] = "a41f6d2c8e57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tb_atividades_diarias",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("dia", sa.Date(), nullable=False),
+        sa.Column("quantidade", sa.Integer(), nullable=False),
+        sa.Column("minutos", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("user_id", "dia"),
+    )
+
+    # Preencher com o histórico existente
+    op.execute(
+        """
+        INSERT INTO tb_atividades_diarias (user_id, dia, quantidade, minutos)
+        SELECT user_id, DATE(data_criacao), COUNT(id),
+               COALESCE(SUM(duracao_minutos), 0)
+        FROM tb_atividades
+        WHERE data_criacao IS NOT NULL
+        GROUP BY user_id, DATE(data_criacao)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("tb_atividades_diarias")
@@ -0,0 +1,153 @@
+"""Criar tabela tb_agendamentos
+
+Revision ID: d2a9c6e4f157
+Revises: b5f7e2a9c416
+Create Date: 2026-10-18 15:47:09.284611
+
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2a9c6e4f157"
+down_revision: Union[str, Sequence[str], None] = "b5f7e2a9c416"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TAMANHO_LOTE = 1000
+FUSO_PADRAO = "America/Sao_Paulo"
+HORA_LEMBRETE = 9
+
+usuarios = sa.table(
+    "user",
+    sa.column("id", sa.Integer),
+    sa.column("fuso_horario", sa.String),
+)
+metas = sa.table(
+    "tb_metas",
+    sa.column("id", sa.Integer),
+    sa.column("user_id", sa.Integer),
+    sa.column("titulo", sa.String),
+    sa.column("data_limite", sa.Date),
+    sa.column("status", sa.String),
+)
+
+
+def _fuso(nome):
+    try:
+        return ZoneInfo(nome or FUSO_PADRAO)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    agendamentos = op.create_table(
+        "tb_agendamentos",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(length=50), nullable=False),
+        sa.Column("referencia_id", sa.Integer(), nullable=True),
+        sa.Column("executar_em", sa.DateTime(), nullable=False),
+        sa.Column("titulo", sa.String(length=200), nullable=False),
+        sa.Column("mensagem", sa.Text(), nullable=False),
+        sa.Column("link", sa.String(length=255), nullable=True),
+        sa.Column("icone", sa.String(length=50), nullable=True),
+        sa.Column("data_criacao", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_tb_agendamentos_executar_em",
+        "tb_agendamentos",
+        ["executar_em"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_tb_agendamentos_referencia",
+        "tb_agendamentos",
+        ["tipo", "referencia_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_tb_agendamentos_user_id"),
+        "tb_agendamentos",
+        ["user_id"],
+        unique=False,
+    )
+
+    # Agendar o lembrete de prazo das metas ativas que ainda não venceram
+    conn = op.get_bind()
+    agora = datetime.utcnow()
+    ultimo_id = 0
+    while True:
+        linhas = conn.execute(
+            sa.select(
+                metas.c.id,
+                metas.c.user_id,
+                metas.c.titulo,
+                metas.c.data_limite,
+                usuarios.c.fuso_horario,
+            )
+            .select_from(metas.join(usuarios, usuarios.c.id == metas.c.user_id))
+            .where(
+                metas.c.id > ultimo_id,
+                metas.c.status == "ativo",
+                metas.c.data_limite.isnot(None),
+            )
+            .order_by(metas.c.id)
+            .limit(TAMANHO_LOTE)
+        ).all()
+        if not linhas:
+            break
+
+        novos = []
+        for meta_id, user_id, titulo, data_limite, fuso in linhas:
+            if isinstance(data_limite, str):
+                data_limite = date.fromisoformat(data_limite)
+            fuso = _fuso(fuso)
+            if data_limite < datetime.now(fuso).date():
+                continue
+            vespera = data_limite - timedelta(days=1)
+            executar_em = (
+                datetime(vespera.year, vespera.month, vespera.day, HORA_LEMBRETE)
+                .replace(tzinfo=fuso)
+                .astimezone(timezone.utc)
+                .replace(tzinfo=None)
+            )
+            novos.append(
+                {
+                    "user_id": user_id,
+                    "tipo": "prazo_meta",
+                    "referencia_id": meta_id,
+                    "executar_em": max(executar_em, agora),
+                    "titulo": "Prazo de Meta se Aproximando ⏰",
+                    "mensagem": (
+                        f"A meta '{titulo}' vence em "
+                        f"{data_limite.strftime('%d/%m/%Y')}."
+                    ),
+                    "link": "/metas",
+                    "icone": "fa-hourglass-half",
+                    "data_criacao": agora,
+                }
+            )
+        if novos:
+            conn.execute(agendamentos.insert(), novos)
+        ultimo_id = linhas[-1][0]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_tb_agendamentos_user_id"), table_name="tb_agendamentos")
+    op.drop_index("ix_tb_agendamentos_referencia", table_name="tb_agendamentos")
+    op.drop_index("ix_tb_agendamentos_executar_em", table_name="tb_agendamentos")
+    op.drop_table("tb_agendamentos")
@@ -0,0 +1,93 @@
+"""Adicionar fuso_horario em user e versao em tb_user_stats
+
+Revision ID: e3b58a0c6f19
+Revises: c7d2e9f14a36
+Create Date: 2026-10-18 12:31:05.664720
+
+"""
+
+from datetime import timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e3b58a0c6f19"
+down_revision: Union[str, Sequence[str], None] = "c7d2e9f14a36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TAMANHO_LOTE = 1000
+FUSO_PADRAO = ZoneInfo("America/Sao_Paulo")
+
+atividades = sa.table(
+    "tb_atividades",
+    sa.column("id", sa.Integer),
+    sa.column("user_id", sa.Integer),
+    sa.column("data_criacao", sa.DateTime),
+    sa.column("duracao_minutos", sa.Integer),
+)
+atividades_diarias = sa.table(
+    "tb_atividades_diarias",
+    sa.column("user_id", sa.Integer),
+    sa.column("dia", sa.Date),
+    sa.column("quantidade", sa.Integer),
+    sa.column("minutos", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user", sa.Column("fuso_horario", sa.String(length=50), nullable=True)
+    )
+    op.add_column(
+        "tb_user_stats",
+        sa.Column("versao", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Os acumulados diários passam a usar o dia local (fuso padrão),
+    # então são recalculados a partir das atividades, em lotes
+    conn = op.get_bind()
+    acumulados = {}
+    ultimo_id = 0
+    while True:
+        linhas = conn.execute(
+            sa.select(
+                atividades.c.id,
+                atividades.c.user_id,
+                atividades.c.data_criacao,
+                atividades.c.duracao_minutos,
+            )
+            .where(atividades.c.id > ultimo_id, atividades.c.data_criacao.isnot(None))
+            .order_by(atividades.c.id)
+            .limit(TAMANHO_LOTE)
+        ).all()
+        if not linhas:
+            break
+        for _, user_id, data_criacao, minutos in linhas:
+            dia = (
+                data_criacao.replace(tzinfo=timezone.utc).astimezone(FUSO_PADRAO).date()
+            )
+            quantidade, total = acumulados.get((user_id, dia), (0, 0))
+            acumulados[(user_id, dia)] = (quantidade + 1, total + (minutos or 0))
+        ultimo_id = linhas[-1][0]
+
+    conn.execute(atividades_diarias.delete())
+    if acumulados:
+        conn.execute(
+            atividades_diarias.insert(),
+            [
+                {"user_id": user_id, "dia": dia, "quantidade": q, "minutos": m}
+                for (user_id, dia), (q, m) in acumulados.items()
+            ],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tb_user_stats", "versao")
+    op.drop_column("user", "fuso_horario")
@@ -0,0 +1,44 @@
+"""Índice único (user_id, badge_id) em tb_user_badges
+
+Revision ID: f92c4d7e1b08
+Revises: e3b58a0c6f19
+Create Date: 2026-10-18 13:20:44.017392
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f92c4d7e1b08"
+down_revision: Union[str, Sequence[str], None] = "e3b58a0c6f19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Remover badges duplicados, mantendo a conquista mais antiga
+    op.execute(
+        """
+        DELETE FROM tb_user_badges
+        WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT MIN(id) AS id FROM tb_user_badges GROUP BY user_id, badge_id
+            ) AS primeiros
+        )
+        """
+    )
+    op.create_index(
+        "uq_tb_user_badges_user_badge",
+        "tb_user_badges",
+        ["user_id", "badge_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_tb_user_badges_user_badge", table_name="tb_user_badges")
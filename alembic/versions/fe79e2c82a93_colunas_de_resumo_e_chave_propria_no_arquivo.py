@@ -0,0 +1,144 @@
+"""Colunas de resumo em tb_notificacoes e chave própria em tb_notificacoes_arquivadas
+
+Revision ID: fe79e2c82a93
+Revises: 745fa9925d91
+Create Date: 2026-10-18 21:52:08.271604
+
+"""
+
+import re
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "fe79e2c82a93"
+down_revision: Union[str, Sequence[str], None] = "745fa9925d91"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+notificacoes = sa.table(
+    "tb_notificacoes",
+    sa.column("id", sa.Integer),
+    sa.column("titulo", sa.String),
+    sa.column("mensagem", sa.Text),
+    sa.column("resumo_total", sa.Integer),
+    sa.column("resumo_inicio", sa.DateTime),
+)
+
+# Mensagem gravada pelos resumos anteriores a esta versão
+MENSAGEM_RESUMO = re.compile(r"^(\d+) notificações .* entre (\d{2}/\d{2}/\d{4}) e ")
+
+COLUNAS_ARQUIVO = (
+    "user_id",
+    "tipo",
+    "titulo",
+    "mensagem",
+    "lida",
+    "data_criacao",
+    "link",
+    "icone",
+    "data_arquivamento",
+)
+
+
+def _criar_arquivo(nome, chave_propria):
+    colunas = [sa.Column("id", sa.Integer(), autoincrement=chave_propria)]
+    if chave_propria:
+        colunas.append(sa.Column("notificacao_id", sa.Integer(), nullable=False))
+    op.create_table(
+        nome,
+        *colunas,
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(length=50), nullable=False),
+        sa.Column("titulo", sa.String(length=200), nullable=False),
+        sa.Column("mensagem", sa.Text(), nullable=False),
+        sa.Column("lida", sa.Boolean(), nullable=True),
+        sa.Column("data_criacao", sa.DateTime(), nullable=True),
+        sa.Column("link", sa.String(length=255), nullable=True),
+        sa.Column("icone", sa.String(length=50), nullable=True),
+        sa.Column("data_arquivamento", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def _trocar_arquivo(chave_propria, id_origem, id_destino):
+    """Recria tb_notificacoes_arquivadas copiando as linhas (a chave primária muda)"""
+    op.drop_index(
+        "ix_tb_notificacoes_arquivadas_data_arquivamento",
+        table_name="tb_notificacoes_arquivadas",
+    )
+    op.drop_index(
+        "ix_tb_notificacoes_arquivadas_user_id",
+        table_name="tb_notificacoes_arquivadas",
+    )
+    _criar_arquivo("tb_notificacoes_arquivadas_nova", chave_propria)
+    colunas = ", ".join(COLUNAS_ARQUIVO)
+    op.execute(
+        f"INSERT INTO tb_notificacoes_arquivadas_nova ({id_destino}, {colunas}) "
+        f"SELECT {id_origem}, {colunas} FROM tb_notificacoes_arquivadas "
+        "ORDER BY id"
+    )
+    op.drop_table("tb_notificacoes_arquivadas")
+    op.rename_table("tb_notificacoes_arquivadas_nova", "tb_notificacoes_arquivadas")
+    op.create_index(
+        "ix_tb_notificacoes_arquivadas_user_id",
+        "tb_notificacoes_arquivadas",
+        ["user_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_tb_notificacoes_arquivadas_data_arquivamento",
+        "tb_notificacoes_arquivadas",
+        ["data_arquivamento"],
+        unique=False,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "tb_notificacoes", sa.Column("resumo_total", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "tb_notificacoes", sa.Column("resumo_inicio", sa.DateTime(), nullable=True)
+    )
+
+    # Os resumos já existentes guardavam o total e o início só na mensagem
+    conn = op.get_bind()
+    resumos = conn.execute(
+        sa.select(notificacoes.c.id, notificacoes.c.mensagem).where(
+            notificacoes.c.titulo.startswith("Resumo: ")
+        )
+    ).all()
+    for id_, mensagem in resumos:
+        encontrado = MENSAGEM_RESUMO.match(mensagem or "")
+        if not encontrado:
+            continue
+        conn.execute(
+            notificacoes.update()
+            .where(notificacoes.c.id == id_)
+            .values(
+                resumo_total=int(encontrado[1]),
+                resumo_inicio=datetime.strptime(encontrado[2], "%d/%m/%Y"),
+            )
+        )
+
+    # O arquivo ganha chave própria; o id original vai para notificacao_id
+    _trocar_arquivo(True, id_origem="id", id_destino="notificacao_id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Se um id original foi arquivado mais de uma vez, fica a primeira cópia
+    op.execute(
+        "DELETE FROM tb_notificacoes_arquivadas WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM tb_notificacoes_arquivadas "
+        "GROUP BY notificacao_id) AS primeiras)"
+    )
+    _trocar_arquivo(False, id_origem="notificacao_id", id_destino="id")
+    op.drop_column("tb_notificacoes", "resumo_inicio")
+    op.drop_column("tb_notificacoes", "resumo_total")
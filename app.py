@@ -9,11 +9,14 @@ from flask_mail import Mail
 import os
 from dotenv import load_dotenv
 from sqlalchemy import func
-from werkzeug.utils import secure_filename
-from datetime import datetime, timedelta
+from werkzeug.http import is_resource_modified
+from datetime import date, datetime, timedelta
 import secrets
+import json
+import mimetypes
+import time
+import click
 
-import requests
 import re
 from functools import wraps
 import bleach
@@ -24,11 +27,94 @@ from models.models import (
     Materia,
     Atividade,
     Notificacao,
+    NotificacaoArquivada,
     Meta,
     Badge,
     UserBadge,
+    UserStats,
+    AtividadeDiaria,
+    Agendamento,
 )
-
+from servicos.agendamentos import (
+    agendar_prazo_meta,
+    agendar_revisao_atividade,
+    cancelar_agendamentos,
+    processar_agendamentos,
+)
+from servicos.artigos import FeedArtigos
+from servicos.atividades import ORDENACOES, pagina_atividades
+from servicos.badges import (
+    conceder_badges_retroativos,
+    dados_notificacao_badge,
+    limpar_cache_catalogo,
+    verificar_badges,
+)
+from servicos.busca import (
+    buscar,
+    criar_indice_sqlite,
+    reindexar_busca,
+    remover_usuario_da_busca,
+)
+from servicos.calendario import (
+    etag_calendario,
+    eventos_calendario,
+    gerar_ics,
+    ler_janela,
+    validadores_ics,
+)
+from servicos.emails import enfileirar_email, processar_emails
+from servicos.estaticos import carregar_manifesto, gerar_assets, variante_comprimida
+from servicos.exportacao import (
+    TABELAS_EXPORTACAO,
+    gerar_csv,
+    gerar_ndjson,
+    gerar_zip,
+)
+from servicos.imagens import (
+    criar_armazenamento,
+    eh_chave_avatar,
+    nome_avatar,
+    processar_avatar,
+    remover_avatar,
+)
+from servicos.importacao import (
+    LOTE_IMPORTACAO,
+    converter_data,
+    importar_atividades,
+    ler_arquivo,
+)
+from servicos.notificacoes import (
+    ajustar_nao_lidas,
+    criar_notificacao,
+    pagina_notificacoes,
+    reconciliar_nao_lidas,
+)
+from servicos.estatisticas import (
+    ajustar_atividade_diaria,
+    ajustar_estatisticas,
+    delta_metas,
+    grafico_atividades_por_dia,
+    obter_estatisticas,
+    reconstruir_atividades_diarias,
+    reconstruir_todas_estatisticas,
+)
+from servicos.paginas import (
+    CachePaginas,
+    preencher_molde,
+    renderizar_molde,
+    versao_paginas,
+)
+from servicos.relatorios import (
+    caminho_relatorio,
+    chave_relatorio,
+    processar_relatorios,
+    remover_relatorios,
+    solicitar_relatorio,
+    status_relatorio,
+)
+from servicos.respostas import adicionar_etag_fraca, comprimir_resposta
+from servicos.retencao import expurgar_arquivo, expurgar_lidas, resumir_notificacoes
+from servicos.sequencia import fuso_valido, obter_sequencias
 
 
 # Carregar variáveis de ambiente
@@ -51,8 +137,10 @@ DB_NAME = os.getenv("DB_NAME", "pratica_profissional")
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "admin")
 
+# DATABASE_URL substitui a conexão MySQL (ex.: sqlite:///focusup.db para desenvolvimento)
 app.config["SQLALCHEMY_DATABASE_URI"] = (
-    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    os.getenv("DATABASE_URL")
+    or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "Chave1234")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
@@ -78,6 +166,71 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = "login"
 
+# Feed de artigos do dashboard (cache com atualização em segundo plano)
+feed_artigos = FeedArtigos(
+    ttl=int(os.getenv("ARTIGOS_CACHE_TTL", 900)),
+    timeout=float(os.getenv("ARTIGOS_TIMEOUT", 3)),
+)
+
+# Assets com hash no nome, gerados por `flask gerar-assets` a cada deploy. Sem
+# o manifesto (desenvolvimento), os arquivos de static/ são servidos como estão.
+manifesto_assets = carregar_manifesto(app.static_folder)
+
+
+@app.url_defaults
+def versionar_estaticos(endpoint, values):
+    """Faz url_for('static', filename=...) apontar para a cópia com hash"""
+    if endpoint == "static" and values.get("filename") in manifesto_assets:
+        values["filename"] = manifesto_assets[values["filename"]]
+
+
+# Compressão gzip das respostas e ETag fraca nas páginas renderizadas
+COMPRESSAO_NIVEL = int(os.getenv("COMPRESSAO_NIVEL", 6))
+COMPRESSAO_MINIMO = int(os.getenv("COMPRESSAO_MINIMO", 1024))
+
+
+@app.after_request
+def otimizar_resposta(resposta):
+    """Responde 304 a GETs sem mudança e comprime o que for texto"""
+    if (
+        request.method in ("GET", "HEAD")
+        and resposta.status_code == 200
+        and not resposta.is_streamed
+        and not resposta.direct_passthrough
+        and not resposta.get_etag()[0]
+    ):
+        resposta = adicionar_etag_fraca(
+            resposta,
+            request,
+            token_csrf=g.get("csrf_token"),
+            segredo_csrf=session.get("csrf_token"),
+            validade_csrf=app.config.get("WTF_CSRF_TIME_LIMIT", 3600),
+        )
+        if not resposta.cache_control:
+            resposta.cache_control.private = True
+            resposta.cache_control.no_cache = True
+    return comprimir_resposta(
+        resposta, request, nivel=COMPRESSAO_NIVEL, tamanho_minimo=COMPRESSAO_MINIMO
+    )
+
+
+@app.route("/static/dist/<path:nome>")
+def asset_versionado(nome):
+    """Serve os assets com hash (e a variante .br/.gz aceita pelo navegador)"""
+    arquivo, encoding = variante_comprimida(
+        os.path.join(app.static_folder, "dist"), nome, request.accept_encodings
+    )
+    resposta = send_from_directory(
+        os.path.join(app.static_folder, "dist"),
+        arquivo,
+        mimetype=mimetypes.guess_type(nome)[0],
+        max_age=31536000,
+    )
+    resposta.cache_control.immutable = True
+    resposta.content_encoding = encoding
+    resposta.vary.add("Accept-Encoding")
+    return resposta
+
 
 # =============== VALIDADORES ===============
 
@@ -235,53 +388,25 @@ def criar_badges_padrao():
             badge = Badge(**badge_data)
             db.session.add(badge)
     db.session.commit()
+    limpar_cache_catalogo()
 
 
-def verificar_e_conceder_badge(user_id, criterio):
-    """Verifica se o usuário atende ao critério e concede o badge se não tiver"""
-    user = User.query.get(user_id)
-    badge = Badge.query.filter_by(criterio=criterio).first()
-    if not badge:
-        return
-
-    # Verificar se já tem
-    if UserBadge.query.filter_by(user_id=user_id, badge_id=badge.id).first():
-        return
-
-    # Verificar condição
-    conceder = False
-    if criterio == "primeira_atividade":
-        conceder = len(user.atividades) >= 1
-    elif criterio == "primeira_meta_concluida":
-        conceder = (
-            Meta.query.filter_by(user_id=user_id, status="concluido").count() >= 1
-        )
-    elif criterio == "10_horas":
-        tempo_total = 0
-        for atividade in user.atividades:
-            tempo_total += parse_duration_to_minutes(atividade.duracao or "0")
-        conceder = tempo_total >= 600  # 10 horas
-    elif criterio == "5_materias":
-        conceder = len(user.materias) >= 5
-
-    if conceder:
-        user_badge = UserBadge(user_id=user_id, badge_id=badge.id)
-        db.session.add(user_badge)
-        db.session.commit()
+def verificar_e_conceder_badge(user_id, *criterios):
+    """
+    Verifica os critérios informados e concede os badges que o usuário ainda não tem
 
+    Badges e notificações entram na transação corrente; quem chama faz o commit.
+    """
+    for badge in verificar_badges(user_id, *criterios):
         # Notificação
-        criar_notificacao(
-            user_id=user_id,
-            tipo="conquista",
-            titulo=f"🏆 Badge Conquistado: {badge.nome}!",
-            mensagem=f"Parabéns! Você ganhou o badge '{badge.nome}' - {badge.descricao}",
-            icone="fa-trophy",
-        )
+        criar_notificacao(user_id=user_id, **dados_notificacao_badge(badge))
 
 
 with app.app_context():
     try:
         db.create_all()
+        criar_indice_sqlite(db.session.connection())
+        db.session.commit()
         criar_badges_padrao()
         print("✅ Banco de dados conectado com sucesso!")
     except Exception as e:
@@ -346,33 +471,34 @@ def verificar_rate_limit(ip, dicionario, max_tentativas=5):
         return True, "Permitido"
 
 
-def criar_notificacao(user_id, tipo, titulo, mensagem, link=None, icone="fa-bell"):
-    """Cria uma nova notificação para o usuário"""
-    try:
-        notificacao = Notificacao(
-            user_id=user_id,
-            tipo=tipo,
-            titulo=titulo,
-            mensagem=mensagem,
-            link=link,
-            icone=icone,
-        )
-        db.session.add(notificacao)
-        db.session.commit()
-    except Exception as e:
-        print(f"Erro ao criar notificação: {e}")
-        db.session.rollback()
+def tempo_por_materia_do_usuario(user_id):
+    """Soma no banco os minutos estudados em cada matéria"""
+    linhas = (
+        db.session.query(Atividade.materia, func.sum(Atividade.duracao_minutos))
+        .filter(Atividade.user_id == user_id, Atividade.duracao_minutos.isnot(None))
+        .group_by(Atividade.materia)
+        .all()
+    )
+    return {materia: int(total or 0) for materia, total in linhas}
 
 
-def parse_duration_to_minutes(duracao):
-    """Converte duração HH:MM para minutos"""
-    if not duracao:
-        return 0
-    try:
-        hours, minutes = map(int, duracao.split(":"))
-        return hours * 60 + minutes
-    except:
-        return 0
+def materias_ordenadas_por_tempo(user_id):
+    """Matérias do usuário ordenadas pelo tempo estudado (maior primeiro)"""
+    tempos = (
+        db.session.query(
+            Atividade.materia.label("nome"),
+            func.sum(Atividade.duracao_minutos).label("minutos"),
+        )
+        .filter(Atividade.user_id == user_id)
+        .group_by(Atividade.materia)
+        .subquery()
+    )
+    return (
+        Materia.query.filter_by(user_id=user_id)
+        .outerjoin(tempos, tempos.c.nome == Materia.nome)
+        .order_by(func.coalesce(tempos.c.minutos, 0).desc(), Materia.id)
+        .all()
+    )
 
 
 # =============== PROTEÇÃO CSRF ===============
@@ -432,7 +558,7 @@ def register():
             new_user = User(name=name, email=email, password=hashed_password)
 
             db.session.add(new_user)
-            db.session.commit()
+            db.session.flush()  # gera o id do novo usuário
 
             # Criar notificação de boas-vindas
             criar_notificacao(
@@ -443,6 +569,7 @@ def register():
                 link="/dashboard",
                 icone="fa-rocket",
             )
+            db.session.commit()
 
             flash(
                 "Cadastro realizado com sucesso! Faça login para continuar.", "success"
@@ -493,6 +620,7 @@ def login():
                 mensagem=f"Você fez login em {datetime.utcnow().strftime('%d/%m/%Y às %H:%M')}",
                 icone="fa-right-to-bracket",
             )
+            db.session.commit()
 
             flash("Login realizado com sucesso!", "success")
             return redirect(url_for("dashboard"))
@@ -522,14 +650,10 @@ def esqueci_senha():
 
             user.reset_token = token
             user.reset_expires = expires
-            db.session.commit()
 
-            # Enviar email
+            # Enfileirar email (enviado pelo worker `flask processar-emails`)
             try:
-                from flask_mail import Message
-
-                msg = Message("Redefinição de Senha - FocusUp", recipients=[email])
-                msg.body = f"""
+                corpo = f"""
 Olá {user.name or 'usuário'},
 
 Você solicitou a redefinição de senha da sua conta no FocusUp.
@@ -544,13 +668,15 @@ Se você não solicitou esta redefinição, ignore este email.
 Atenciosamente,
 Equipe FocusUp
                 """
-                mail.send(msg)
+                enfileirar_email(email, "Redefinição de Senha - FocusUp", corpo)
+                db.session.commit()
                 flash(
                     "Email de redefinição enviado! Verifique sua caixa de entrada.",
                     "success",
                 )
             except Exception as e:
-                print(f"Erro ao enviar email: {e}")
+                db.session.rollback()
+                print(f"Erro ao enfileirar email: {e}")
                 flash("Erro ao enviar email. Tente novamente mais tarde.", "error")
         else:
             # Mesmo se não existir, mostrar mensagem de sucesso para não revelar se email existe
@@ -608,108 +734,29 @@ def logout():
     return redirect(url_for("index"))
 
 
-# Dicionário de tradução básico, isso é um teste simulando um tradutor
-traducoes_comuns = {
-    "machine learning": "aprendizado de máquina",
-    "deep learning": "aprendizado profundo",
-    "neural network": "rede neural",
-    "artificial intelligence": "inteligência artificial",
-    "data science": "ciência de dados",
-    "computer vision": "visão computacional",
-    "natural language processing": "processamento de linguagem natural",
-}
-
-
 @app.route("/dashboard", methods=["GET"])
 @login_required
 def dashboard():
-    # busca sempre artigos relacionados a métodos de estudo
-    query = "pomodoro|spaced repetition|active recall|mind map"
-    url = f"https://api.openalex.org/works?filter=title.search:{query},cited_by_count:>3&per-page=10"
-    response = requests.get(url)
-
-    artigos = []
-    if response.status_code == 200:
-        data = response.json()
-        artigos = data.get("results", [])
-
-        for artigo in artigos:
-            titulo = artigo.get("title", "")
-            for eng, pt in traducoes_comuns.items():
-                titulo = titulo.replace(eng, pt)
-                titulo = titulo.replace(eng.title(), pt.title())
-            artigo["title_pt"] = titulo
-
-            resumo = artigo.get("abstract_inverted_index")
-            if resumo:
-                abstract_words = []
-                for word, positions in resumo.items():
-                    for pos in positions:
-                        if len(abstract_words) <= pos:
-                            abstract_words.extend(
-                                [""] * (pos - len(abstract_words) + 1)
-                            )
-                        abstract_words[pos] = word
-                abstract = " ".join(abstract_words)
-                artigo["abstract_pt"] = abstract[:150] + "..."
-            else:
-                artigo["abstract_pt"] = "Resumo não disponível"
-
-            artigo["publication_year"] = artigo.get("publication_year")
-            artigo["cited_by_count"] = artigo.get("cited_by_count", 0)
-            artigo["doi"] = artigo.get("doi")
-            artigo["id"] = artigo.get("id")
-
-    # Dados para gráficos - tempo gasto por matéria
-    from sqlalchemy import func as sql_func
-
-    atividades_com_duracao = (
-        db.session.query(Atividade.materia, Atividade.duracao)
-        .filter_by(user_id=current_user.id)
-        .filter(Atividade.duracao.isnot(None))
-        .all()
-    )
+    # artigos sobre métodos de estudo, servidos do cache (nunca bloqueia na rede)
+    artigos = feed_artigos.obter()
 
-    # Calcular tempo total por matéria
-    tempo_por_materia = {}
-    for materia, duracao in atividades_com_duracao:
-        minutos = parse_duration_to_minutes(duracao)
-        if materia in tempo_por_materia:
-            tempo_por_materia[materia] += minutos
-        else:
-            tempo_por_materia[materia] = minutos
+    # Dados para gráficos - tempo gasto por matéria (agregado no banco)
+    tempo_por_materia = tempo_por_materia_do_usuario(current_user.id)
 
     # Preparar dados para o gráfico
     labels_materias = list(tempo_por_materia.keys())
     data_materias = list(tempo_por_materia.values())
 
-    # Ordenar matérias por tempo gasto (descendente)
-    materia_tempo = []
-    for materia in current_user.materias:
-        tempo = tempo_por_materia.get(materia.nome, 0)
-        materia_tempo.append((materia, tempo))
-
-    def get_tempo(item):
-        return item[1]
-
-    materia_tempo.sort(key=get_tempo, reverse=True)
-    sorted_materias = [m[0] for m in materia_tempo]
-    activities_per_day = (
-        db.session.query(func.date(Atividade.data_criacao), func.count(Atividade.id))
-        .filter_by(user_id=current_user.id)
-        .group_by(func.date(Atividade.data_criacao))
-        .all()
-    )
+    # Matérias ordenadas por tempo gasto (descendente)
+    sorted_materias = materias_ordenadas_por_tempo(current_user.id)
 
-    # Preparar dados para Chart.js
-    labels_dash = [str(row[0]) for row in activities_per_day]
-    data_dash = [row[1] for row in activities_per_day]
+    # Atividades por dia (janela recente, lida do acumulado diário)
+    labels_dash, data_dash = grafico_atividades_por_dia(current_user)
 
     # Estatísticas de metas
-    metas_ativas = Meta.query.filter_by(user_id=current_user.id, status="ativo").count()
-    metas_concluidas = Meta.query.filter_by(
-        user_id=current_user.id, status="concluido"
-    ).count()
+    stats = obter_estatisticas(current_user.id)
+    metas_ativas = stats.metas_ativas
+    metas_concluidas = stats.metas_concluidas
     total_metas = metas_ativas + metas_concluidas
 
     return render_template(
@@ -750,7 +797,7 @@ def adicionar_materia():
     try:
         nova_materia = Materia(nome=nome_materia, user_id=current_user.id)
         db.session.add(nova_materia)
-        db.session.commit()
+        ajustar_estatisticas(current_user.id, total_materias=1)
 
         # Criar notificação
         criar_notificacao(
@@ -763,6 +810,7 @@ def adicionar_materia():
 
         # Verificar badge
         verificar_e_conceder_badge(current_user.id, "5_materias")
+        db.session.commit()
 
         flash(f"Matéria '{nome_materia}' adicionada com sucesso!", "success")
         return redirect(url_for("adicionar_materia_page"))
@@ -777,27 +825,8 @@ def adicionar_materia():
 @login_required
 def adicionar_materia_page():
     """Página para adicionar matéria"""
-    # Calcular tempo por matéria
-    atividades_com_duracao = (
-        db.session.query(Atividade.materia, Atividade.duracao)
-        .filter_by(user_id=current_user.id)
-        .filter(Atividade.duracao.isnot(None))
-        .all()
-    )
-
-    tempo_por_materia = {}
-    for materia, duracao in atividades_com_duracao:
-        minutos = parse_duration_to_minutes(duracao)
-        if materia in tempo_por_materia:
-            tempo_por_materia[materia] += minutos
-        else:
-            tempo_por_materia[materia] = minutos
-
-    # Obter matérias do usuário e ordenar por tempo gasto
-    all_materias = Materia.query.filter_by(user_id=current_user.id).all()
-    sorted_materias = sorted(
-        all_materias, key=lambda m: tempo_por_materia.get(m.nome, 0), reverse=True
-    )
+    # Obter matérias do usuário ordenadas por tempo gasto
+    sorted_materias = materias_ordenadas_por_tempo(current_user.id)
 
     return render_template("adicionar_materia.html", materias=sorted_materias)
 
@@ -841,11 +870,23 @@ def adicionar_atividade():
                 assunto_primario=assunto,
                 descricao=descricao if descricao else None,
                 duracao=duracao if duracao else None,
-                data=data if data else None,
+                data=date.fromisoformat(data) if data else None,
+                data_criacao=datetime.utcnow(),
                 user_id=current_user.id,
             )
             db.session.add(nova_atividade)
-            db.session.commit()
+            ajustar_estatisticas(
+                current_user.id,
+                total_atividades=1,
+                total_minutos=nova_atividade.duracao_minutos or 0,
+            )
+            ajustar_atividade_diaria(
+                current_user.id,
+                nova_atividade.data_criacao,
+                quantidade=1,
+                minutos=nova_atividade.duracao_minutos or 0,
+                data=nova_atividade.data,
+            )
 
             # Criar notificações
             criar_notificacao(
@@ -857,18 +898,16 @@ def adicionar_atividade():
                 icone="fa-check-circle",
             )
 
-            # Notificação de lembrete para amanhã
-            criar_notificacao(
-                user_id=current_user.id,
-                tipo="lembrete",
-                titulo="Lembrete de Estudo 📚",
-                mensagem=f"Não esqueça de revisar '{assunto}' amanhã!",
-                icone="fa-calendar-check",
-            )
+            # Lembrete de revisão, entregue amanhã pelo worker de agendamentos
+            agendar_revisao_atividade(nova_atividade, current_user.fuso_horario)
 
             # Verificar badges
-            verificar_e_conceder_badge(current_user.id, "primeira_atividade")
-            verificar_e_conceder_badge(current_user.id, "10_horas")
+            verificar_e_conceder_badge(
+                current_user.id, "primeira_atividade", "10_horas"
+            )
+
+            # Atividade, contadores, notificações e badges em um único commit
+            db.session.commit()
 
             flash("Atividade adicionada com sucesso!", "success")
             return redirect(url_for("adicionar_atividade"))
@@ -888,11 +927,146 @@ def adicionar_atividade():
     )
 
 
+# Tamanho máximo do arquivo enviado em /importar_atividades
+IMPORTACAO_MAX_MB = int(os.getenv("IMPORTACAO_MAX_MB", 20))
+# Nenhuma requisição passa do maior upload aceito (mais 1 MB para os demais
+# campos do formulário): um corpo maior é recusado com 413 antes de ser lido,
+# inclusive pela verificação do CSRF, que lê o formulário antes da view
+app.config["MAX_CONTENT_LENGTH"] = (IMPORTACAO_MAX_MB + 1) * 1024 * 1024
+
+
+def validar_atividade_importada(campos):
+    """Aplica a uma linha importada as regras do formulário de atividade"""
+    materia = campos.get("materia", "")
+    valido, msg = Validadores.validar_materia(materia)
+    if not valido:
+        return None, msg
+
+    assunto = Validadores.sanitizar_texto(campos.get("assunto_primario", ""))
+    if not assunto or len(assunto) < 2:
+        return None, "Informe o assunto primário (mínimo 2 caracteres)."
+    if len(assunto) > 100:
+        return None, "O assunto deve ter no máximo 100 caracteres."
+
+    duracao = campos.get("duracao") or None
+    valido, msg = Validadores.validar_duracao(duracao)
+    if not valido:
+        return None, msg
+
+    data = campos.get("data") or None
+    if data:
+        try:
+            data = converter_data(data)
+        except ValueError:
+            return None, "Data inválida. Use AAAA-MM-DD ou DD/MM/AAAA."
+
+    return {
+        "materia": materia,
+        "assunto_primario": assunto,
+        "descricao": Validadores.sanitizar_texto(campos.get("descricao", "")) or None,
+        "duracao": duracao,
+        "data": data,
+    }, None
+
+
+def importar_arquivo_de_atividades(user_id, arquivo, nome, tamanho_lote):
+    """Importa um arquivo CSV/JSON de atividades; levanta ValueError se o formato não for aceito"""
+    resumo = importar_atividades(
+        user_id,
+        ler_arquivo(arquivo, nome),
+        validar_atividade_importada,
+        tamanho_lote=tamanho_lote,
+    )
+    if resumo["importadas"]:
+        verificar_e_conceder_badge(
+            user_id, "primeira_atividade", "10_horas", "5_materias"
+        )
+    # Notificação de resumo e badges
+    db.session.commit()
+    return resumo
+
+
+@app.route("/importar_atividades", methods=["GET", "POST"])
+@login_required
+def importar_atividades_view():
+    """Importa atividades de uma planilha (CSV) ou de um arquivo JSON"""
+    if request.method == "GET":
+        return render_template("importar_atividades.html")
+
+    arquivo = request.files.get("arquivo")
+    if not arquivo or arquivo.filename == "":
+        erro = "Nenhum arquivo selecionado."
+    elif (request.content_length or 0) > IMPORTACAO_MAX_MB * 1024 * 1024:
+        erro = f"O arquivo deve ter no máximo {IMPORTACAO_MAX_MB} MB."
+    else:
+        try:
+            resumo = importar_arquivo_de_atividades(
+                current_user.id, arquivo.stream, arquivo.filename, LOTE_IMPORTACAO
+            )
+            return render_template("importar_atividades.html", resumo=resumo)
+        except ValueError as e:
+            erro = str(e)
+    return render_template("importar_atividades.html", erro=erro), 400
+
+
+def filtros_atividades():
+    """Lê ordem e filtros da listagem de atividades; levanta ValueError se inválidos"""
+    ordem = request.args.get("ordem", "recente")
+    if ordem not in ORDENACOES:
+        raise ValueError(ordem)
+
+    inicio = request.args.get("de", "").strip()
+    fim = request.args.get("ate", "").strip()
+    filtros = {
+        "materia": request.args.get("materia", "").strip() or None,
+        "inicio": datetime.strptime(inicio, "%Y-%m-%d").date() if inicio else None,
+        "fim": datetime.strptime(fim, "%Y-%m-%d").date() if fim else None,
+        "texto": request.args.get("q", "").strip()[:100] or None,
+    }
+    return ordem, filtros
+
+
 @app.route("/listar_atividades")
 @login_required
 def listar_atividades():
-    atividades = Atividade.query.filter_by(user_id=current_user.id).all()
-    return render_template("listar_atividades.html", atividades=atividades)
+    try:
+        ordem, filtros = filtros_atividades()
+    except ValueError:
+        flash("Filtro inválido.", "error")
+        return redirect(url_for("listar_atividades"))
+
+    atividades, proximo_cursor = pagina_atividades(current_user.id, ordem, **filtros)
+    materias = (
+        Materia.query.filter_by(user_id=current_user.id).order_by(Materia.nome).all()
+    )
+    return render_template(
+        "listar_atividades.html",
+        atividades=atividades,
+        proximo_cursor=proximo_cursor,
+        materias=materias,
+        ordem=ordem,
+        filtros=filtros,
+        stats=obter_estatisticas(current_user.id),
+    )
+
+
+@app.route("/api/atividades")
+@login_required
+def api_atividades():
+    """Página de atividades (filtrada e ordenada) para a busca e a rolagem infinita"""
+    try:
+        ordem, filtros = filtros_atividades()
+        atividades, proximo_cursor = pagina_atividades(
+            current_user.id, ordem, cursor=request.args.get("cursor"), **filtros
+        )
+    except ValueError:
+        return {"success": False, "message": "Filtro ou cursor inválido"}, 400
+
+    return {
+        "success": True,
+        "html": render_template("atividade_cards.html", atividades=atividades),
+        "proximo_cursor": proximo_cursor,
+    }
 
 
 @app.route("/editar_atividade/<int:atividade_id>", methods=["GET", "POST"])
@@ -916,10 +1090,19 @@ def editar_atividade(atividade_id):
         if not materia or not assunto:
             flash("Informe pelo menos a matéria e o assunto primário.", "error")
         else:
+            minutos_anteriores = atividade.duracao_minutos or 0
             atividade.materia = materia
             atividade.assunto_primario = assunto
             atividade.descricao = descricao
             atividade.duracao = duracao
+            delta_minutos = (atividade.duracao_minutos or 0) - minutos_anteriores
+            ajustar_estatisticas(current_user.id, total_minutos=delta_minutos)
+            ajustar_atividade_diaria(
+                current_user.id,
+                atividade.data_criacao,
+                minutos=delta_minutos,
+                data=atividade.data,
+            )
 
             db.session.commit()
             flash("Atividade atualizada com sucesso!", "success")
@@ -958,6 +1141,8 @@ def editar_materia(materia_id):
 
         try:
             materia.nome = nome
+            # O nome aparece nas metas do calendário, cuja ETag depende da versão
+            ajustar_estatisticas(current_user.id)
             db.session.commit()
             flash("Matéria atualizada com sucesso!", "success")
             return redirect(url_for("dashboard"))
@@ -977,6 +1162,7 @@ def excluir_materia(materia_id):
         return redirect(url_for("dashboard"))
     try:
         db.session.delete(materia)
+        ajustar_estatisticas(current_user.id, total_materias=-1)
         db.session.commit()
         flash("Matéria excluída com sucesso.", "success")
     except Exception as e:
@@ -997,6 +1183,19 @@ def excluir_atividade(atividade_id):
         return redirect(url_for("listar_atividades"))
     try:
         db.session.delete(atividade)
+        ajustar_estatisticas(
+            current_user.id,
+            total_atividades=-1,
+            total_minutos=-(atividade.duracao_minutos or 0),
+        )
+        ajustar_atividade_diaria(
+            current_user.id,
+            atividade.data_criacao,
+            quantidade=-1,
+            minutos=-(atividade.duracao_minutos or 0),
+            data=atividade.data,
+        )
+        cancelar_agendamentos("revisao_atividade", atividade.id)
         db.session.commit()
         flash("Atividade excluída com sucesso!", "success")
     except Exception as e:
@@ -1006,68 +1205,141 @@ def excluir_atividade(atividade_id):
     return redirect(url_for("listar_atividades"))
 
 
+# Páginas informativas: o conteúdo só muda com deploy, tema ou idioma
+PAGINAS_INFORMATIVAS = (
+    "sobre.html",
+    "politica_privacidade.html",
+    "termos_servico.html",
+    "ajuda.html",
+)
+cache_paginas = CachePaginas(
+    os.getenv("VERSAO_DEPLOY")
+    or versao_paginas(app.jinja_env, PAGINAS_INFORMATIVAS, manifesto_assets)
+)
+
+
+def render_pagina_informativa(template, **contexto):
+    """
+    Como render_template, mas com a página inteira vinda do cache
+
+    Só as partes do usuário no base.html (token CSRF, foto, nome) são
+    renderizadas a cada requisição.
+    """
+    if app.jinja_env.auto_reload:
+        # Em desenvolvimento os templates mudam sem deploy
+        return render_template(template, **contexto)
+
+    autenticado = current_user.is_authenticated
+    chave = (
+        request.endpoint,
+        autenticado,
+        autenticado and bool(current_user.tema_escuro),
+        current_user.idioma if autenticado else None,
+    )
+    template = app.jinja_env.get_template(template)
+    app.update_template_context(contexto)
+    partes = cache_paginas.obter(chave, lambda: renderizar_molde(template, contexto))
+    return preencher_molde(partes, app.jinja_env, contexto)
+
+
 @app.route("/ajuda")
 @login_required
 def ajuda():
-    return render_template("ajuda.html")
+    return render_pagina_informativa("ajuda.html")
 
 
-@app.route("/listar_noticacoes")
-@login_required
-def listar_notificacoes():
+def filtros_notificacoes():
+    """Lê os filtros tipo/lida da query string no formato usado pela consulta"""
     tipo_filtro = request.args.get("tipo", "todos")
     lida_filtro = request.args.get("lida", "todos")
+    tipo = None if tipo_filtro == "todos" else tipo_filtro
+    lida = {"lidas": True, "nao_lidas": False}.get(lida_filtro)
+    return tipo_filtro, lida_filtro, tipo, lida
+
+
+@app.route("/buscar")
+@login_required
+def pagina_buscar():
+    """Busca textual nas atividades e metas do usuário"""
+    consulta = request.args.get("q", "").strip()[:100]
+    resultados = buscar(current_user.id, consulta) if consulta else []
+    return render_template("buscar.html", consulta=consulta, resultados=resultados)
 
-    query = Notificacao.query.filter_by(user_id=current_user.id)
 
-    if tipo_filtro != "todos":
-        query = query.filter_by(tipo=tipo_filtro)
+@app.route("/api/buscar")
+@login_required
+def api_buscar():
+    consulta = request.args.get("q", "").strip()[:100]
+    resultados = buscar(current_user.id, consulta) if consulta else []
+    for resultado in resultados:
+        resultado["trecho"] = str(resultado["trecho"])
+    return {"consulta": consulta, "resultados": resultados}
 
-    if lida_filtro == "lidas":
-        query = query.filter_by(lida=True)
-    elif lida_filtro == "nao_lidas":
-        query = query.filter_by(lida=False)
 
-    notificacoes = query.order_by(Notificacao.data_criacao.desc()).all()
+@app.route("/listar_noticacoes")
+@login_required
+def listar_notificacoes():
+    tipo_filtro, lida_filtro, tipo, lida = filtros_notificacoes()
 
-    # Estatísticas
-    total_notificacoes = len(notificacoes)
-    nao_lidas = sum(1 for n in notificacoes if not n.lida)
+    notificacoes, proximo_cursor = pagina_notificacoes(current_user.id, tipo, lida)
 
+    # Sem contagem total: o custo da página não cresce com o histórico, e as
+    # não lidas vêm do contador em user
     return render_template(
         "listar_notificacoes.html",
         notificacoes=notificacoes,
+        proximo_cursor=proximo_cursor,
         tipo_filtro=tipo_filtro,
         lida_filtro=lida_filtro,
-        total_notificacoes=total_notificacoes,
-        nao_lidas=nao_lidas,
+        nao_lidas=current_user.notificacoes_nao_lidas,
     )
 
 
+@app.route("/api/notificacoes")
+@login_required
+def api_notificacoes():
+    """Próxima página da caixa de entrada para a rolagem infinita"""
+    _, _, tipo, lida = filtros_notificacoes()
+    try:
+        notificacoes, proximo_cursor = pagina_notificacoes(
+            current_user.id, tipo, lida, cursor=request.args.get("cursor")
+        )
+    except ValueError:
+        return {"success": False, "message": "Cursor inválido"}, 400
+
+    return {
+        "success": True,
+        "html": render_template("notificacao_cards.html", notificacoes=notificacoes),
+        "proximo_cursor": proximo_cursor,
+    }
+
+
 @app.route("/marcar_notificacao_lida/<int:notificacao_id>", methods=["POST"])
 @login_required
 def marcar_notificacao_lida(notificacao_id):
-    notificacao = Notificacao.query.filter_by(
-        id=notificacao_id, user_id=current_user.id
-    ).first()
+    filtro = Notificacao.query.filter_by(id=notificacao_id, user_id=current_user.id)
 
-    if notificacao:
-        notificacao.lida = True
+    # UPDATE condicional: só quem de fato mudou a notificação decrementa o contador
+    if filtro.filter_by(lida=False).update({"lida": True}):
+        ajustar_nao_lidas(current_user.id, -1)
         db.session.commit()
         return {"success": True}, 200
 
+    if filtro.first():
+        return {"success": True}, 200
+
     return {"success": False, "message": "Notificação não encontrada"}, 404
 
 
 @app.route("/excluir_notificacao/<int:notificacao_id>", methods=["POST"])
 @login_required
 def excluir_notificacao(notificacao_id):
-    notificacao = Notificacao.query.filter_by(
-        id=notificacao_id, user_id=current_user.id
-    ).first()
+    filtro = Notificacao.query.filter_by(id=notificacao_id, user_id=current_user.id)
 
-    if notificacao:
-        db.session.delete(notificacao)
+    # Só a exclusão de uma notificação não lida decrementa o contador
+    nao_lidas_removidas = filtro.filter_by(lida=False).delete()
+    if nao_lidas_removidas or filtro.delete():
+        ajustar_nao_lidas(current_user.id, -nao_lidas_removidas)
         db.session.commit()
         return {"success": True}, 200
 
@@ -1077,36 +1349,44 @@ def excluir_notificacao(notificacao_id):
 @app.route("/marcar_todas_lidas", methods=["POST"])
 @login_required
 def marcar_todas_lidas():
-    Notificacao.query.filter_by(user_id=current_user.id, lida=False).update(
+    marcadas = Notificacao.query.filter_by(user_id=current_user.id, lida=False).update(
         {"lida": True}
     )
+    ajustar_nao_lidas(current_user.id, -marcadas)
     db.session.commit()
     return {"success": True}, 200
 
 
+def contar_nao_lidas(user_id):
+    return (
+        db.session.query(User.notificacoes_nao_lidas).filter_by(id=user_id).scalar()
+        or 0
+    )
+
+
 @app.route("/api/notificacoes_nao_lidas")
 @login_required
 def api_notificacoes_nao_lidas():
-    nao_lidas = Notificacao.query.filter_by(user_id=current_user.id, lida=False).count()
-    return {"nao_lidas": nao_lidas}
+    # current_user já foi carregado pela chave primária no início da requisição
+    return {"nao_lidas": current_user.notificacoes_nao_lidas}
 
 
 @app.route("/sobre_nos")
 @login_required
 def sobre_nos():
-    return render_template("sobre.html")
+    return render_pagina_informativa("sobre.html")
 
 
 @app.route("/politica-privacidade")
 @login_required
 def politica_privacidade():
-    return render_template("politica_privacidade.html")
+    return render_pagina_informativa("politica_privacidade.html")
 
 
 @app.route("/termos-servico")
 @login_required
 def termos_servico():
-    return render_template(
+    return render_pagina_informativa(
         "termos_servico.html", last_update="01 de Setembro de 2025", version="1.0"
     )
 
@@ -1115,22 +1395,12 @@ def termos_servico():
 @login_required
 def perfil():
     """Página de perfil do usuário"""
-    # Estatísticas reais
-    atividades_count = Atividade.query.filter_by(user_id=current_user.id).count()
-    materias_count = Materia.query.filter_by(user_id=current_user.id).count()
-    # Sequência: dias consecutivos com atividades (simplificado)
-    hoje = datetime.utcnow().date()
-    sequencia = 0
-    for i in range(30):  # últimos 30 dias
-        data = hoje - timedelta(days=i)
-        if (
-            Atividade.query.filter_by(user_id=current_user.id)
-            .filter(db.func.date(Atividade.data_criacao) == data)
-            .first()
-        ):
-            sequencia += 1
-        else:
-            break
+    # Estatísticas reais (lidas da tabela de contadores)
+    stats = obter_estatisticas(current_user.id)
+    atividades_count = stats.total_atividades
+    materias_count = stats.total_materias
+    # Sequência: dias consecutivos com atividades, no fuso do usuário
+    sequencia, maior_sequencia = obter_sequencias(current_user)
 
     # Badges do usuário
     user_badges = UserBadge.query.filter_by(user_id=current_user.id).all()
@@ -1140,6 +1410,7 @@ def perfil():
         atividades_count=atividades_count,
         materias_count=materias_count,
         sequencia=sequencia,
+        maior_sequencia=maior_sequencia,
         user_badges=user_badges,
     )
 
@@ -1202,6 +1473,51 @@ def alterar_senha():
     return redirect(url_for("perfil"))
 
 
+# Fotos de perfil: miniaturas com nome pelo hash do conteúdo. Com vários nós,
+# AVATARES_DIR deve ser uma pasta compartilhada (ou outro AVATARES_BACKEND), e
+# AVATARES_URL pode apontar para um CDN que sirva essa mesma pasta.
+AVATARES_DIR = os.getenv("AVATARES_DIR", os.path.join(app.instance_path, "avatares"))
+AVATARES_URL = os.getenv("AVATARES_URL", "").rstrip("/")
+AVATAR_MAX_MB = int(os.getenv("AVATAR_MAX_MB", 5))
+armazenamento_avatares = criar_armazenamento(
+    os.getenv("AVATARES_BACKEND", "local"), pasta=AVATARES_DIR
+)
+
+
+@app.template_global()
+def url_avatar(user, tamanho="p"):
+    """URL da foto de perfil no tamanho pedido (fotos antigas ficam em static/)"""
+    if not eh_chave_avatar(user.photo):
+        return url_for("static", filename="imagens/" + user.photo)
+    nome = nome_avatar(user.photo, tamanho)
+    if AVATARES_URL:
+        return f"{AVATARES_URL}/{nome}"
+    return url_for("avatar", nome=nome)
+
+
+@app.route("/avatares/<path:nome>")
+def avatar(nome):
+    """Serve as miniaturas; o nome muda junto com o conteúdo, então nunca expira"""
+    resposta = send_from_directory(AVATARES_DIR, nome, max_age=31536000)
+    resposta.cache_control.immutable = True
+    return resposta
+
+
+def descartar_foto(photo, user_id):
+    """Apaga os arquivos de uma foto que não é mais usada"""
+    if not photo:
+        return
+    if not eh_chave_avatar(photo):
+        filepath = os.path.join(app.root_path, "static", "imagens", photo)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        return
+    # A mesma foto enviada por outro usuário aponta para os mesmos arquivos
+    em_uso = User.query.filter(User.photo == photo, User.id != user_id).first()
+    if em_uso is None:
+        remover_avatar(photo, armazenamento_avatares)
+
+
 @app.route("/upload_foto", methods=["POST"])
 @login_required
 def upload_foto():
@@ -1215,15 +1531,27 @@ def upload_foto():
         flash("Nenhum arquivo selecionado.", "error")
         return redirect(url_for("perfil"))
 
-    if file and allowed_file(file.filename):
-        filename = secure_filename(f"user_{current_user.id}_{file.filename}")
-        filepath = os.path.join(app.root_path, "static", "imagens", filename)
-        file.save(filepath)
-        current_user.photo = filename
-        db.session.commit()
-        flash("Foto de perfil atualizada com sucesso!", "success")
-    else:
+    if not allowed_file(file.filename):
         flash("Tipo de arquivo não permitido.", "error")
+        return redirect(url_for("perfil"))
+
+    dados = file.read(AVATAR_MAX_MB * 1024 * 1024 + 1)
+    if len(dados) > AVATAR_MAX_MB * 1024 * 1024:
+        flash(f"A imagem deve ter no máximo {AVATAR_MAX_MB}MB.", "error")
+        return redirect(url_for("perfil"))
+
+    try:
+        chave = processar_avatar(dados, armazenamento_avatares)
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for("perfil"))
+
+    foto_anterior = current_user.photo
+    current_user.photo = chave
+    db.session.commit()
+    if foto_anterior != chave:
+        descartar_foto(foto_anterior, current_user.id)
+    flash("Foto de perfil atualizada com sucesso!", "success")
 
     return redirect(url_for("perfil"))
 
@@ -1233,276 +1561,109 @@ def upload_foto():
 def remover_foto():
     """Remove a foto de perfil"""
     try:
-        # Remover o arquivo físico se existir
-        if current_user.photo:
-            filepath = os.path.join(
-                app.root_path, "static", "imagens", current_user.photo
-            )
-            if os.path.exists(filepath):
-                os.remove(filepath)
+        foto_anterior = current_user.photo
 
         # Limpar o campo photo no banco
         current_user.photo = None
         db.session.commit()
 
+        # Remover os arquivos depois do commit
+        descartar_foto(foto_anterior, current_user.id)
+
         return {"success": True, "message": "Foto removida com sucesso!"}, 200
     except Exception as e:
         db.session.rollback()
         return {"success": False, "message": str(e)}, 500
 
 
-@app.route("/baixar_dados")
+# formato -> (mimetype, extensão)
+FORMATOS_EXPORTACAO = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "zip": ("application/zip", "zip"),
+}
+
+
+@app.route("/exportar_dados.<formato>")
+@app.route("/exportar_dados/<tabela>.<formato>")
 @login_required
-def baixar_dados():
-    """Permite ao usuário baixar todos os seus dados em PDF"""
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.platypus import (
-            SimpleDocTemplate,
-            Paragraph,
-            Spacer,
-            Table,
-            TableStyle,
-        )
-        from reportlab.lib.units import inch
-        from io import BytesIO
-
-        # Criar buffer para o PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Título do documento
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1,  # Centralizado
-        )
-        story.append(Paragraph("Relatório de Dados - FocusUp", title_style))
-        story.append(Spacer(1, 12))
-
-        # Informações do usuário
-        story.append(Paragraph("Informações do Usuário", styles["Heading2"]))
-        user_data = [
-            ["ID", str(current_user.id)],
-            ["Nome", current_user.name or "N/A"],
-            ["Email", current_user.email],
-            [
-                "Data de Cadastro",
-                (
-                    current_user.date_created.strftime("%d/%m/%Y %H:%M")
-                    if hasattr(current_user, "date_created")
-                    and current_user.date_created
-                    else "N/A"
-                ),
-            ],
-            ["Foto", current_user.photo or "N/A"],
-        ]
+def exportar_dados(formato, tabela=None):
+    """Exporta os dados do usuário em CSV, NDJSON ou zip de CSVs, em streaming"""
+    if formato not in FORMATOS_EXPORTACAO or (
+        tabela is not None and tabela not in TABELAS_EXPORTACAO
+    ):
+        abort(404)
+    # CSV é sempre de uma tabela; zip e NDJSON podem juntar todas
+    if formato == "csv" and tabela is None:
+        abort(404)
+    tabelas = [tabela] if tabela else list(TABELAS_EXPORTACAO)
+
+    if formato == "csv":
+        conteudo = gerar_csv(tabela, current_user.id)
+    elif formato == "ndjson":
+        conteudo = gerar_ndjson(current_user.id, tabelas)
+    else:
+        conteudo = gerar_zip(current_user.id, tabelas)
 
-        user_table = Table(user_data, colWidths=[2 * inch, 4 * inch])
-        user_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 12),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ]
-            )
-        )
-        story.append(user_table)
-        story.append(Spacer(1, 20))
-
-        # Matérias
-        story.append(Paragraph("Matérias Cadastradas", styles["Heading2"]))
-        if current_user.materias:
-            materias_data = [["Nome", "Data de Criação"]]
-            for materia in current_user.materias:
-                data_criacao = (
-                    materia.date_created.strftime("%d/%m/%Y %H:%M")
-                    if hasattr(materia, "date_created") and materia.date_created
-                    else "N/A"
-                )
-                materias_data.append([materia.nome, data_criacao])
-
-            materias_table = Table(materias_data, colWidths=[3 * inch, 3 * inch])
-            materias_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgreen),
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, 0), 12),
-                        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                        ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                    ]
-                )
-            )
-            story.append(materias_table)
-        else:
-            story.append(Paragraph("Nenhuma matéria cadastrada.", styles["Normal"]))
-        story.append(Spacer(1, 20))
-
-        # Atividades
-        story.append(Paragraph("Histórico de Atividades", styles["Heading2"]))
-        if current_user.atividades:
-            atividades_data = [["Matéria", "Assunto", "Duração", "Data", "Descrição"]]
-
-            # Limitar a 50 atividades mais recentes para não sobrecarregar o PDF
-            atividades_recentes = sorted(
-                current_user.atividades, key=lambda x: x.data_criacao, reverse=True
-            )[:50]
-
-            for atividade in atividades_recentes:
-                data_formatada = (
-                    atividade.data.strftime("%d/%m/%Y") if atividade.data else "N/A"
-                )
-                descricao_curta = (
-                    (atividade.descricao[:50] + "...")
-                    if atividade.descricao and len(atividade.descricao) > 50
-                    else atividade.descricao or "N/A"
-                )
-                atividades_data.append(
-                    [
-                        atividade.materia,
-                        atividade.assunto_primario,
-                        atividade.duracao or "N/A",
-                        data_formatada,
-                        descricao_curta,
-                    ]
-                )
+    mimetype, extensao = FORMATOS_EXPORTACAO[formato]
+    nome = f"focusup_{tabela or 'dados'}_{datetime.utcnow():%Y%m%d}.{extensao}"
+    resposta = Response(stream_with_context(conteudo), mimetype=mimetype)
+    resposta.headers["Content-Disposition"] = f'attachment; filename="{nome}"'
+    resposta.headers["Cache-Control"] = "no-store"
+    return resposta
 
-            atividades_table = Table(
-                atividades_data,
-                colWidths=[1.5 * inch, 1.5 * inch, 1 * inch, 1.2 * inch, 2.3 * inch],
-            )
-            atividades_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.lightyellow),
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, 0), 10),
-                        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                        ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                        ("FONTSIZE", (0, 1), (-1, -1), 8),
-                    ]
-                )
-            )
-            story.append(atividades_table)
-
-            if len(current_user.atividades) > 50:
-                story.append(
-                    Paragraph(
-                        f"<i>Mostrando as 50 atividades mais recentes de um total de {len(current_user.atividades)}.</i>",
-                        styles["Normal"],
-                    )
-                )
-        else:
-            story.append(Paragraph("Nenhuma atividade registrada.", styles["Normal"]))
-        story.append(Spacer(1, 20))
-
-        # Estatísticas
-        story.append(Paragraph("Estatísticas Gerais", styles["Heading2"]))
-
-        # Calcular estatísticas
-        total_atividades = len(current_user.atividades)
-        total_materias = len(current_user.materias)
-
-        # Calcular tempo total estudado
-        tempo_total = 0
-        for atividade in current_user.atividades:
-            if atividade.duracao:
-                try:
-                    horas, minutos = map(int, atividade.duracao.split(":"))
-                    tempo_total += horas * 60 + minutos
-                except:
-                    pass
-
-        horas_totais = tempo_total // 60
-        minutos_restantes = tempo_total % 60
-
-        # Data e hora de Brasília (UTC-3)
-        from datetime import timezone, timedelta
-
-        brasilia_tz = timezone(timedelta(hours=-3))
-        data_exportacao = datetime.now(brasilia_tz).strftime("%d/%m/%Y %H:%M:%S")
-
-        stats_data = [
-            ["Total de Atividades", str(total_atividades)],
-            ["Total de Matérias", str(total_materias)],
-            ["Tempo Total Estudado", f"{horas_totais}h {minutos_restantes}min"],
-            ["Data de Exportação", data_exportacao + " (Horário de Brasília)"],
-        ]
 
-        stats_table = Table(stats_data, colWidths=[3 * inch, 3 * inch])
-        stats_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.lightcoral),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 12),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ]
-            )
-        )
-        story.append(stats_table)
-        story.append(Spacer(1, 20))
-
-        # Rodapé
-        footer_style = ParagraphStyle(
-            "Footer",
-            parent=styles["Normal"],
-            fontSize=10,
-            textColor=colors.gray,
-            alignment=1,
-        )
-        story.append(
-            Paragraph("Relatório gerado automaticamente pelo FocusUp", footer_style)
-        )
+# Relatórios PDF gerados pelo worker `flask processar-relatorios`
+RELATORIOS_DIR = os.getenv(
+    "RELATORIOS_DIR", os.path.join(app.instance_path, "relatorios")
+)
 
-        # Gerar PDF
-        doc.build(story)
-        buffer.seek(0)
 
-        # Retornar PDF como resposta
-        from flask import Response
+@app.route("/relatorio_pdf", methods=["POST"])
+@login_required
+def solicitar_relatorio_pdf():
+    """Pede a geração do relatório PDF; se os dados não mudaram, ele já está pronto"""
+    chave = chave_relatorio(current_user)
+    status = status_relatorio(RELATORIOS_DIR, current_user.id, chave)
+    if status != "pronto":
+        status = solicitar_relatorio(current_user.id, chave)
+        db.session.commit()
+    return {"success": True, "status": status}
 
-        response = Response(
-            buffer.getvalue(),
-            mimetype="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment;filename=relatorio_dados_focusup_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf"
-            },
-        )
 
-        return response
+@app.route("/api/relatorio_pdf")
+@login_required
+def api_relatorio_pdf():
+    """Situação do relatório PDF dos dados atuais do usuário"""
+    chave = chave_relatorio(current_user)
+    return {
+        "success": True,
+        "status": status_relatorio(RELATORIOS_DIR, current_user.id, chave),
+    }
 
-    except ImportError:
-        # Fallback para JSON se reportlab não estiver instalado
+
+@app.route("/baixar_dados")
+@login_required
+def baixar_dados():
+    """Baixa o relatório PDF dos dados do usuário, servido direto do disco"""
+    chave = chave_relatorio(current_user)
+    caminho = caminho_relatorio(RELATORIOS_DIR, current_user.id, chave)
+    if not os.path.exists(caminho):
+        status = solicitar_relatorio(current_user.id, chave)
+        db.session.commit()
         return {
-            "error": "Biblioteca PDF não instalada. Execute: pip install reportlab"
-        }, 500
-    except Exception as e:
-        print(f"Erro ao gerar PDF: {e}")
-        return {"error": "Erro interno do servidor"}, 500
+            "success": False,
+            "status": status,
+            "message": "O relatório está sendo gerado. Tente novamente em instantes.",
+        }, 202
+    return send_file(
+        caminho,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name="relatorio_dados_focusup.pdf",
+        etag=chave,
+        max_age=0,
+    )
 
 
 @app.route("/excluir_conta", methods=["POST"])
@@ -1511,12 +1672,7 @@ def excluir_conta():
     """Exclui permanentemente a conta do usuário"""
     try:
         # Remover foto se existir
-        if current_user.photo:
-            filepath = os.path.join(
-                app.root_path, "static", "imagens", current_user.photo
-            )
-            if os.path.exists(filepath):
-                os.remove(filepath)
+        descartar_foto(current_user.photo, current_user.id)
 
         # Obter ID do usuário antes de deletar
         user_id = current_user.id
@@ -1527,6 +1683,12 @@ def excluir_conta():
         # Deletar todas as atividades e matérias do usuário
         Atividade.query.filter_by(user_id=user_id).delete()
         Materia.query.filter_by(user_id=user_id).delete()
+        UserStats.query.filter_by(user_id=user_id).delete()
+        AtividadeDiaria.query.filter_by(user_id=user_id).delete()
+        NotificacaoArquivada.query.filter_by(user_id=user_id).delete()
+        Agendamento.query.filter_by(user_id=user_id).delete()
+        remover_usuario_da_busca(user_id)
+        remover_relatorios(RELATORIOS_DIR, user_id)
 
         # Deletar o usuário
         user = User.query.get(user_id)
@@ -1586,6 +1748,7 @@ def salvar_sessao_pomodoro():
                 mensagem=f"Você completou {duracao} minutos de foco em {materia}. Continue assim!",
                 icone="fa-trophy",
             )
+            db.session.commit()
 
         return {"success": True, "message": "Sessão salva com sucesso!"}, 200
     except Exception as e:
@@ -1641,9 +1804,11 @@ def criar_meta():
                 descricao=descricao if descricao else None,
                 data_limite=data_limite if data_limite else None,
                 materia_id=int(materia_id) if materia_id else None,
+                status="ativo",
             )
             db.session.add(nova_meta)
-            db.session.commit()
+            ajustar_estatisticas(current_user.id, **delta_metas(None, nova_meta.status))
+            agendar_prazo_meta(nova_meta, current_user.fuso_horario)
 
             # Criar notificação
             criar_notificacao(
@@ -1654,6 +1819,7 @@ def criar_meta():
                 link="/metas",
                 icone="fa-target",
             )
+            db.session.commit()
 
             flash("Meta criada com sucesso!", "success")
             return redirect(url_for("listar_metas"))
@@ -1694,11 +1860,16 @@ def editar_meta(meta_id):
             return redirect(url_for("editar_meta", meta_id=meta_id))
 
         try:
+            status_anterior = meta.status
             meta.titulo = titulo
             meta.descricao = descricao if descricao else None
             meta.data_limite = data_limite if data_limite else None
             meta.materia_id = int(materia_id) if materia_id else None
             meta.status = status
+            ajustar_estatisticas(
+                current_user.id, **delta_metas(status_anterior, meta.status)
+            )
+            agendar_prazo_meta(meta, current_user.fuso_horario)
             db.session.commit()
 
             flash("Meta atualizada com sucesso!", "success")
@@ -1721,6 +1892,8 @@ def deletar_meta(meta_id):
 
     try:
         db.session.delete(meta)
+        ajustar_estatisticas(current_user.id, **delta_metas(meta.status, None))
+        cancelar_agendamentos("prazo_meta", meta.id)
         db.session.commit()
         flash("Meta deletada com sucesso!", "success")
     except Exception as e:
@@ -1740,8 +1913,12 @@ def concluir_meta(meta_id):
         return redirect(url_for("listar_metas"))
 
     try:
+        status_anterior = meta.status
         meta.status = "concluido"
-        db.session.commit()
+        ajustar_estatisticas(
+            current_user.id, **delta_metas(status_anterior, meta.status)
+        )
+        cancelar_agendamentos("prazo_meta", meta.id)
 
         # Criar notificação de conquista
         criar_notificacao(
@@ -1754,6 +1931,7 @@ def concluir_meta(meta_id):
 
         # Verificar badge
         verificar_e_conceder_badge(current_user.id, "primeira_meta_concluida")
+        db.session.commit()
 
         flash("Meta marcada como concluída!", "success")
     except Exception as e:
@@ -1773,63 +1951,69 @@ def calendario():
     return render_template("calendario.html")
 
 
-@app.route("/api/calendario_eventos")
+@app.route("/calendario/assinatura", methods=["POST"])
 @login_required
-def api_calendario_eventos():
-    """API para obter eventos do calendário"""
-    eventos = []
-
-    # Adicionar atividades com data
-    atividades = (
-        Atividade.query.filter_by(user_id=current_user.id)
-        .filter(Atividade.data.isnot(None))
-        .all()
-    )
-    for atividade in atividades:
-        eventos.append(
-            {
-                "id": f"atividade_{atividade.id}",
-                "title": f"📚 {atividade.assunto_primario}",
-                "start": atividade.data.isoformat(),
-                "backgroundColor": "#1a73e8",
-                "borderColor": "#0d47a1",
-                "extendedProps": {
-                    "tipo": "atividade",
-                    "materia": atividade.materia,
-                    "descricao": atividade.descricao,
-                    "duracao": atividade.duracao,
-                },
-            }
+def gerar_link_calendario():
+    """Gera (ou troca, invalidando o anterior) o link do feed .ics do usuário"""
+    current_user.token_calendario = secrets.token_urlsafe(32)
+    db.session.commit()
+    flash("Link de assinatura do calendário gerado.", "success")
+    return redirect(url_for("calendario"))
+
+
+@app.route("/calendario/<token>.ics")
+def calendario_ics(token):
+    """Feed iCalendar para assinatura em apps de calendário (sem login)"""
+    user = User.query.filter_by(token_calendario=token).first()
+    if not user:
+        # Sem abort(404): o handler de erros redireciona, o que não serve a apps
+        return Response("Calendário não encontrado.", 404, mimetype="text/plain")
+
+    # Validadores derivados da versão dos dados: clientes que consultam o feed
+    # com frequência recebem 304 sem que o calendário seja gerado de novo
+    etag, atualizado_em = validadores_ics(user.id)
+    if not is_resource_modified(
+        request.environ, etag=etag, last_modified=atualizado_em
+    ):
+        resposta = Response(status=304)
+    else:
+        resposta = Response(
+            stream_with_context(gerar_ics(user.id, atualizado_em)),
+            mimetype="text/calendar",
         )
+        resposta.headers["Content-Disposition"] = 'inline; filename="focusup.ics"'
+    resposta.set_etag(etag)
+    if atualizado_em:
+        resposta.last_modified = atualizado_em
+    resposta.headers["Cache-Control"] = "private, no-cache"
+    return resposta
 
-    # Adicionar metas com data limite
-    from sqlalchemy.orm import joinedload
 
-    metas = (
-        Meta.query.filter_by(user_id=current_user.id)
-        .filter(Meta.data_limite.isnot(None))
-        .options(joinedload(Meta.materia))
-        .all()
-    )
-    for meta in metas:
-        cor = "#2e7d32" if meta.status == "concluido" else "#ff9800"
-        eventos.append(
-            {
-                "id": f"meta_{meta.id}",
-                "title": f"🎯 {meta.titulo}",
-                "start": meta.data_limite.isoformat(),
-                "backgroundColor": cor,
-                "borderColor": cor,
-                "extendedProps": {
-                    "tipo": "meta",
-                    "status": meta.status,
-                    "descricao": meta.descricao,
-                    "materia": meta.materia.nome if meta.materia else None,
-                },
-            }
+@app.route("/api/calendario_eventos")
+@login_required
+def api_calendario_eventos():
+    """API para obter os eventos do calendário no período visível"""
+    try:
+        inicio, fim = ler_janela(request.args.get("start"), request.args.get("end"))
+    except ValueError as erro:
+        return {"success": False, "message": str(erro)}, 400
+
+    # A ETag sai da versão dos dados: se nada mudou, nem consulta os eventos
+    etag = etag_calendario(current_user.id, inicio, fim)
+    if request.if_none_match.contains_weak(etag):
+        resposta = Response(status=304)
+    else:
+        resposta = Response(
+            json.dumps(
+                eventos_calendario(current_user.id, inicio, fim),
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ),
+            mimetype="application/json",
         )
-
-    return {"eventos": eventos}
+    resposta.set_etag(etag)
+    resposta.headers["Cache-Control"] = "private, no-cache"
+    return resposta
 
 
 @app.route("/alternar_tema", methods=["POST"])
@@ -1862,6 +2046,14 @@ def atualizar_configuracoes():
             current_user.lembretes = data["lembretes"]
         if "idioma" in data:
             current_user.idioma = data["idioma"]
+        if "fuso_horario" in data and data["fuso_horario"] != current_user.fuso_horario:
+            if not fuso_valido(data["fuso_horario"]):
+                return {"success": False, "message": "Fuso horário inválido"}, 400
+            current_user.fuso_horario = data["fuso_horario"]
+            # Os acumulados diários são guardados no dia local do usuário
+            db.session.flush()
+            reconstruir_atividades_diarias([current_user.id])
+            ajustar_estatisticas(current_user.id)
 
         db.session.commit()
         return {"success": True, "message": "Configurações atualizadas com sucesso"}
@@ -1870,6 +2062,171 @@ def atualizar_configuracoes():
         return {"success": False, "message": str(e)}, 500
 
 
+# =============== COMANDOS DE MANUTENÇÃO ===============
+
+
+@app.cli.command("reconstruir-estatisticas")
+def reconstruir_estatisticas_cmd():
+    """Reconstrói do zero as estatísticas e os acumulados diários dos usuários"""
+    total = reconstruir_todas_estatisticas()
+    print(f"✅ Estatísticas reconstruídas para {total} usuários")
+
+
+@app.cli.command("conceder-badges-retroativos")
+@click.argument("criterios", nargs=-1)
+@click.option("--lote", default=1000, help="Usuários processados por lote")
+def conceder_badges_retroativos_cmd(criterios, lote):
+    """Concede a todos os usuários elegíveis os badges dos critérios (padrão: todos)"""
+    concedidos = conceder_badges_retroativos(criterios, tamanho_lote=lote)
+    for criterio, total in concedidos.items():
+        print(f"✅ {criterio}: {total} badges concedidos")
+
+
+@app.cli.command("reconciliar-notificacoes")
+@click.option("--lote", default=1000, help="Usuários processados por lote")
+def reconciliar_notificacoes_cmd(lote):
+    """Recalcula o contador de notificações não lidas de todos os usuários"""
+    corrigidos = reconciliar_nao_lidas(tamanho_lote=lote)
+    print(f"✅ Contador de não lidas corrigido para {corrigidos} usuários")
+
+
+# Retenção de notificações (job `flask compactar-notificacoes`)
+NOTIFICACOES_RETENCAO_DIAS = int(os.getenv("NOTIFICACOES_RETENCAO_DIAS", 90))
+NOTIFICACOES_ARQUIVO_DIAS = int(os.getenv("NOTIFICACOES_ARQUIVO_DIAS", 365))
+NOTIFICACOES_ARQUIVAR = os.getenv("NOTIFICACOES_ARQUIVAR", "True").lower() == "true"
+NOTIFICACOES_RESUMO_TIPOS = os.getenv("NOTIFICACOES_RESUMO_TIPOS", "lembrete").split(
+    ","
+)
+NOTIFICACOES_RESUMO_HORAS = int(os.getenv("NOTIFICACOES_RESUMO_HORAS", 24))
+
+
+@app.cli.command("compactar-notificacoes")
+@click.option("--lote", default=500, help="Notificações removidas por transação")
+@click.option("--pausa", default=0.1, help="Segundos de espera entre lotes")
+def compactar_notificacoes_cmd(lote, pausa):
+    """Resume lembretes repetidos, arquiva notificações lidas antigas e limpa o arquivo"""
+    resumos, resumidas = resumir_notificacoes(
+        [tipo.strip() for tipo in NOTIFICACOES_RESUMO_TIPOS if tipo.strip()],
+        NOTIFICACOES_RESUMO_HORAS,
+        arquivar=NOTIFICACOES_ARQUIVAR,
+        tamanho_lote=lote,
+        pausa=pausa,
+    )
+    print(f"✅ {resumidas} notificações agrupadas em {resumos} resumos")
+
+    expurgadas = expurgar_lidas(
+        NOTIFICACOES_RETENCAO_DIAS,
+        arquivar=NOTIFICACOES_ARQUIVAR,
+        tamanho_lote=lote,
+        pausa=pausa,
+    )
+    destino = "arquivadas" if NOTIFICACOES_ARQUIVAR else "excluídas"
+    print(f"✅ {expurgadas} notificações lidas {destino}")
+
+    if NOTIFICACOES_ARQUIVAR:
+        removidas = expurgar_arquivo(
+            NOTIFICACOES_ARQUIVO_DIAS, tamanho_lote=lote, pausa=pausa
+        )
+        print(f"✅ {removidas} notificações removidas do arquivo")
+
+
+@app.cli.command("importar-atividades")
+@click.argument("arquivo", type=click.Path(exists=True, dir_okay=False))
+@click.option("--email", required=True, help="Email do usuário dono das atividades")
+@click.option(
+    "--lote", default=LOTE_IMPORTACAO, help="Atividades inseridas por transação"
+)
+def importar_atividades_cmd(arquivo, email, lote):
+    """Importa atividades de um arquivo CSV ou JSON para um usuário"""
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        print(f"❌ Usuário {email} não encontrado")
+        return
+    with open(arquivo, "rb") as entrada:
+        try:
+            resumo = importar_arquivo_de_atividades(user.id, entrada, arquivo, lote)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+    print(
+        f"✅ {resumo['importadas']} atividades importadas, "
+        f"{resumo['materias_criadas']} matérias criadas, "
+        f"{resumo['invalidas']} linhas ignoradas"
+    )
+    for erro in resumo["erros"]:
+        print(f"   {erro}")
+    if resumo["erro_arquivo"]:
+        print(f"❌ Leitura interrompida: {resumo['erro_arquivo']}")
+
+
+@app.cli.command("gerar-assets")
+def gerar_assets_cmd():
+    """Gera em static/dist as cópias dos assets com hash no nome e comprimidas"""
+    manifesto_assets.clear()
+    manifesto_assets.update(gerar_assets(app.static_folder))
+    print(f"✅ {len(manifesto_assets)} assets versionados em static/dist")
+
+
+@app.cli.command("reindexar-busca")
+def reindexar_busca_cmd():
+    """Reconstrói o índice de busca textual (tabela FTS5 no SQLite)"""
+    reindexar_busca()
+    print("✅ Índice de busca reconstruído")
+
+
+@app.cli.command("processar-emails")
+@click.option("--continuo", is_flag=True, help="Continua rodando e verificando a fila")
+@click.option("--intervalo", default=5.0, help="Segundos entre verificações da fila")
+@click.option("--lote", default=50, help="Emails enviados por conexão SMTP")
+@click.option("--por-segundo", default=5.0, help="Limite de envios por segundo")
+def processar_emails_cmd(continuo, intervalo, lote, por_segundo):
+    """Envia os emails da caixa de saída (tb_emails_pendentes)"""
+    while True:
+        enviados, falhas = processar_emails(
+            mail, tamanho_lote=lote, max_por_segundo=por_segundo
+        )
+        if enviados or falhas:
+            print(f"📧 {enviados} enviados, {falhas} falhas")
+        if not continuo:
+            break
+        if not enviados and not falhas:
+            time.sleep(intervalo)
+
+
+@app.cli.command("processar-relatorios")
+@click.option("--continuo", is_flag=True, help="Continua rodando e verificando a fila")
+@click.option("--intervalo", default=2.0, help="Segundos entre verificações da fila")
+@click.option("--lote", default=10, help="Relatórios reservados por vez")
+def processar_relatorios_cmd(continuo, intervalo, lote):
+    """Gera os relatórios PDF pedidos pelos usuários (tb_relatorios)"""
+    while True:
+        gerados, falhas = processar_relatorios(RELATORIOS_DIR, tamanho_lote=lote)
+        if gerados or falhas:
+            print(f"📄 {gerados} relatórios gerados, {falhas} falhas")
+        if not continuo:
+            break
+        if not gerados and not falhas:
+            time.sleep(intervalo)
+
+
+@app.cli.command("processar-agendamentos")
+@click.option("--continuo", is_flag=True, help="Continua rodando e verificando a fila")
+@click.option("--intervalo", default=30.0, help="Segundos entre verificações da fila")
+@click.option("--lote", default=500, help="Lembretes processados por transação")
+def processar_agendamentos_cmd(continuo, intervalo, lote):
+    """Transforma em notificações os lembretes agendados que já venceram"""
+    while True:
+        processados = processar_agendamentos(tamanho_lote=lote)
+        if processados:
+            print(f"⏰ {processados} lembretes processados")
+        if processados == lote:
+            # Ainda há lembretes vencidos na fila
+            continue
+        if not continuo:
+            break
+        time.sleep(intervalo)
+
+
 # =============== HANDLER DE ERROS ===============
 
 
@@ -1879,6 +2236,15 @@ def not_found(error):
     return redirect(url_for("dashboard"))
 
 
+@app.errorhandler(413)
+def request_entity_too_large(error):
+    if request.endpoint == "importar_atividades_view":
+        erro = f"O arquivo deve ter no máximo {IMPORTACAO_MAX_MB} MB."
+        return render_template("importar_atividades.html", erro=erro), 413
+    flash("O arquivo enviado é grande demais.", "error")
+    return redirect(request.referrer or url_for("dashboard"))
+
+
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
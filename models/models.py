@@ -1,10 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
 from datetime import datetime
 
 db = SQLAlchemy()
 
 
+def parse_duration_to_minutes(duracao):
+    """Converte duração HH:MM para minutos"""
+    if not duracao:
+        return 0
+    try:
+        hours, minutes = map(int, duracao.split(":"))
+        return hours * 60 + minutes
+    except:
+        return 0
+
+
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     email = db.Column(db.String(150), unique=True, nullable=False)
@@ -18,6 +30,11 @@ class User(db.Model, UserMixin):
     notificacoes_push = db.Column(db.Boolean, default=False)
     lembretes = db.Column(db.Boolean, default=True)
     idioma = db.Column(db.String(10), default="pt-br")
+    fuso_horario = db.Column(db.String(50), default="America/Sao_Paulo")
+    # Contador mantido a cada escrita em tb_notificacoes
+    notificacoes_nao_lidas = db.Column(db.Integer, nullable=False, default=0)
+    # Token secreto do feed .ics (None até o usuário gerar o link)
+    token_calendario = db.Column(db.String(64), unique=True, index=True, nullable=True)
     materias = db.relationship("Materia", backref="usuario", lazy=True)
     atividades = db.relationship("Atividade", backref="usuario", lazy=True)
     metas = db.relationship("Meta", backref="usuario", lazy=True)
@@ -36,18 +53,46 @@ class Materia(db.Model):
 
 class Atividade(db.Model):
     __tablename__ = "tb_atividades"
+    __table_args__ = (
+        db.Index("ix_tb_atividades_user_data", "user_id", "data"),
+        db.Index("ix_tb_atividades_user_data_criacao", "user_id", "data_criacao"),
+        # Busca textual; no SQLite o índice é a tabela FTS5 de servicos/busca.py
+        db.Index(
+            "ft_tb_atividades_busca",
+            "assunto_primario",
+            "materia",
+            "descricao",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     materia = db.Column(db.String(100), nullable=False)
     assunto_primario = db.Column(db.String(100), nullable=False)
     descricao = db.Column(db.Text, nullable=True)
     duracao = db.Column(db.String(10), nullable=True)
+    duracao_minutos = db.Column(db.Integer, nullable=True)  # espelho numérico
     data = db.Column(db.Date, nullable=True)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
+    @validates("duracao")
+    def _sincronizar_minutos(self, key, duracao):
+        # Mantém duracao_minutos em dia para as agregações feitas no banco
+        self.duracao_minutos = parse_duration_to_minutes(duracao) if duracao else None
+        return duracao
+
 
 class Notificacao(db.Model):
     __tablename__ = "tb_notificacoes"
+    __table_args__ = (
+        db.Index(
+            "ix_tb_notificacoes_caixa_entrada",
+            "user_id",
+            "lida",
+            "tipo",
+            "data_criacao",
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     tipo = db.Column(
@@ -59,10 +104,36 @@ class Notificacao(db.Model):
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
     link = db.Column(db.String(255), nullable=True)  # URL para redirecionar
     icone = db.Column(db.String(50), default="fa-bell")  # Ícone Font Awesome
+    # Só nas notificações de resumo: quantas foram juntadas e desde quando
+    resumo_total = db.Column(db.Integer, nullable=True)
+    resumo_inicio = db.Column(db.DateTime, nullable=True)
+
+
+class NotificacaoArquivada(db.Model):
+    """Notificações antigas retiradas de tb_notificacoes pelo job de retenção"""
+
+    __tablename__ = "tb_notificacoes_arquivadas"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    notificacao_id = db.Column(db.Integer, nullable=False)  # id original
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    titulo = db.Column(db.String(200), nullable=False)
+    mensagem = db.Column(db.Text, nullable=False)
+    lida = db.Column(db.Boolean, default=False)
+    data_criacao = db.Column(db.DateTime)
+    link = db.Column(db.String(255), nullable=True)
+    icone = db.Column(db.String(50), nullable=True)
+    data_arquivamento = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 
 class Meta(db.Model):
     __tablename__ = "tb_metas"
+    __table_args__ = (
+        db.Index("ix_tb_metas_user_data_limite", "user_id", "data_limite"),
+        db.Index(
+            "ft_tb_metas_busca", "titulo", "descricao", mysql_prefix="FULLTEXT"
+        ).ddl_if(dialect="mysql"),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     titulo = db.Column(db.String(200), nullable=False)
@@ -89,8 +160,95 @@ class Badge(db.Model):
 
 class UserBadge(db.Model):
     __tablename__ = "tb_user_badges"
+    __table_args__ = (
+        db.Index("uq_tb_user_badges_user_badge", "user_id", "badge_id", unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     badge_id = db.Column(db.Integer, db.ForeignKey("tb_badges.id"), nullable=False)
     data_conquista = db.Column(db.DateTime, default=datetime.utcnow)
-    badge = db.relationship("Badge", backref="user_badges", lazy=True)
\ No newline at end of file
+    badge = db.relationship("Badge", backref="user_badges", lazy=True)
+
+
+class UserStats(db.Model):
+    """Contadores agregados por usuário, mantidos a cada escrita"""
+
+    __tablename__ = "tb_user_stats"
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    total_atividades = db.Column(db.Integer, nullable=False, default=0)
+    total_materias = db.Column(db.Integer, nullable=False, default=0)
+    total_minutos = db.Column(db.Integer, nullable=False, default=0)
+    metas_ativas = db.Column(db.Integer, nullable=False, default=0)
+    metas_concluidas = db.Column(db.Integer, nullable=False, default=0)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class AtividadeDiaria(db.Model):
+    """Total de atividades e minutos por usuário e dia (gráficos e sequência)"""
+
+    __tablename__ = "tb_atividades_diarias"
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    minutos = db.Column(db.Integer, nullable=False, default=0)
+
+
+class EmailPendente(db.Model):
+    """Caixa de saída de emails, esvaziada pelo worker `flask processar-emails`"""
+
+    __tablename__ = "tb_emails_pendentes"
+    __table_args__ = (
+        db.Index("ix_tb_emails_pendentes_fila", "status", "proxima_tentativa"),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    destinatario = db.Column(db.String(150), nullable=False)
+    assunto = db.Column(db.String(200), nullable=False)
+    corpo = db.Column(db.Text, nullable=False)
+    status = db.Column(
+        db.String(20), nullable=False, default="pendente"
+    )  # 'pendente', 'enviando', 'enviado', 'falhou'
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    proxima_tentativa = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    ultimo_erro = db.Column(db.Text, nullable=True)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_envio = db.Column(db.DateTime, nullable=True)
+
+
+class RelatorioPdf(db.Model):
+    """Pedido de relatório PDF do usuário, gerado pelo worker `flask processar-relatorios`"""
+
+    __tablename__ = "tb_relatorios"
+    __table_args__ = (db.Index("ix_tb_relatorios_fila", "status", "proxima_tentativa"),)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    chave = db.Column(db.String(64), nullable=False)  # hash dos dados do relatório
+    status = db.Column(
+        db.String(20), nullable=False, default="pendente"
+    )  # 'pendente', 'gerando', 'pronto', 'falhou'
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    proxima_tentativa = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    ultimo_erro = db.Column(db.Text, nullable=True)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    concluido_em = db.Column(db.DateTime, nullable=True)
+
+
+class Agendamento(db.Model):
+    """Lembrete agendado que vira notificação quando chega a hora"""
+
+    __tablename__ = "tb_agendamentos"
+    __table_args__ = (
+        db.Index("ix_tb_agendamentos_executar_em", "executar_em"),
+        db.Index("ix_tb_agendamentos_referencia", "tipo", "referencia_id"),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, index=True
+    )
+    tipo = db.Column(db.String(50), nullable=False)  # 'revisao_atividade', 'prazo_meta'
+    referencia_id = db.Column(db.Integer, nullable=True)  # atividade/meta de origem
+    executar_em = db.Column(db.DateTime, nullable=False)  # UTC
+    titulo = db.Column(db.String(200), nullable=False)
+    mensagem = db.Column(db.Text, nullable=False)
+    link = db.Column(db.String(255), nullable=True)
+    icone = db.Column(db.String(50), default="fa-bell")
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,130 @@
+from datetime import date, datetime, timedelta, timezone
+
+from models.models import db, Agendamento, User
+from servicos.notificacoes import criar_notificacao
+from servicos.sequencia import hoje_local, obter_fuso
+
+# Hora local em que os lembretes são entregues
+HORA_LEMBRETE = 9
+
+
+def momento_local(dia, fuso, hora=HORA_LEMBRETE):
+    """Converte um dia e uma hora no fuso do usuário para datetime UTC (sem tzinfo)"""
+    local = datetime(dia.year, dia.month, dia.day, hora, tzinfo=obter_fuso(fuso))
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def agendar(user_id, tipo, executar_em, titulo, mensagem, **campos):
+    """Agenda um lembrete; é gravado no commit da transação corrente"""
+    agendamento = Agendamento(
+        user_id=user_id,
+        tipo=tipo,
+        executar_em=executar_em,
+        titulo=titulo,
+        mensagem=mensagem,
+        **campos,
+    )
+    db.session.add(agendamento)
+    return agendamento
+
+
+def cancelar_agendamentos(tipo, referencia_id):
+    """Remove os lembretes pendentes ligados a uma atividade/meta (sem commit)"""
+    Agendamento.query.filter_by(tipo=tipo, referencia_id=referencia_id).delete(
+        synchronize_session=False
+    )
+
+
+def agendar_revisao_atividade(atividade, fuso):
+    """Agenda para o dia seguinte o lembrete de revisão da atividade"""
+    if atividade.id is None:
+        db.session.flush()
+    amanha = hoje_local(fuso) + timedelta(days=1)
+    return agendar(
+        atividade.user_id,
+        "revisao_atividade",
+        momento_local(amanha, fuso),
+        "Lembrete de Estudo 📚",
+        f"Hora de revisar '{atividade.assunto_primario}' de {atividade.materia}!",
+        referencia_id=atividade.id,
+        link="/listar_atividades",
+        icone="fa-calendar-check",
+    )
+
+
+def agendar_prazo_meta(meta, fuso):
+    """
+    (Re)agenda o lembrete de prazo da meta para a véspera da data limite
+
+    Cancela o lembrete anterior; metas sem prazo, já vencidas ou que não
+    estão ativas ficam sem lembrete. Se a véspera já passou, o lembrete
+    é entregue na próxima execução do worker.
+    """
+    if meta.id is None:
+        db.session.flush()
+    cancelar_agendamentos("prazo_meta", meta.id)
+
+    data_limite = meta.data_limite
+    if isinstance(data_limite, str):
+        data_limite = date.fromisoformat(data_limite) if data_limite else None
+    if meta.status != "ativo" or data_limite is None:
+        return None
+    if data_limite < hoje_local(fuso):
+        return None
+
+    executar_em = max(
+        momento_local(data_limite - timedelta(days=1), fuso), datetime.utcnow()
+    )
+    return agendar(
+        meta.user_id,
+        "prazo_meta",
+        executar_em,
+        "Prazo de Meta se Aproximando ⏰",
+        f"A meta '{meta.titulo}' vence em {data_limite.strftime('%d/%m/%Y')}.",
+        referencia_id=meta.id,
+        link="/metas",
+        icone="fa-hourglass-half",
+    )
+
+
+def processar_agendamentos(tamanho_lote=500):
+    """
+    Materializa um lote de lembretes vencidos; retorna quantos foram processados
+
+    O lote é travado com SKIP LOCKED, então vários workers podem rodar em
+    paralelo. Notificações (e emails) e a remoção dos agendamentos vão no
+    mesmo commit: se o worker cair no meio, o lote continua pendente.
+    """
+    lote = (
+        Agendamento.query.filter(Agendamento.executar_em <= datetime.utcnow())
+        .order_by(Agendamento.executar_em)
+        .limit(tamanho_lote)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not lote:
+        return 0
+
+    com_lembretes = {
+        user_id
+        for (user_id,) in db.session.query(User.id).filter(
+            User.id.in_({agendamento.user_id for agendamento in lote}),
+            User.lembretes.isnot(False),
+        )
+    }
+    for agendamento in lote:
+        if agendamento.user_id in com_lembretes:
+            criar_notificacao(
+                user_id=agendamento.user_id,
+                tipo="lembrete",
+                titulo=agendamento.titulo,
+                mensagem=agendamento.mensagem,
+                link=agendamento.link,
+                icone=agendamento.icone,
+            )
+
+    Agendamento.query.filter(
+        Agendamento.id.in_([agendamento.id for agendamento in lote])
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return len(lote)
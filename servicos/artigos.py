@@ -0,0 +1,133 @@
+import threading
+import time
+
+import requests
+
+# Artigos sobre métodos de estudo exibidos no dashboard
+OPENALEX_URL = "https://api.openalex.org/works"
+CONSULTA_ARTIGOS = "pomodoro|spaced repetition|active recall|mind map"
+
+# Dicionário de tradução básico, isso é um teste simulando um tradutor
+traducoes_comuns = {
+    "machine learning": "aprendizado de máquina",
+    "deep learning": "aprendizado profundo",
+    "neural network": "rede neural",
+    "artificial intelligence": "inteligência artificial",
+    "data science": "ciência de dados",
+    "computer vision": "visão computacional",
+    "natural language processing": "processamento de linguagem natural",
+}
+
+
+def traduzir_titulo(titulo):
+    """Aplica as traduções comuns ao título do artigo"""
+    titulo = titulo or ""
+    for eng, pt in traducoes_comuns.items():
+        titulo = titulo.replace(eng, pt)
+        titulo = titulo.replace(eng.title(), pt.title())
+    return titulo
+
+
+def reconstruir_resumo(indice_invertido, limite=150):
+    """Reconstrói o resumo a partir do abstract_inverted_index do OpenAlex"""
+    if not indice_invertido:
+        return "Resumo não disponível"
+
+    abstract_words = []
+    for word, positions in indice_invertido.items():
+        for pos in positions:
+            if len(abstract_words) <= pos:
+                abstract_words.extend([""] * (pos - len(abstract_words) + 1))
+            abstract_words[pos] = word
+    abstract = " ".join(abstract_words)
+    return abstract[:limite] + "..."
+
+
+def processar_artigo(artigo):
+    """Mantém apenas os campos usados pelo dashboard, já traduzidos"""
+    return {
+        "id": artigo.get("id"),
+        "title": artigo.get("title", ""),
+        "title_pt": traduzir_titulo(artigo.get("title", "")),
+        "abstract_pt": reconstruir_resumo(artigo.get("abstract_inverted_index")),
+        "authorships": [
+            {"author": {"display_name": a.get("author", {}).get("display_name")}}
+            for a in artigo.get("authorships") or []
+        ],
+        "publication_year": artigo.get("publication_year"),
+        "cited_by_count": artigo.get("cited_by_count", 0),
+        "doi": artigo.get("doi"),
+    }
+
+
+class FeedArtigos:
+    """
+    Cache em memória dos artigos do OpenAlex
+
+    O dashboard nunca espera pela rede: obter() devolve o último conteúdo válido
+    e, se ele estiver expirado, dispara uma atualização em segundo plano.
+    Falhas consecutivas abrem o circuit breaker, suspendendo novas chamadas
+    ao OpenAlex por `tempo_aberto` segundos.
+    """
+
+    def __init__(self, ttl=900, timeout=3.0, limite_falhas=3, tempo_aberto=300):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+
+        self._lock = threading.Lock()
+        self._http = requests.Session()
+        self._artigos = []
+        self._atualizado_em = None
+        self._atualizando = False
+        self._falhas = 0
+        self._aberto_ate = 0.0
+
+    def obter(self):
+        """Retorna os artigos em cache, agendando atualização se necessário"""
+        agora = time.monotonic()
+        with self._lock:
+            artigos = self._artigos
+            expirado = (
+                self._atualizado_em is None or agora - self._atualizado_em >= self.ttl
+            )
+            disparar = expirado and not self._atualizando and agora >= self._aberto_ate
+            if disparar:
+                self._atualizando = True
+
+        if disparar:
+            threading.Thread(target=self._atualizar, daemon=True).start()
+        return artigos
+
+    def buscar(self):
+        """Consulta o OpenAlex e retorna a lista de artigos já processada"""
+        response = self._http.get(
+            OPENALEX_URL,
+            params={
+                "filter": f"title.search:{CONSULTA_ARTIGOS},cited_by_count:>3",
+                "per-page": 10,
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return [processar_artigo(a) for a in response.json().get("results", [])]
+
+    def _atualizar(self):
+        try:
+            artigos = self.buscar()
+        except Exception as e:
+            print(f"Erro ao buscar artigos no OpenAlex: {e}")
+            with self._lock:
+                self._falhas += 1
+                if self._falhas >= self.limite_falhas:
+                    self._aberto_ate = time.monotonic() + self.tempo_aberto
+                self._atualizando = False
+            return
+
+        with self._lock:
+            self._artigos = artigos
+            self._atualizado_em = time.monotonic()
+            self._falhas = 0
+            self._aberto_ate = 0.0
+            self._atualizando = False
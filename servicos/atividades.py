@@ -0,0 +1,111 @@
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+from models.models import Atividade
+
+ATIVIDADES_POR_PAGINA = 20
+
+# ordem -> (coluna, decrescente). O desempate é sempre pelo id, no mesmo sentido.
+ORDENACOES = {
+    "recente": (Atividade.data, True),
+    "antiga": (Atividade.data, False),
+    "adicionadas": (Atividade.data_criacao, True),
+    "materia": (Atividade.materia, False),
+    "duracao": (Atividade.duracao_minutos, True),
+}
+
+
+def filtrar_atividades(user_id, materia=None, inicio=None, fim=None, texto=None):
+    """Consulta das atividades do usuário com os filtros da listagem"""
+    query = Atividade.query.filter(Atividade.user_id == user_id)
+    if materia:
+        query = query.filter(Atividade.materia == materia)
+    if inicio:
+        query = query.filter(Atividade.data >= inicio)
+    if fim:
+        query = query.filter(Atividade.data <= fim)
+    if texto:
+        query = query.filter(
+            or_(
+                Atividade.materia.icontains(texto, autoescape=True),
+                Atividade.assunto_primario.icontains(texto, autoescape=True),
+                Atividade.descricao.icontains(texto, autoescape=True),
+            )
+        )
+    return query
+
+
+def codificar_cursor(atividade, ordem):
+    """Cursor opaco com o valor da coluna de ordenação e o id da atividade"""
+    coluna, _ = ORDENACOES[ordem]
+    valor = getattr(atividade, coluna.key)
+    if isinstance(valor, (date, datetime)):
+        valor = valor.isoformat()
+    dados = json.dumps([valor, atividade.id]).encode()
+    return base64.urlsafe_b64encode(dados).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor, ordem):
+    """Converte o cursor em (valor, id); levanta ValueError se inválido"""
+    coluna, _ = ORDENACOES[ordem]
+    tipo = coluna.type.python_type
+    try:
+        dados = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valor, id_ = json.loads(dados)
+        if valor is not None:
+            valor = (
+                tipo.fromisoformat(valor) if tipo in (date, datetime) else tipo(valor)
+            )
+        return valor, int(id_)
+    except (TypeError, ValueError) as erro:
+        raise ValueError("cursor inválido") from erro
+
+
+def _depois_do_cursor(coluna, decrescente, valor, id_):
+    """
+    Condição de "vem depois de (valor, id)" na ordem escolhida
+
+    Segue a ordenação de NULL do MySQL/SQLite: nulos vêm primeiro na ordem
+    crescente e por último na decrescente.
+    """
+    if decrescente:
+        if valor is None:
+            return and_(coluna.is_(None), Atividade.id < id_)
+        return or_(
+            coluna < valor,
+            and_(coluna == valor, Atividade.id < id_),
+            coluna.is_(None),
+        )
+    if valor is None:
+        return or_(and_(coluna.is_(None), Atividade.id > id_), coluna.isnot(None))
+    return or_(coluna > valor, and_(coluna == valor, Atividade.id > id_))
+
+
+def pagina_atividades(
+    user_id, ordem="recente", cursor=None, limite=ATIVIDADES_POR_PAGINA, **filtros
+):
+    """
+    Uma página da listagem de atividades, filtrada e ordenada no banco
+
+    Paginação por chave (coluna de ordenação, id), sem OFFSET.
+    Retorna (atividades, proximo_cursor ou None).
+    """
+    coluna, decrescente = ORDENACOES[ordem]
+    query = filtrar_atividades(user_id, **filtros)
+    if cursor:
+        query = query.filter(
+            _depois_do_cursor(coluna, decrescente, *decodificar_cursor(cursor, ordem))
+        )
+    if decrescente:
+        query = query.order_by(coluna.desc(), Atividade.id.desc())
+    else:
+        query = query.order_by(coluna.asc(), Atividade.id.asc())
+
+    atividades = query.limit(limite + 1).all()
+    if len(atividades) > limite:
+        atividades = atividades[:limite]
+        return atividades, codificar_cursor(atividades[-1], ordem)
+    return atividades, None
@@ -0,0 +1,226 @@
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from models.models import db, Badge, UserBadge, UserStats, Notificacao
+from servicos.estatisticas import obter_estatisticas, reconstruir_todas_estatisticas
+from servicos.notificacoes import incrementar_nao_lidas
+
+# criterio -> regra. Cada regra recebe os contadores de UserStats: uma linha
+# (avaliação em Python) ou a própria classe (expressão SQL para jobs em lote).
+REGRAS_BADGES = {}
+
+# Catálogo de badges em memória: criterio -> dados do badge
+_catalogo = None
+
+
+def regra_badge(criterio):
+    """Decorator que registra a regra de concessão de um critério"""
+
+    def registrar(regra):
+        REGRAS_BADGES[criterio] = regra
+        return regra
+
+    return registrar
+
+
+@regra_badge("primeira_atividade")
+def _primeira_atividade(stats):
+    return stats.total_atividades >= 1
+
+
+@regra_badge("primeira_meta_concluida")
+def _primeira_meta_concluida(stats):
+    return stats.metas_concluidas >= 1
+
+
+@regra_badge("10_horas")
+def _dez_horas(stats):
+    return stats.total_minutos >= 600
+
+
+@regra_badge("5_materias")
+def _cinco_materias(stats):
+    return stats.total_materias >= 5
+
+
+def catalogo_badges():
+    """Retorna o catálogo de badges, carregando do banco só na primeira vez"""
+    global _catalogo
+    if _catalogo is None:
+        _catalogo = {
+            badge.criterio: {
+                "id": badge.id,
+                "nome": badge.nome,
+                "descricao": badge.descricao,
+            }
+            for badge in Badge.query.all()
+        }
+    return _catalogo
+
+
+def limpar_cache_catalogo():
+    """Descarta o catálogo em memória (após alterar tb_badges)"""
+    global _catalogo
+    _catalogo = None
+
+
+def dados_notificacao_badge(badge):
+    """Campos da notificação enviada ao conquistar um badge"""
+    return {
+        "tipo": "conquista",
+        "titulo": f"🏆 Badge Conquistado: {badge['nome']}!",
+        "mensagem": f"Parabéns! Você ganhou o badge '{badge['nome']}' - {badge['descricao']}",
+        "icone": "fa-trophy",
+    }
+
+
+def verificar_badges(user_id, *criterios):
+    """
+    Avalia vários critérios de uma vez e concede os badges que faltam
+
+    A concessão é idempotente: o índice único (user_id, badge_id) impede
+    duplicatas mesmo com requisições concorrentes. Retorna os badges
+    concedidos agora, sem fazer commit.
+    """
+    catalogo = catalogo_badges()
+    stats = obter_estatisticas(user_id)
+    candidatos = [
+        catalogo[criterio]
+        for criterio in criterios
+        if criterio in catalogo
+        and criterio in REGRAS_BADGES
+        and REGRAS_BADGES[criterio](stats)
+    ]
+    if not candidatos:
+        return []
+
+    ja_conquistados = {
+        badge_id
+        for (badge_id,) in db.session.query(UserBadge.badge_id).filter(
+            UserBadge.user_id == user_id,
+            UserBadge.badge_id.in_([badge["id"] for badge in candidatos]),
+        )
+    }
+
+    concedidos = []
+    for badge in candidatos:
+        if badge["id"] in ja_conquistados:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(UserBadge(user_id=user_id, badge_id=badge["id"]))
+        except IntegrityError:
+            # Outra requisição concedeu o mesmo badge primeiro
+            continue
+        concedidos.append(badge)
+    return concedidos
+
+
+def _inserir_user_badges(badge_id, user_ids, agora):
+    """
+    Insere o badge para os usuários com um executemany; devolve quem o recebeu
+
+    Se uma requisição concedeu o mesmo badge a alguém do lote nesse meio
+    tempo, o índice único recusa o lote inteiro: ele é refeito linha a linha,
+    pulando só quem já tinha o badge.
+    """
+    linhas = [
+        {"user_id": user_id, "badge_id": badge_id, "data_conquista": agora}
+        for user_id in user_ids
+    ]
+    try:
+        with db.session.begin_nested():
+            db.session.execute(UserBadge.__table__.insert(), linhas)
+        return user_ids
+    except IntegrityError:
+        pass
+
+    inseridos = []
+    for linha in linhas:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(UserBadge.__table__.insert(), linha)
+        except IntegrityError:
+            continue
+        inseridos.append(linha["user_id"])
+    return inseridos
+
+
+def conceder_badges_retroativos(criterios=None, tamanho_lote=1000, progresso=print):
+    """
+    Concede em lote os badges dos critérios informados a todos os usuários elegíveis
+
+    A elegibilidade é avaliada no banco, com a regra aplicada sobre as colunas
+    de tb_user_stats, percorrendo os usuários em lotes pela chave primária.
+    Cada lote insere UserBadge e Notificacao com um único executemany (linha
+    a linha só se houver conflito com uma concessão concorrente). Retorna {criterio: quantidade concedida}.
+    """
+    # Usuários sem linha de estatísticas não seriam avaliados
+    reconstruir_todas_estatisticas(apenas_faltantes=True)
+
+    catalogo = catalogo_badges()
+    resultado = {}
+    for criterio in criterios or sorted(REGRAS_BADGES):
+        badge = catalogo.get(criterio)
+        if badge is None or criterio not in REGRAS_BADGES:
+            progresso(f"⚠️  Critério '{criterio}' sem badge ou regra cadastrada")
+            continue
+
+        notificacao = dados_notificacao_badge(badge)
+        sem_badge = ~(
+            db.session.query(UserBadge.id)
+            .filter(
+                UserBadge.user_id == UserStats.user_id,
+                UserBadge.badge_id == badge["id"],
+            )
+            .exists()
+        )
+
+        inicio = time.monotonic()
+        concedidos = 0
+        ultimo_id = 0
+        while True:
+            user_ids = [
+                user_id
+                for (user_id,) in db.session.query(UserStats.user_id)
+                .filter(
+                    UserStats.user_id > ultimo_id,
+                    REGRAS_BADGES[criterio](UserStats),
+                    sem_badge,
+                )
+                .order_by(UserStats.user_id)
+                .limit(tamanho_lote)
+            ]
+            if not user_ids:
+                break
+
+            ultimo_id = user_ids[-1]
+            agora = datetime.utcnow()
+            user_ids = _inserir_user_badges(badge["id"], user_ids, agora)
+            if user_ids:
+                db.session.execute(
+                    Notificacao.__table__.insert(),
+                    [
+                        {
+                            "user_id": user_id,
+                            "lida": False,
+                            "data_criacao": agora,
+                            **notificacao,
+                        }
+                        for user_id in user_ids
+                    ],
+                )
+                incrementar_nao_lidas(db.session, {user_id: 1 for user_id in user_ids})
+            db.session.commit()
+
+            concedidos += len(user_ids)
+            decorrido = max(time.monotonic() - inicio, 1e-6)
+            progresso(
+                f"  {criterio}: {concedidos} badges concedidos "
+                f"({concedidos / decorrido:.0f} usuários/s)"
+            )
+
+        resultado[criterio] = concedidos
+    return resultado
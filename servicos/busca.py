@@ -0,0 +1,266 @@
+import re
+import unicodedata
+
+from markupsafe import Markup, escape
+from sqlalchemy import event, text
+from sqlalchemy.dialects.mysql import match
+
+from models.models import db, Atividade, Meta
+
+RESULTADOS_POR_BUSCA = 30
+TAMANHO_TRECHO = 160
+
+# No SQLite o índice invertido é uma tabela FTS5 mantida pelos eventos abaixo.
+# O rowid codifica a origem (id * 2 + tipo), o que deixa atualizar e remover
+# uma linha do índice tão barato quanto pela chave primária.
+TABELA_FTS = "tb_busca"
+TIPOS_FTS = {Atividade: 0, Meta: 1}
+
+
+def _usa_fts5(conexao):
+    return conexao.dialect.name == "sqlite"
+
+
+def criar_indice_sqlite(conexao):
+    """Cria (e popula, se acabou de criar) a tabela FTS5 usada no SQLite"""
+    if not _usa_fts5(conexao):
+        return
+    existe = conexao.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :nome"), {"nome": TABELA_FTS}
+    ).first()
+    if existe:
+        return
+    conexao.execute(
+        text(
+            f"CREATE VIRTUAL TABLE {TABELA_FTS} USING fts5("
+            "titulo, conteudo, user_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    )
+    reindexar_sqlite(conexao)
+
+
+def reindexar_sqlite(conexao):
+    """Reconstrói do zero a tabela FTS5 a partir de atividades e metas"""
+    if not _usa_fts5(conexao):
+        return
+    conexao.execute(text(f"DELETE FROM {TABELA_FTS}"))
+    conexao.execute(
+        text(
+            f"INSERT INTO {TABELA_FTS} (rowid, titulo, conteudo, user_id) "
+            "SELECT id * 2, assunto_primario, "
+            "materia || ' ' || coalesce(descricao, ''), user_id FROM tb_atividades"
+        )
+    )
+    conexao.execute(
+        text(
+            f"INSERT INTO {TABELA_FTS} (rowid, titulo, conteudo, user_id) "
+            "SELECT id * 2 + 1, titulo, coalesce(descricao, ''), user_id FROM tb_metas"
+        )
+    )
+
+
+def remover_usuario_da_busca(user_id):
+    """Apaga do índice as entradas de um usuário (exclusões em massa não disparam eventos)"""
+    conexao = db.session.connection()
+    if _usa_fts5(conexao):
+        conexao.execute(
+            text(f"DELETE FROM {TABELA_FTS} WHERE user_id = :user_id"),
+            {"user_id": user_id},
+        )
+
+
+def indexar_atividades_inseridas(user_id, depois_do_id):
+    """Indexa as atividades do usuário com id > `depois_do_id` (inserções em massa)"""
+    conexao = db.session.connection()
+    if not _usa_fts5(conexao):
+        return
+    filtro = "FROM tb_atividades WHERE user_id = :user_id AND id > :id"
+    parametros = {"user_id": user_id, "id": depois_do_id}
+    # Remove antes, caso alguma já tenha sido indexada pelos eventos
+    conexao.execute(
+        text(f"DELETE FROM {TABELA_FTS} WHERE rowid IN (SELECT id * 2 {filtro})"),
+        parametros,
+    )
+    conexao.execute(
+        text(
+            f"INSERT INTO {TABELA_FTS} (rowid, titulo, conteudo, user_id) "
+            "SELECT id * 2, assunto_primario, "
+            f"materia || ' ' || coalesce(descricao, ''), user_id {filtro}"
+        ),
+        parametros,
+    )
+
+
+def _documento(objeto):
+    """(titulo, conteudo) indexados para uma atividade ou meta"""
+    if isinstance(objeto, Atividade):
+        return objeto.assunto_primario, f"{objeto.materia} {objeto.descricao or ''}"
+    return objeto.titulo, objeto.descricao or ""
+
+
+def _remover_do_indice(mapper, conexao, objeto):
+    if _usa_fts5(conexao):
+        conexao.execute(
+            text(f"DELETE FROM {TABELA_FTS} WHERE rowid = :rowid"),
+            {"rowid": objeto.id * 2 + TIPOS_FTS[type(objeto)]},
+        )
+
+
+def _indexar(mapper, conexao, objeto):
+    if _usa_fts5(conexao):
+        _remover_do_indice(mapper, conexao, objeto)
+        titulo, conteudo = _documento(objeto)
+        conexao.execute(
+            text(
+                f"INSERT INTO {TABELA_FTS} (rowid, titulo, conteudo, user_id) "
+                "VALUES (:rowid, :titulo, :conteudo, :user_id)"
+            ),
+            {
+                "rowid": objeto.id * 2 + TIPOS_FTS[type(objeto)],
+                "titulo": titulo,
+                "conteudo": conteudo,
+                "user_id": objeto.user_id,
+            },
+        )
+
+
+# No MySQL os índices FULLTEXT são mantidos pelo próprio InnoDB
+for _modelo in TIPOS_FTS:
+    event.listen(_modelo, "after_insert", _indexar)
+    event.listen(_modelo, "after_update", _indexar)
+    event.listen(_modelo, "after_delete", _remover_do_indice)
+
+
+def termos_da_busca(consulta):
+    """Palavras da consulta, sem operadores (no máximo 10)"""
+    return re.findall(r"\w+", consulta.lower())[:10]
+
+
+def _sem_acentos(texto):
+    # Caractere por caractere, para manter as posições do texto original
+    return "".join(unicodedata.normalize("NFD", c)[0].lower()[:1] or c for c in texto)
+
+
+def gerar_trecho(texto, termos, tamanho=TAMANHO_TRECHO):
+    """Trecho do texto em volta do primeiro termo encontrado, com os termos em <mark>"""
+    texto = " ".join((texto or "").split())
+    normalizado = _sem_acentos(texto)
+    termos = [_sem_acentos(termo) for termo in termos]
+
+    posicoes = [normalizado.find(termo) for termo in termos]
+    posicoes = [posicao for posicao in posicoes if posicao >= 0]
+    inicio = max(min(posicoes, default=0) - tamanho // 3, 0)
+    fim = min(inicio + tamanho, len(texto))
+
+    partes = []
+    cursor = inicio
+    padrao = "|".join(re.escape(termo) for termo in termos if termo)
+    if padrao:
+        for achado in re.finditer(padrao, normalizado[inicio:fim]):
+            comeco, final = inicio + achado.start(), inicio + achado.end()
+            partes.append(escape(texto[cursor:comeco]))
+            partes.append(Markup("<mark>%s</mark>") % texto[comeco:final])
+            cursor = final
+    partes.append(escape(texto[cursor:fim]))
+
+    trecho = Markup("").join(partes)
+    if inicio > 0:
+        trecho = Markup("…") + trecho
+    if fim < len(texto):
+        trecho += Markup("…")
+    return trecho
+
+
+def _resultado(objeto, pontuacao, termos):
+    titulo, conteudo = _documento(objeto)
+    if isinstance(objeto, Atividade):
+        return {
+            "tipo": "atividade",
+            "id": objeto.id,
+            "titulo": titulo,
+            "subtitulo": objeto.materia,
+            "trecho": gerar_trecho(f"{titulo} — {conteudo}", termos),
+            "link": f"/editar_atividade/{objeto.id}",
+            "pontuacao": pontuacao,
+        }
+    return {
+        "tipo": "meta",
+        "id": objeto.id,
+        "titulo": titulo,
+        "subtitulo": "Meta",
+        "trecho": gerar_trecho(f"{titulo} — {conteudo}", termos),
+        "link": f"/editar_meta/{objeto.id}",
+        "pontuacao": pontuacao,
+    }
+
+
+def _buscar_mysql(user_id, termos, limite):
+    expressao = " ".join(f"+{termo}*" for termo in termos)
+    encontrados = []
+    for modelo, colunas in (
+        (
+            Atividade,
+            (Atividade.assunto_primario, Atividade.materia, Atividade.descricao),
+        ),
+        (Meta, (Meta.titulo, Meta.descricao)),
+    ):
+        relevancia = match(*colunas, against=expressao).in_boolean_mode()
+        encontrados += (
+            db.session.query(modelo, relevancia)
+            .filter(modelo.user_id == user_id, relevancia > 0)
+            .order_by(relevancia.desc())
+            .limit(limite)
+            .all()
+        )
+    encontrados.sort(key=lambda par: par[1], reverse=True)
+    return [(objeto, float(pontuacao)) for objeto, pontuacao in encontrados[:limite]]
+
+
+def _buscar_sqlite(user_id, termos, limite):
+    expressao = " ".join(f'"{termo}"*' for termo in termos)
+    linhas = db.session.execute(
+        text(
+            f"SELECT rowid, bm25({TABELA_FTS}, 2.0, 1.0) AS relevancia "
+            f"FROM {TABELA_FTS} "
+            f"WHERE {TABELA_FTS} MATCH :expressao AND user_id = :user_id "
+            "ORDER BY relevancia LIMIT :limite"
+        ),
+        {"expressao": expressao, "user_id": user_id, "limite": limite},
+    ).all()
+
+    ids = {Atividade: [], Meta: []}
+    for rowid, _ in linhas:
+        ids[Atividade if rowid % 2 == 0 else Meta].append(rowid // 2)
+    # Confere dono e existência nas tabelas de origem (ignora entradas antigas)
+    objetos = {}
+    for modelo, lista in ids.items():
+        if lista:
+            for objeto in modelo.query.filter(
+                modelo.id.in_(lista), modelo.user_id == user_id
+            ):
+                objetos[objeto.id * 2 + TIPOS_FTS[modelo]] = objeto
+    # bm25 é menor quanto mais relevante
+    return [
+        (objetos[rowid], -relevancia)
+        for rowid, relevancia in linhas
+        if rowid in objetos
+    ]
+
+
+def buscar(user_id, consulta, limite=RESULTADOS_POR_BUSCA):
+    """Busca textual nas atividades e metas do usuário, ordenada por relevância"""
+    termos = termos_da_busca(consulta)
+    if not termos:
+        return []
+    if _usa_fts5(db.session.connection()):
+        encontrados = _buscar_sqlite(user_id, termos, limite)
+    else:
+        encontrados = _buscar_mysql(user_id, termos, limite)
+    return [_resultado(objeto, pontuacao, termos) for objeto, pontuacao in encontrados]
+
+
+def reindexar_busca():
+    """Reconstrói o índice de busca (só necessário no SQLite)"""
+    reindexar_sqlite(db.session.connection())
+    db.session.commit()
@@ -0,0 +1,236 @@
+import hashlib
+from datetime import date, datetime, timedelta
+
+from models.models import db, Atividade, Materia, Meta, UserStats
+
+# Maior janela aceita; a visão mensal do FullCalendar cobre até 6 semanas
+JANELA_MAXIMA_DIAS = 100
+
+# Eventos buscados por vez ao gerar o feed .ics
+LOTE_ICS = 500
+
+
+def ler_janela(inicio, fim):
+    """
+    Converte os parâmetros start/end do FullCalendar em (inicio, fim)
+
+    Aceita datas ou datas e horas ISO (só a parte da data é usada) e trata
+    `fim` como exclusivo. Sem parâmetros, usa o mês corrente. Levanta
+    ValueError se a janela for inválida ou grande demais.
+    """
+    if not inicio and not fim:
+        hoje = date.today()
+        inicio = hoje.replace(day=1)
+        fim = (inicio + timedelta(days=32)).replace(day=1)
+        return inicio, fim
+    if not inicio or not fim:
+        raise ValueError("Informe o início e o fim do período.")
+    try:
+        inicio = date.fromisoformat(inicio[:10])
+        fim = date.fromisoformat(fim[:10])
+    except ValueError as erro:
+        raise ValueError("Datas inválidas.") from erro
+    if fim <= inicio:
+        raise ValueError("O fim do período deve ser depois do início.")
+    if (fim - inicio).days > JANELA_MAXIMA_DIAS:
+        raise ValueError(f"O período pode ter no máximo {JANELA_MAXIMA_DIAS} dias.")
+    return inicio, fim
+
+
+def etag_calendario(user_id, inicio, fim):
+    """
+    ETag dos eventos de uma janela, derivada da versão dos dados do usuário
+
+    `UserStats.versao` muda a cada escrita em atividades, metas e matérias,
+    então a ETag pode ser conferida sem consultar os eventos.
+    """
+    versao = db.session.query(UserStats.versao).filter_by(user_id=user_id).scalar()
+    chave = f"{user_id}:{versao}:{inicio.isoformat()}:{fim.isoformat()}"
+    return hashlib.sha1(chave.encode()).hexdigest()
+
+
+def eventos_calendario(user_id, inicio, fim):
+    """
+    Atividades e metas com data em [inicio, fim), em formato compacto
+
+    Cada evento é uma lista de valores; a montagem dos objetos do
+    FullCalendar (título, cores etc.) fica no calendario.js.
+    """
+    atividades = (
+        db.session.query(
+            Atividade.id,
+            Atividade.assunto_primario,
+            Atividade.data,
+            Atividade.materia,
+            Atividade.descricao,
+            Atividade.duracao,
+        )
+        .filter(
+            Atividade.user_id == user_id,
+            Atividade.data >= inicio,
+            Atividade.data < fim,
+        )
+        .order_by(Atividade.data, Atividade.id)
+    )
+    metas = (
+        db.session.query(
+            Meta.id,
+            Meta.titulo,
+            Meta.data_limite,
+            Meta.status,
+            Materia.nome,
+            Meta.descricao,
+        )
+        .outerjoin(Materia, Meta.materia_id == Materia.id)
+        .filter(
+            Meta.user_id == user_id,
+            Meta.data_limite >= inicio,
+            Meta.data_limite < fim,
+        )
+        .order_by(Meta.data_limite, Meta.id)
+    )
+    return {
+        "atividades": [
+            [id_, titulo, dia.isoformat(), materia, descricao, duracao]
+            for id_, titulo, dia, materia, descricao, duracao in atividades
+        ],
+        "metas": [
+            [id_, titulo, dia.isoformat(), status, materia, descricao]
+            for id_, titulo, dia, status, materia, descricao in metas
+        ],
+    }
+
+
+def validadores_ics(user_id):
+    """
+    (ETag, Last-Modified) do feed .ics, derivados da versão dos dados do usuário
+
+    Last-Modified vem sem microssegundos, na mesma precisão dos cabeçalhos HTTP.
+    """
+    versao, atualizado_em = (
+        db.session.query(UserStats.versao, UserStats.atualizado_em)
+        .filter_by(user_id=user_id)
+        .first()
+    ) or (None, None)
+    etag = hashlib.sha1(f"ics:{user_id}:{versao}".encode()).hexdigest()
+    if atualizado_em:
+        atualizado_em = atualizado_em.replace(microsecond=0)
+    return etag, atualizado_em
+
+
+def _escapar_ics(texto):
+    return (
+        (texto or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _linha_ics(nome, valor):
+    """Linha de conteúdo do iCalendar, dobrada em 75 octetos (RFC 5545)"""
+    linha = f"{nome}:{valor}".encode()
+    partes = []
+    while len(linha) > 75:
+        corte = 75 if not partes else 74
+        # Não corta no meio de um caractere UTF-8
+        while linha[corte] & 0xC0 == 0x80:
+            corte -= 1
+        partes.append(linha[:corte])
+        linha = linha[corte:]
+    partes.append(linha)
+    return b"\r\n ".join(partes).decode() + "\r\n"
+
+
+def _evento_ics(uid, carimbo, dia, titulo, categoria, descricao):
+    linhas = [
+        "BEGIN:VEVENT\r\n",
+        _linha_ics("UID", uid),
+        _linha_ics("DTSTAMP", carimbo),
+        _linha_ics("DTSTART;VALUE=DATE", dia.strftime("%Y%m%d")),
+        _linha_ics("DTEND;VALUE=DATE", (dia + timedelta(days=1)).strftime("%Y%m%d")),
+        _linha_ics("SUMMARY", _escapar_ics(titulo)),
+    ]
+    if categoria:
+        linhas.append(_linha_ics("CATEGORIES", _escapar_ics(categoria)))
+    if descricao:
+        linhas.append(_linha_ics("DESCRIPTION", _escapar_ics(descricao)))
+    linhas.append("END:VEVENT\r\n")
+    return "".join(linhas)
+
+
+def gerar_ics(user_id, atualizado_em=None):
+    """
+    Gera o feed iCalendar do usuário aos pedaços, para ser enviado em streaming
+
+    Usa os mesmos dados do calendário (atividades e metas com data), lidos
+    em lotes só com as colunas necessárias.
+    """
+    carimbo = (atualizado_em or datetime.utcnow()).strftime("%Y%m%dT%H%M%SZ")
+    yield (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        "PRODID:-//FocusUp//Calendario//PT-BR\r\n"
+        "CALSCALE:GREGORIAN\r\n"
+        "METHOD:PUBLISH\r\n"
+        "X-WR-CALNAME:FocusUp\r\n"
+    )
+
+    atividades = (
+        db.session.query(
+            Atividade.id,
+            Atividade.assunto_primario,
+            Atividade.data,
+            Atividade.materia,
+            Atividade.descricao,
+            Atividade.duracao,
+        )
+        .filter(Atividade.user_id == user_id, Atividade.data.isnot(None))
+        .yield_per(LOTE_ICS)
+    )
+    for id_, titulo, dia, materia, descricao, duracao in atividades:
+        detalhes = [f"Matéria: {materia}"]
+        if duracao:
+            detalhes.append(f"Duração: {duracao}")
+        if descricao:
+            detalhes.append(f"\n{descricao}")
+        yield _evento_ics(
+            f"atividade-{id_}@focusup",
+            carimbo,
+            dia,
+            f"📚 {titulo}",
+            materia,
+            "\n".join(detalhes),
+        )
+
+    metas = (
+        db.session.query(
+            Meta.id,
+            Meta.titulo,
+            Meta.data_limite,
+            Meta.status,
+            Materia.nome,
+            Meta.descricao,
+        )
+        .outerjoin(Materia, Meta.materia_id == Materia.id)
+        .filter(Meta.user_id == user_id, Meta.data_limite.isnot(None))
+        .yield_per(LOTE_ICS)
+    )
+    for id_, titulo, dia, status, materia, descricao in metas:
+        detalhes = ["Status: " + ("Concluída" if status == "concluido" else "Ativa")]
+        if materia:
+            detalhes.append(f"Matéria: {materia}")
+        if descricao:
+            detalhes.append(f"\n{descricao}")
+        yield _evento_ics(
+            f"meta-{id_}@focusup",
+            carimbo,
+            dia,
+            f"🎯 {titulo}",
+            materia,
+            "\n".join(detalhes),
+        )
+
+    yield "END:VCALENDAR\r\n"
@@ -0,0 +1,144 @@
+import time
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+
+from models.models import db, User, EmailPendente
+
+# Tipos de notificação que também geram email (se o usuário permitir)
+TIPOS_NOTIFICACAO_EMAIL = {"conquista", "lembrete"}
+
+# Tempo que um lote fica reservado para o worker que o pegou
+RESERVA_LOTE = timedelta(minutes=5)
+
+
+def enfileirar_email(destinatario, assunto, corpo):
+    """Coloca um email na caixa de saída; é gravado no commit da transação corrente"""
+    email = EmailPendente(destinatario=destinatario, assunto=assunto, corpo=corpo)
+    db.session.add(email)
+    return email
+
+
+def enfileirar_emails_de_notificacoes(session, notificacoes):
+    """Gera os emails das notificações para quem ativou notificações por email"""
+    notificacoes = [n for n in notificacoes if n["tipo"] in TIPOS_NOTIFICACAO_EMAIL]
+    if not notificacoes:
+        return
+
+    usuarios = {
+        user_id: (email, nome)
+        for user_id, email, nome in session.query(
+            User.id, User.email, User.name
+        ).filter(
+            User.id.in_({n["user_id"] for n in notificacoes}),
+            User.notificacoes_email.isnot(False),
+        )
+    }
+    emails = [
+        {
+            "destinatario": usuarios[n["user_id"]][0],
+            "assunto": f"{n['titulo']} - FocusUp",
+            "corpo": (
+                f"Olá {usuarios[n['user_id']][1] or 'usuário'},\n\n"
+                f"{n['mensagem']}\n\n"
+                "Atenciosamente,\nEquipe FocusUp"
+            ),
+            "status": "pendente",
+            "tentativas": 0,
+            "proxima_tentativa": n["data_criacao"],
+            "data_criacao": n["data_criacao"],
+        }
+        for n in notificacoes
+        if n["user_id"] in usuarios
+    ]
+    if emails:
+        session.execute(EmailPendente.__table__.insert(), emails)
+
+
+def _reservar_lote(tamanho_lote):
+    """Reserva um lote de emails vencidos para este worker e faz commit"""
+    agora = datetime.utcnow()
+    lote = (
+        EmailPendente.query.filter(
+            EmailPendente.status.in_(("pendente", "enviando")),
+            EmailPendente.proxima_tentativa <= agora,
+        )
+        .order_by(EmailPendente.proxima_tentativa)
+        .limit(tamanho_lote)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for email in lote:
+        # Se o worker morrer no meio do envio, o lote volta para a fila
+        email.status = "enviando"
+        email.proxima_tentativa = agora + RESERVA_LOTE
+    db.session.commit()
+    return lote
+
+
+def _registrar_falha(email, erro, max_tentativas, espera_base):
+    email.tentativas += 1
+    email.ultimo_erro = str(erro)[:1000]
+    if email.tentativas >= max_tentativas:
+        email.status = "falhou"
+    else:
+        # Backoff exponencial: 1min, 2min, 4min, ...
+        email.status = "pendente"
+        email.proxima_tentativa = datetime.utcnow() + espera_base * (
+            2 ** (email.tentativas - 1)
+        )
+
+
+def processar_emails(
+    mail,
+    tamanho_lote=50,
+    max_por_segundo=5,
+    max_tentativas=5,
+    espera_base=timedelta(minutes=1),
+):
+    """
+    Envia um lote da caixa de saída reutilizando uma única conexão SMTP
+
+    Respeita o limite de `max_por_segundo` envios e reagenda falhas com
+    backoff exponencial. Retorna (enviados, falhas).
+    """
+    lote = _reservar_lote(tamanho_lote)
+    if not lote:
+        return 0, 0
+
+    enviados = falhas = 0
+    intervalo = 1.0 / max_por_segundo if max_por_segundo else 0
+    try:
+        with mail.connect() as conexao:
+            for email in lote:
+                inicio = time.monotonic()
+                try:
+                    conexao.send(
+                        Message(
+                            email.assunto,
+                            recipients=[email.destinatario],
+                            body=email.corpo,
+                        )
+                    )
+                    email.status = "enviado"
+                    email.data_envio = datetime.utcnow()
+                    email.ultimo_erro = None
+                    enviados += 1
+                except Exception as e:
+                    _registrar_falha(email, e, max_tentativas, espera_base)
+                    falhas += 1
+                db.session.commit()
+
+                restante = intervalo - (time.monotonic() - inicio)
+                if restante > 0:
+                    time.sleep(restante)
+    except Exception as e:
+        # Falha ao conectar no SMTP: o que não foi enviado volta para a fila
+        print(f"Erro na conexão SMTP: {e}")
+        for email in lote:
+            if email.status == "enviando":
+                _registrar_falha(email, e, max_tentativas, espera_base)
+                falhas += 1
+        db.session.commit()
+
+    return enviados, falhas
@@ -0,0 +1,89 @@
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele só são gerados os .gz
+    brotli = None
+
+# Pasta (dentro de static/) com as cópias versionadas e o manifesto
+PASTA_ASSETS = "dist"
+MANIFESTO = "manifest.json"
+EXTENSOES_VERSIONADAS = {".css", ".js", ".png", ".jpg", ".jpeg", ".svg", ".ico"}
+EXTENSOES_COMPRIMIDAS = {".css", ".js", ".svg"}
+# encoding -> extensão da variante pré-comprimida, em ordem de preferência
+VARIANTES = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _arquivos_de_origem(pasta_static):
+    for raiz, pastas, arquivos in os.walk(pasta_static):
+        if raiz == pasta_static:
+            pastas[:] = [p for p in pastas if p != PASTA_ASSETS]
+        for arquivo in arquivos:
+            caminho = os.path.join(raiz, arquivo)
+            nome = os.path.relpath(caminho, pasta_static).replace(os.sep, "/")
+            # Fotos enviadas pelos usuários antes das miniaturas não são assets
+            if nome.startswith("imagens/user_"):
+                continue
+            if os.path.splitext(arquivo)[1].lower() in EXTENSOES_VERSIONADAS:
+                yield nome, caminho
+
+
+def _gravar(caminho, dados):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(dados)
+
+
+def gerar_assets(pasta_static):
+    """
+    Copia os assets para static/dist com o hash no nome, mais as variantes .gz/.br
+
+    Versões antigas não são apagadas: páginas já abertas de um deploy anterior
+    continuam achando os arquivos que referenciam. Devolve o manifesto.
+    """
+    destino = os.path.join(pasta_static, PASTA_ASSETS)
+    manifesto = {}
+    for nome, caminho in sorted(_arquivos_de_origem(pasta_static)):
+        with open(caminho, "rb") as arquivo:
+            dados = arquivo.read()
+        base, extensao = os.path.splitext(nome)
+        versionado = f"{base}.{hashlib.sha256(dados).hexdigest()[:12]}{extensao}"
+        manifesto[nome] = f"{PASTA_ASSETS}/{versionado}"
+
+        caminho_versionado = os.path.join(destino, versionado)
+        if os.path.exists(caminho_versionado):
+            continue
+        if extensao.lower() in EXTENSOES_COMPRIMIDAS:
+            _gravar(caminho_versionado + ".gz", gzip.compress(dados, 9, mtime=0))
+            if brotli is not None:
+                _gravar(caminho_versionado + ".br", brotli.compress(dados))
+        # O arquivo principal por último: se ele existe, as variantes também
+        _gravar(caminho_versionado, dados)
+
+    _gravar(
+        os.path.join(destino, MANIFESTO),
+        json.dumps(manifesto, indent=2, sort_keys=True).encode(),
+    )
+    return manifesto
+
+
+def carregar_manifesto(pasta_static):
+    """Manifesto do último build, ou {} (desenvolvimento: arquivos sem hash)"""
+    try:
+        with open(os.path.join(pasta_static, PASTA_ASSETS, MANIFESTO)) as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {}
+
+
+def variante_comprimida(pasta_dist, nome, aceitas):
+    """Nome da melhor variante pré-comprimida aceita pelo cliente, ou (nome, None)"""
+    for encoding, extensao in VARIANTES:
+        if aceitas[encoding] and os.path.exists(
+            os.path.join(pasta_dist, nome + extensao)
+        ):
+            return nome + extensao, encoding
+    return nome, None
@@ -0,0 +1,288 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+
+from models.models import (
+    db,
+    User,
+    Materia,
+    Atividade,
+    AtividadeDiaria,
+    Meta,
+    UserStats,
+)
+from servicos.sequencia import dia_local, hoje_local
+
+# Quantos dias o gráfico de atividades do dashboard mostra
+DIAS_GRAFICO = 30
+
+CONTADORES = (
+    "total_atividades",
+    "total_materias",
+    "total_minutos",
+    "metas_ativas",
+    "metas_concluidas",
+)
+
+
+def calcular_estatisticas(user_ids):
+    """Calcula os contadores a partir das tabelas de origem, agrupando por usuário"""
+    valores = {
+        user_id: {contador: 0 for contador in CONTADORES} for user_id in user_ids
+    }
+
+    consultas = [
+        (
+            db.session.query(
+                Atividade.user_id,
+                func.count(Atividade.id),
+                func.coalesce(func.sum(Atividade.duracao_minutos), 0),
+            ).filter(Atividade.user_id.in_(user_ids)),
+            Atividade.user_id,
+            ("total_atividades", "total_minutos"),
+        ),
+        (
+            db.session.query(Materia.user_id, func.count(Materia.id)).filter(
+                Materia.user_id.in_(user_ids)
+            ),
+            Materia.user_id,
+            ("total_materias",),
+        ),
+        (
+            db.session.query(Meta.user_id, func.count(Meta.id)).filter(
+                Meta.user_id.in_(user_ids), Meta.status == "ativo"
+            ),
+            Meta.user_id,
+            ("metas_ativas",),
+        ),
+        (
+            db.session.query(Meta.user_id, func.count(Meta.id)).filter(
+                Meta.user_id.in_(user_ids), Meta.status == "concluido"
+            ),
+            Meta.user_id,
+            ("metas_concluidas",),
+        ),
+    ]
+    for consulta, agrupamento, contadores in consultas:
+        for user_id, *totais in consulta.group_by(agrupamento):
+            for contador, total in zip(contadores, totais):
+                valores[user_id][contador] = int(total or 0)
+
+    return valores
+
+
+def reconstruir_estatisticas(user_id):
+    """Recalcula do zero a linha de estatísticas de um usuário (sem commit)"""
+    valores = calcular_estatisticas([user_id])[user_id]
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        stats = UserStats(user_id=user_id)
+        db.session.add(stats)
+    for contador, total in valores.items():
+        setattr(stats, contador, total)
+    stats.versao = (stats.versao or 0) + 1
+    stats.atualizado_em = datetime.utcnow()
+    return stats
+
+
+def obter_estatisticas(user_id):
+    """
+    Retorna a linha de estatísticas do usuário, criando-a se ainda não existir
+
+    A linha nova é gravada num savepoint, sem commit: o que a requisição tiver
+    pendente continua nas mãos de quem chamou.
+    """
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        try:
+            with db.session.begin_nested():
+                stats = reconstruir_estatisticas(user_id)
+        except IntegrityError:
+            # Outra requisição criou a linha ao mesmo tempo
+            stats = db.session.get(UserStats, user_id) or stats
+    return stats
+
+
+def ajustar_estatisticas(user_id, **deltas):
+    """
+    Aplica incrementos atômicos aos contadores na transação corrente
+
+    Deve ser chamada depois do add/delete da escrita principal e antes do
+    commit, para que contadores e dados de origem sejam gravados juntos.
+    Sempre incrementa `versao`, usada como chave dos caches derivados.
+    """
+    valores = {
+        getattr(UserStats, contador): getattr(UserStats, contador) + delta
+        for contador, delta in deltas.items()
+        if delta
+    }
+    valores[UserStats.versao] = UserStats.versao + 1
+    valores[UserStats.atualizado_em] = datetime.utcnow()
+
+    atualizados = UserStats.query.filter_by(user_id=user_id).update(valores)
+    if not atualizados:
+        # Usuário ainda sem linha: o recálculo já enxerga a escrita pendente
+        reconstruir_estatisticas(user_id)
+
+
+def delta_metas(status_anterior, status_novo):
+    """Incrementos de metas_ativas/metas_concluidas para uma mudança de status"""
+    deltas = {"metas_ativas": 0, "metas_concluidas": 0}
+    for status, sinal in ((status_anterior, -1), (status_novo, 1)):
+        if status == "ativo":
+            deltas["metas_ativas"] += sinal
+        elif status == "concluido":
+            deltas["metas_concluidas"] += sinal
+    return deltas
+
+
+def dia_da_atividade(data, data_criacao, fuso):
+    """Dia em que a atividade conta: a data informada ou, sem ela, o dia do cadastro"""
+    if data is not None:
+        return data
+    return dia_local(data_criacao, fuso) if data_criacao else None
+
+
+def ajustar_atividade_diaria(user_id, momento, quantidade=0, minutos=0, data=None):
+    """
+    Aplica incrementos ao acumulado diário do usuário na transação corrente
+
+    O dia é a `data` da atividade, se houver; senão, o dia local de `momento`
+    (o cadastro).
+    """
+    if not quantidade and not minutos:
+        return
+    dia = dia_da_atividade(data, momento, db.session.get(User, user_id).fuso_horario)
+    if dia is None:
+        return
+    valores = {
+        AtividadeDiaria.quantidade: AtividadeDiaria.quantidade + quantidade,
+        AtividadeDiaria.minutos: AtividadeDiaria.minutos + minutos,
+    }
+    filtro = AtividadeDiaria.query.filter_by(user_id=user_id, dia=dia)
+    if filtro.update(valores):
+        if quantidade < 0:
+            # Dia sem nenhuma atividade restante deixa de existir
+            filtro.filter(AtividadeDiaria.quantidade <= 0).delete()
+        return
+
+    # Primeira atividade do dia: insere, tolerando uma inserção concorrente
+    try:
+        with db.session.begin_nested():
+            db.session.add(
+                AtividadeDiaria(
+                    user_id=user_id, dia=dia, quantidade=quantidade, minutos=minutos
+                )
+            )
+    except IntegrityError:
+        filtro.update(valores)
+
+
+def atividades_por_dia(user_id, inicio, fim):
+    """Acumulados diários do usuário entre `inicio` e `fim` (inclusive)"""
+    return (
+        AtividadeDiaria.query.filter(
+            AtividadeDiaria.user_id == user_id,
+            AtividadeDiaria.dia >= inicio,
+            AtividadeDiaria.dia <= fim,
+        )
+        .order_by(AtividadeDiaria.dia)
+        .all()
+    )
+
+
+def grafico_atividades_por_dia(user, dias=DIAS_GRAFICO):
+    """Rótulos e totais dos últimos `dias` dias para o gráfico do dashboard"""
+    fim = hoje_local(user.fuso_horario)
+    linhas = atividades_por_dia(user.id, fim - timedelta(days=dias - 1), fim)
+    return [str(linha.dia) for linha in linhas], [linha.quantidade for linha in linhas]
+
+
+def reconstruir_atividades_diarias(user_ids):
+    """Recalcula os acumulados diários dos usuários informados (sem commit)"""
+    fusos = dict(
+        db.session.query(User.id, User.fuso_horario).filter(User.id.in_(user_ids))
+    )
+
+    # O dia depende do fuso de cada usuário, por isso a agregação é feita aqui
+    acumulados = {}
+    linhas = (
+        db.session.query(
+            Atividade.user_id,
+            Atividade.data,
+            Atividade.data_criacao,
+            Atividade.duracao_minutos,
+        )
+        .filter(
+            Atividade.user_id.in_(user_ids),
+            or_(Atividade.data.isnot(None), Atividade.data_criacao.isnot(None)),
+        )
+        .execution_options(yield_per=1000)
+    )
+    for user_id, data, data_criacao, minutos in linhas:
+        chave = (user_id, dia_da_atividade(data, data_criacao, fusos.get(user_id)))
+        quantidade, total = acumulados.get(chave, (0, 0))
+        acumulados[chave] = (quantidade + 1, total + (minutos or 0))
+
+    AtividadeDiaria.query.filter(AtividadeDiaria.user_id.in_(user_ids)).delete(
+        synchronize_session=False
+    )
+    if acumulados:
+        db.session.execute(
+            AtividadeDiaria.__table__.insert(),
+            [
+                {"user_id": user_id, "dia": dia, "quantidade": q, "minutos": m}
+                for (user_id, dia), (q, m) in acumulados.items()
+            ],
+        )
+
+
+def reconstruir_todas_estatisticas(tamanho_lote=500, apenas_faltantes=False):
+    """
+    Reconstrói a tabela inteira em lotes de usuários; retorna o total processado
+
+    Com `apenas_faltantes`, só cria as linhas de usuários que ainda não têm
+    estatísticas, sem tocar nos acumulados diários.
+    """
+    processados = 0
+    ultimo_id = 0
+    while True:
+        consulta = db.session.query(User.id).filter(User.id > ultimo_id)
+        if apenas_faltantes:
+            consulta = consulta.outerjoin(UserStats).filter(UserStats.user_id.is_(None))
+        user_ids = [
+            user_id for (user_id,) in consulta.order_by(User.id).limit(tamanho_lote)
+        ]
+        if not user_ids:
+            break
+
+        valores = calcular_estatisticas(user_ids)
+        versoes = dict(
+            db.session.query(UserStats.user_id, UserStats.versao).filter(
+                UserStats.user_id.in_(user_ids)
+            )
+        )
+        agora = datetime.utcnow()
+        UserStats.query.filter(UserStats.user_id.in_(user_ids)).delete(
+            synchronize_session=False
+        )
+        db.session.execute(
+            UserStats.__table__.insert(),
+            [
+                {
+                    "user_id": user_id,
+                    "versao": (versoes.get(user_id) or 0) + 1,
+                    "atualizado_em": agora,
+                    **contadores,
+                }
+                for user_id, contadores in valores.items()
+            ],
+        )
+        if not apenas_faltantes:
+            reconstruir_atividades_diarias(user_ids)
+        db.session.commit()
+
+        processados += len(user_ids)
+        ultimo_id = user_ids[-1]
+    return processados
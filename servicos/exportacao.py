@@ -0,0 +1,218 @@
+import csv
+import io
+import json
+import zipfile
+from datetime import date, datetime
+
+from models.models import (
+    db,
+    Atividade,
+    Badge,
+    Materia,
+    Meta,
+    Notificacao,
+    UserBadge,
+)
+
+# Linhas lidas do banco por vez (cursor no servidor) e tamanho dos pedaços enviados
+LOTE_EXPORTACAO = 1000
+TAMANHO_PEDACO = 64 * 1024
+
+
+def _atividades(user_id):
+    return (
+        db.session.query(
+            Atividade.id,
+            Atividade.materia,
+            Atividade.assunto_primario,
+            Atividade.descricao,
+            Atividade.duracao,
+            Atividade.data,
+            Atividade.data_criacao,
+        )
+        .filter(Atividade.user_id == user_id)
+        .order_by(Atividade.id)
+    )
+
+
+def _materias(user_id):
+    return (
+        db.session.query(Materia.id, Materia.nome)
+        .filter(Materia.user_id == user_id)
+        .order_by(Materia.id)
+    )
+
+
+def _metas(user_id):
+    return (
+        db.session.query(
+            Meta.id,
+            Meta.titulo,
+            Meta.descricao,
+            Materia.nome,
+            Meta.status,
+            Meta.data_limite,
+            Meta.data_criacao,
+        )
+        .outerjoin(Materia, Meta.materia_id == Materia.id)
+        .filter(Meta.user_id == user_id)
+        .order_by(Meta.id)
+    )
+
+
+def _badges(user_id):
+    return (
+        db.session.query(
+            Badge.nome,
+            Badge.descricao,
+            Badge.categoria,
+            Badge.pontos,
+            UserBadge.data_conquista,
+        )
+        .join(Badge, UserBadge.badge_id == Badge.id)
+        .filter(UserBadge.user_id == user_id)
+        .order_by(UserBadge.data_conquista, UserBadge.id)
+    )
+
+
+def _notificacoes(user_id):
+    return (
+        db.session.query(
+            Notificacao.id,
+            Notificacao.tipo,
+            Notificacao.titulo,
+            Notificacao.mensagem,
+            Notificacao.lida,
+            Notificacao.link,
+            Notificacao.data_criacao,
+        )
+        .filter(Notificacao.user_id == user_id)
+        .order_by(Notificacao.id)
+    )
+
+
+# tabela -> (cabeçalhos, consulta). Os cabeçalhos de atividades são os mesmos
+# aceitos pela importação, para o CSV exportado poder ser importado de volta.
+TABELAS_EXPORTACAO = {
+    "atividades": (
+        ("id", "materia", "assunto", "descricao", "duracao", "data", "data_criacao"),
+        _atividades,
+    ),
+    "materias": (("id", "nome"), _materias),
+    "metas": (
+        (
+            "id",
+            "titulo",
+            "descricao",
+            "materia",
+            "status",
+            "data_limite",
+            "data_criacao",
+        ),
+        _metas,
+    ),
+    "badges": (
+        ("nome", "descricao", "categoria", "pontos", "data_conquista"),
+        _badges,
+    ),
+    "notificacoes": (
+        ("id", "tipo", "titulo", "mensagem", "lida", "link", "data_criacao"),
+        _notificacoes,
+    ),
+}
+
+
+def _linhas(tabela, user_id):
+    """Linhas da tabela lidas em lotes por um cursor no servidor"""
+    _, consulta = TABELAS_EXPORTACAO[tabela]
+    return consulta(user_id).yield_per(LOTE_EXPORTACAO)
+
+
+def _serializavel(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat(timespec="seconds")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def _texto_csv(valor):
+    if isinstance(valor, bool):
+        return "sim" if valor else "não"
+    return _serializavel(valor)
+
+
+def _pedacos_csv(tabela, user_id):
+    """Gera o CSV de uma tabela em pedaços de ~TAMANHO_PEDACO caracteres"""
+    cabecalhos, _ = TABELAS_EXPORTACAO[tabela]
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(cabecalhos)
+    for linha in _linhas(tabela, user_id):
+        escritor.writerow([_texto_csv(valor) for valor in linha])
+        if buffer.tell() >= TAMANHO_PEDACO:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def gerar_csv(tabela, user_id):
+    """CSV de uma tabela do usuário (com BOM, para o Excel reconhecer o UTF-8)"""
+    yield "\ufeff"
+    yield from _pedacos_csv(tabela, user_id)
+
+
+def gerar_ndjson(user_id, tabelas=TABELAS_EXPORTACAO):
+    """Um objeto JSON por linha, com a tabela de origem na chave "tabela" """
+    for tabela in tabelas:
+        cabecalhos, _ = TABELAS_EXPORTACAO[tabela]
+        pedaco = []
+        for linha in _linhas(tabela, user_id):
+            registro = {"tabela": tabela}
+            registro.update(zip(cabecalhos, (_serializavel(valor) for valor in linha)))
+            pedaco.append(json.dumps(registro, ensure_ascii=False) + "\n")
+            if len(pedaco) >= LOTE_EXPORTACAO:
+                yield "".join(pedaco)
+                pedaco = []
+        if pedaco:
+            yield "".join(pedaco)
+
+
+class _SaidaZip:
+    """Destino sem seek para o zipfile: acumula os bytes até serem enviados"""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def esvaziar(self):
+        dados = b"".join(self.partes)
+        self.partes = []
+        return dados
+
+
+def gerar_zip(user_id, tabelas=TABELAS_EXPORTACAO):
+    """
+    Zip com um CSV por tabela, montado e enviado aos pedaços
+
+    Sem seek, o zipfile grava os tamanhos depois de cada arquivo (data
+    descriptor), então nada precisa ficar inteiro em memória.
+    """
+    saida = _SaidaZip()
+    with zipfile.ZipFile(saida, "w", compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for tabela in tabelas:
+            with arquivo_zip.open(f"{tabela}.csv", "w", force_zip64=True) as destino:
+                destino.write("\ufeff".encode())
+                for pedaco in _pedacos_csv(tabela, user_id):
+                    destino.write(pedaco.encode())
+                    dados = saida.esvaziar()
+                    if dados:
+                        yield dados
+    yield saida.esvaziar()
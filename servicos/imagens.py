@@ -0,0 +1,128 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+from PIL import Image, ImageOps
+
+# Miniaturas geradas para cada foto: nome -> lado em pixels (quadrado).
+# "p" é o avatar do cabeçalho (40px em telas 2x), "m" o da página de perfil.
+TAMANHOS_AVATAR = {"p": 80, "m": 240}
+FORMATOS_ACEITOS = {"JPEG", "PNG", "GIF", "WEBP"}
+# Limite de pixels da imagem original (evita "bombas" de descompressão)
+MAX_PIXELS_AVATAR = 40_000_000
+QUALIDADE_WEBP = 82
+# Mudar esta versão (tamanhos, qualidade, recorte) gera nomes novos
+VERSAO_PIPELINE = "1"
+
+_CHAVE_AVATAR = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ArmazenamentoLocal:
+    """Guarda os arquivos numa pasta local (ou compartilhada entre os nós)"""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+
+    def caminho(self, nome):
+        return os.path.join(self.pasta, *nome.split("/"))
+
+    def existe(self, nome):
+        return os.path.exists(self.caminho(nome))
+
+    def salvar(self, nome, dados):
+        """Grava de forma atômica; o nome é o hash, então nunca sobrescreve"""
+        destino = self.caminho(nome)
+        if os.path.exists(destino):
+            return
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as arquivo:
+                arquivo.write(dados)
+            os.replace(temporario, destino)
+        except BaseException:
+            os.remove(temporario)
+            raise
+
+    def remover(self, nome):
+        try:
+            os.remove(self.caminho(nome))
+        except FileNotFoundError:
+            pass
+
+
+# Backends disponíveis para AVATARES_BACKEND; outro serviço (S3, etc.) só
+# precisa oferecer existe/salvar/remover e ser registrado aqui.
+BACKENDS_ARMAZENAMENTO = {"local": ArmazenamentoLocal}
+
+
+def criar_armazenamento(backend, **opcoes):
+    try:
+        classe = BACKENDS_ARMAZENAMENTO[backend]
+    except KeyError:
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+    return classe(**opcoes)
+
+
+def eh_chave_avatar(photo):
+    """Fotos novas guardam a chave (hash); as antigas, o nome do arquivo"""
+    return bool(photo) and bool(_CHAVE_AVATAR.match(photo))
+
+
+def nome_avatar(chave, tamanho):
+    """Caminho em pastas de dois níveis pelo prefixo do hash: ab/cd/abcd..._p.webp"""
+    return f"{chave[:2]}/{chave[2:4]}/{chave}_{tamanho}.webp"
+
+
+def _abrir_imagem(dados):
+    """Valida o upload e devolve a imagem aberta, ou levanta ValueError"""
+    try:
+        imagem = Image.open(io.BytesIO(dados))
+    except Exception:
+        raise ValueError("O arquivo enviado não é uma imagem válida.")
+    if imagem.format not in FORMATOS_ACEITOS:
+        raise ValueError("Formato de imagem não suportado. Use PNG, JPG, GIF ou WEBP.")
+    if imagem.width * imagem.height > MAX_PIXELS_AVATAR:
+        raise ValueError("A imagem tem resolução grande demais.")
+    try:
+        imagem.load()
+    except Exception:
+        raise ValueError("O arquivo de imagem está corrompido.")
+    return imagem
+
+
+def _miniatura(imagem, lado):
+    """Recorte quadrado central redimensionado, codificado em WebP"""
+    miniatura = ImageOps.fit(imagem, (lado, lado), Image.Resampling.LANCZOS)
+    saida = io.BytesIO()
+    miniatura.save(saida, "WEBP", quality=QUALIDADE_WEBP, method=6)
+    return saida.getvalue()
+
+
+def processar_avatar(dados, armazenamento):
+    """
+    Gera e grava as miniaturas de uma foto enviada; devolve a chave
+
+    A chave é o hash do arquivo original, então reenviar a mesma foto
+    reaproveita os arquivos já gravados.
+    """
+    chave = hashlib.sha256(VERSAO_PIPELINE.encode() + b":" + dados).hexdigest()
+    nomes = {tamanho: nome_avatar(chave, tamanho) for tamanho in TAMANHOS_AVATAR}
+    if all(armazenamento.existe(nome) for nome in nomes.values()):
+        return chave
+
+    imagem = _abrir_imagem(dados)
+    # Fotos de celular vêm deitadas com a rotação só no EXIF
+    imagem = ImageOps.exif_transpose(imagem)
+    transparente = "A" in imagem.getbands() or "transparency" in imagem.info
+    imagem = imagem.convert("RGBA" if transparente else "RGB")
+    for tamanho, lado in TAMANHOS_AVATAR.items():
+        armazenamento.salvar(nomes[tamanho], _miniatura(imagem, lado))
+    return chave
+
+
+def remover_avatar(chave, armazenamento):
+    for tamanho in TAMANHOS_AVATAR:
+        armazenamento.remover(nome_avatar(chave, tamanho))
@@ -0,0 +1,220 @@
+import csv
+import io
+import json
+import os
+import re
+from datetime import date, datetime
+from itertools import chain
+
+from sqlalchemy import func, insert
+
+from models.models import db, Atividade, Materia, parse_duration_to_minutes
+from servicos.busca import indexar_atividades_inseridas
+from servicos.estatisticas import ajustar_atividade_diaria, ajustar_estatisticas
+from servicos.notificacoes import criar_notificacao
+
+LOTE_IMPORTACAO = 1000
+# Quantos erros de linha são guardados para mostrar ao usuário
+MAX_ERROS_LISTADOS = 20
+
+# Leitura do JSON aos pedaços; um único objeto não pode passar de MAX_OBJETO_JSON
+TAMANHO_LEITURA = 64 * 1024
+MAX_OBJETO_JSON = 1024 * 1024
+_SEPARADORES_JSON = re.compile(r"[\s,]*")
+
+# Cabeçalho/chave aceito -> campo da atividade
+COLUNAS = {
+    "materia": "materia",
+    "matéria": "materia",
+    "assunto": "assunto_primario",
+    "assunto_primario": "assunto_primario",
+    "assunto primário": "assunto_primario",
+    "descricao": "descricao",
+    "descrição": "descricao",
+    "duracao": "duracao",
+    "duração": "duracao",
+    "data": "data",
+}
+
+
+def ler_csv(arquivo):
+    """Lê um CSV (vírgula ou ponto e vírgula) linha a linha: gera (nº da linha, campos)"""
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    cabecalho = texto.readline()
+    delimitador = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+    leitor = csv.DictReader(chain([cabecalho], texto), delimiter=delimitador)
+    for linha in leitor:
+        yield leitor.line_num, linha
+
+
+def ler_json(arquivo):
+    """
+    Lê um array JSON ou JSON Lines objeto a objeto: gera (nº do objeto, objeto)
+
+    O arquivo é lido aos pedaços; só o objeto corrente fica em memória.
+    """
+    decodificador = json.JSONDecoder()
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig")
+    buffer = texto.read(TAMANHO_LEITURA).lstrip()
+    posicao = 1 if buffer.startswith("[") else 0
+    fim_do_arquivo = False
+    numero = 0
+    while True:
+        posicao = _SEPARADORES_JSON.match(buffer, posicao).end()
+        if buffer.startswith("]", posicao):
+            return
+        try:
+            objeto, posicao_final = decodificador.raw_decode(buffer, posicao)
+        except json.JSONDecodeError:
+            if fim_do_arquivo:
+                if posicao < len(buffer):
+                    raise ValueError(f"JSON inválido após o item {numero}.")
+                return
+            if len(buffer) - posicao > MAX_OBJETO_JSON:
+                raise ValueError(f"Item {numero + 1} do JSON é grande demais.")
+            pedaco = texto.read(TAMANHO_LEITURA)
+            fim_do_arquivo = not pedaco
+            buffer = buffer[posicao:] + pedaco
+            posicao = 0
+            continue
+        numero += 1
+        posicao = posicao_final
+        yield numero, objeto
+
+
+def ler_arquivo(arquivo, nome):
+    """Escolhe o leitor pela extensão do arquivo (.csv, .json, .jsonl ou .ndjson)"""
+    extensao = os.path.splitext(nome or "")[1].lower()
+    if extensao == ".csv":
+        return ler_csv(arquivo)
+    if extensao in (".json", ".jsonl", ".ndjson"):
+        return ler_json(arquivo)
+    raise ValueError("Formato não suportado. Envie um arquivo .csv ou .json.")
+
+
+def normalizar_linha(linha):
+    """Campos da atividade a partir de uma linha lida (cabeçalhos em qualquer caixa)"""
+    if not isinstance(linha, dict):
+        return None
+    campos = {}
+    for chave, valor in linha.items():
+        campo = COLUNAS.get(str(chave).strip().lower())
+        if campo and valor is not None:
+            campos[campo] = str(valor).strip()
+    return campos
+
+
+def converter_data(texto):
+    """Data em AAAA-MM-DD ou DD/MM/AAAA; levanta ValueError se inválida"""
+    if re.fullmatch(r"\d{1,2}/\d{1,2}/\d{4}", texto):
+        return datetime.strptime(texto, "%d/%m/%Y").date()
+    return date.fromisoformat(texto)
+
+
+def _gravar_lote(user_id, lote, materias, resumo):
+    """Insere um lote (e as matérias que faltam) e ajusta os contadores, em um commit"""
+    novas = sorted({atividade["materia"] for atividade in lote} - materias)
+    if novas:
+        db.session.execute(
+            insert(Materia), [{"nome": nome, "user_id": user_id} for nome in novas]
+        )
+        materias.update(novas)
+
+    agora = datetime.utcnow()
+    # Acumulado diário por data da atividade (sem data: o dia de hoje), para o
+    # histórico importado não cair todo no dia da importação
+    por_data = {}
+    for atividade in lote:
+        duracao = atividade["duracao"]
+        atividade["duracao_minutos"] = (
+            parse_duration_to_minutes(duracao) if duracao else None
+        )
+        atividade["user_id"] = user_id
+        atividade["data_criacao"] = agora
+        quantidade, minutos = por_data.get(atividade["data"], (0, 0))
+        por_data[atividade["data"]] = (
+            quantidade + 1,
+            minutos + (atividade["duracao_minutos"] or 0),
+        )
+
+    # Inserção em massa não dispara os eventos do ORM: o índice de busca
+    # é atualizado a partir do último id anterior ao lote
+    ultimo_id = db.session.query(func.max(Atividade.id)).scalar() or 0
+    db.session.execute(insert(Atividade), lote)
+    indexar_atividades_inseridas(user_id, ultimo_id)
+
+    ajustar_estatisticas(
+        user_id,
+        total_atividades=len(lote),
+        total_minutos=sum(minutos for _, minutos in por_data.values()),
+        total_materias=len(novas),
+    )
+    # A sequência é recalculada a partir desses dias na próxima leitura
+    # (ajustar_estatisticas troca a versão do cache)
+    for data, (quantidade, minutos) in por_data.items():
+        ajustar_atividade_diaria(
+            user_id, agora, quantidade=quantidade, minutos=minutos, data=data
+        )
+    db.session.commit()
+
+    resumo["importadas"] += len(lote)
+    resumo["materias_criadas"] += len(novas)
+
+
+def importar_atividades(user_id, linhas, validar, tamanho_lote=LOTE_IMPORTACAO):
+    """
+    Importa atividades em lotes e retorna o resumo da importação
+
+    `linhas` gera (nº da linha, dados), como ler_csv/ler_json, e `validar`
+    recebe os campos de uma linha e devolve (atividade, None) ou (None, erro).
+    Cada lote é inserido com executemany em uma transação própria. A
+    notificação de resumo entra na sessão; o commit final é de quem chama.
+    """
+    resumo = {
+        "importadas": 0,
+        "invalidas": 0,
+        "materias_criadas": 0,
+        "erros": [],
+        "erro_arquivo": None,
+    }
+    materias = {
+        nome for (nome,) in db.session.query(Materia.nome).filter_by(user_id=user_id)
+    }
+
+    lote = []
+    try:
+        for numero, linha in linhas:
+            campos = normalizar_linha(linha)
+            atividade, erro = (
+                validar(campos) if campos else (None, "Linha sem campos reconhecidos.")
+            )
+            if erro:
+                resumo["invalidas"] += 1
+                if len(resumo["erros"]) < MAX_ERROS_LISTADOS:
+                    resumo["erros"].append(f"Linha {numero}: {erro}")
+                continue
+            lote.append(atividade)
+            if len(lote) >= tamanho_lote:
+                _gravar_lote(user_id, lote, materias, resumo)
+                lote = []
+    except (ValueError, UnicodeDecodeError, csv.Error) as erro:
+        # Arquivo corrompido no meio: o que já foi lido continua importado
+        resumo["erro_arquivo"] = str(erro)
+    if lote:
+        _gravar_lote(user_id, lote, materias, resumo)
+
+    if resumo["importadas"] or resumo["invalidas"]:
+        mensagem = f"{resumo['importadas']} atividades importadas"
+        if resumo["materias_criadas"]:
+            mensagem += f", {resumo['materias_criadas']} matérias criadas"
+        if resumo["invalidas"]:
+            mensagem += f", {resumo['invalidas']} linhas ignoradas"
+        criar_notificacao(
+            user_id=user_id,
+            tipo="sistema",
+            titulo="Importação Concluída 📥",
+            mensagem=mensagem + ".",
+            link="/listar_atividades",
+            icone="fa-file-import",
+        )
+    return resumo
@@ -0,0 +1,181 @@
+from collections import Counter
+from datetime import datetime
+
+from flask import g, has_app_context
+from sqlalchemy import and_, bindparam, event, func, or_, select
+
+from models.models import db, Notificacao, User
+from servicos.emails import enfileirar_emails_de_notificacoes
+
+
+NOTIFICACOES_POR_PAGINA = 20
+
+
+def _pendentes():
+    """Buffer de notificações do contexto atual (uma requisição ou comando)"""
+    if "notificacoes_pendentes" not in g:
+        g.notificacoes_pendentes = []
+    return g.notificacoes_pendentes
+
+
+def ajustar_nao_lidas(user_id, delta):
+    """Incrementa atomicamente o contador de não lidas do usuário (sem commit)"""
+    if not delta:
+        return
+    db.session.execute(
+        User.__table__.update()
+        .where(User.__table__.c.id == user_id)
+        .values(notificacoes_nao_lidas=User.__table__.c.notificacoes_nao_lidas + delta)
+    )
+
+
+def incrementar_nao_lidas(session, contagem):
+    """Soma {user_id: quantidade} aos contadores com um único executemany"""
+    if not contagem:
+        return
+    usuarios = User.__table__
+    session.execute(
+        usuarios.update()
+        .where(usuarios.c.id == bindparam("_user_id"))
+        .values(
+            notificacoes_nao_lidas=usuarios.c.notificacoes_nao_lidas
+            + bindparam("_quantidade")
+        ),
+        [
+            {"_user_id": user_id, "_quantidade": quantidade}
+            for user_id, quantidade in contagem.items()
+        ],
+    )
+
+
+def reconciliar_nao_lidas(tamanho_lote=1000):
+    """
+    Recalcula o contador de não lidas de todos os usuários a partir de
+    tb_notificacoes, em lotes pela chave primária; retorna quantos divergiam
+    """
+    usuarios = User.__table__
+    contagem_real = (
+        select(func.count(Notificacao.id))
+        .where(Notificacao.user_id == usuarios.c.id, Notificacao.lida.is_(False))
+        .scalar_subquery()
+    )
+    corrigidos = 0
+    ultimo_id = 0
+    while True:
+        user_ids = [
+            user_id
+            for (user_id,) in db.session.query(User.id)
+            .filter(User.id > ultimo_id)
+            .order_by(User.id)
+            .limit(tamanho_lote)
+        ]
+        if not user_ids:
+            break
+        corrigidos += db.session.execute(
+            usuarios.update()
+            .where(
+                usuarios.c.id.in_(user_ids),
+                usuarios.c.notificacoes_nao_lidas != contagem_real,
+            )
+            .values(notificacoes_nao_lidas=contagem_real)
+        ).rowcount
+        db.session.commit()
+        ultimo_id = user_ids[-1]
+    return corrigidos
+
+
+def codificar_cursor(notificacao):
+    """Cursor opaco que aponta para depois da notificação informada"""
+    return f"{notificacao.data_criacao.isoformat()}_{notificacao.id}"
+
+
+def decodificar_cursor(cursor):
+    """Converte o cursor em (data_criacao, id); levanta ValueError se inválido"""
+    data, _, id_ = cursor.rpartition("_")
+    return datetime.fromisoformat(data), int(id_)
+
+
+def filtrar_notificacoes(user_id, tipo=None, lida=None):
+    """Consulta das notificações do usuário com os filtros da caixa de entrada"""
+    query = Notificacao.query.filter(Notificacao.user_id == user_id)
+    if lida is not None:
+        query = query.filter(Notificacao.lida.is_(lida))
+    if tipo is not None:
+        query = query.filter(Notificacao.tipo == tipo)
+    return query
+
+
+def pagina_notificacoes(
+    user_id, tipo=None, lida=None, cursor=None, limite=NOTIFICACOES_POR_PAGINA
+):
+    """
+    Uma página da caixa de entrada, da mais recente para a mais antiga
+
+    Usa paginação por chave (data_criacao, id): cada página continua a partir
+    do cursor da anterior, sem OFFSET, então o custo não cresce com o
+    histórico. Retorna (notificacoes, proximo_cursor ou None).
+    """
+    query = filtrar_notificacoes(user_id, tipo, lida)
+    if cursor:
+        data, id_ = decodificar_cursor(cursor)
+        query = query.filter(
+            or_(
+                Notificacao.data_criacao < data,
+                and_(Notificacao.data_criacao == data, Notificacao.id < id_),
+            )
+        )
+    notificacoes = (
+        query.order_by(Notificacao.data_criacao.desc(), Notificacao.id.desc())
+        .limit(limite + 1)
+        .all()
+    )
+    if len(notificacoes) > limite:
+        notificacoes = notificacoes[:limite]
+        return notificacoes, codificar_cursor(notificacoes[-1])
+    return notificacoes, None
+
+
+def criar_notificacao(user_id, tipo, titulo, mensagem, link=None, icone="fa-bell"):
+    """
+    Cria uma nova notificação para o usuário
+
+    A notificação não é gravada na hora: fica no buffer do contexto e é
+    inserida, junto com as demais, no próximo commit da sessão. Assim a
+    escrita principal, os badges e as notificações de uma requisição vão
+    para o banco em uma única transação.
+    """
+    _pendentes().append(
+        {
+            "user_id": user_id,
+            "tipo": tipo,
+            "titulo": titulo,
+            "mensagem": mensagem,
+            "link": link,
+            "icone": icone,
+            "lida": False,
+            "data_criacao": datetime.utcnow(),
+        }
+    )
+
+
+@event.listens_for(db.session, "before_commit")
+def _gravar_notificacoes_pendentes(session):
+    # Savepoints (begin_nested) também disparam before_commit; só grava no
+    # commit da transação externa
+    if not has_app_context() or session.in_nested_transaction():
+        return
+    pendentes = g.pop("notificacoes_pendentes", None)
+    if pendentes:
+        # Um único INSERT (executemany) para todas as notificações do buffer
+        session.execute(Notificacao.__table__.insert(), pendentes)
+        enfileirar_emails_de_notificacoes(session, pendentes)
+        contagem = Counter(notificacao["user_id"] for notificacao in pendentes)
+        incrementar_nao_lidas(session, contagem)
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _descartar_notificacoes_pendentes(session, transaction):
+    # Fim da transação externa sem commit (rollback): o buffer é descartado.
+    # Savepoints encerrados mantêm a transação externa e o buffer vivos.
+    if has_app_context() and transaction.parent is None:
+        g.pop("notificacoes_pendentes", None)
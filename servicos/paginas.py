@@ -0,0 +1,71 @@
+import hashlib
+import re
+import threading
+
+from markupsafe import Markup
+
+# Partes do base.html com dados do usuário (token CSRF, foto, nome e email):
+# nome do marcador -> template incluído. A página em cache guarda um marcador
+# no lugar delas (variável marcadores_usuario), preenchido a cada requisição.
+PARTES_DO_USUARIO = {
+    "csrf": "usuario_csrf.html",
+    "avatar_usuario": "usuario_avatar.html",
+    "dados_usuario": "usuario_dados.html",
+}
+
+_MARCADOR = re.compile("\x00(\\w+)\x00")
+
+
+def versao_paginas(ambiente, templates, manifesto):
+    """
+    Versão do cache: muda a cada deploy que altere os templates ou os assets
+
+    Usa o hash do código-fonte dos templates (inclusive o base.html) e do
+    manifesto de assets, que muda os links de static/.
+    """
+    resumo = hashlib.sha256(repr(sorted(manifesto.items())).encode())
+    for nome in sorted({"base.html", *templates}):
+        fonte, _, _ = ambiente.loader.get_source(ambiente, nome)
+        resumo.update(fonte.encode())
+    return resumo.hexdigest()[:16]
+
+
+def renderizar_molde(template, contexto):
+    """
+    Renderiza a página com marcadores no lugar das partes do usuário
+
+    Devolve as partes alternadas: texto fixo, nome da parte, texto fixo...
+    """
+    marcadores = {nome: Markup(f"\x00{nome}\x00") for nome in PARTES_DO_USUARIO}
+    html = template.render({**contexto, "marcadores_usuario": marcadores})
+    return tuple(_MARCADOR.split(html))
+
+
+def preencher_molde(partes, ambiente, contexto):
+    """Junta as partes fixas com as partes do usuário renderizadas agora"""
+    saida = list(partes)
+    for i in range(1, len(saida), 2):
+        saida[i] = ambiente.get_template(PARTES_DO_USUARIO[saida[i]]).render(contexto)
+    return "".join(saida)
+
+
+class CachePaginas:
+    """Cache em memória das páginas informativas já renderizadas"""
+
+    def __init__(self, versao, limite=256):
+        self.versao = versao
+        self.limite = limite
+        self._lock = threading.Lock()
+        self._paginas = {}
+
+    def obter(self, chave, renderizar):
+        """Devolve a página em cache para a chave, renderizando na primeira vez"""
+        chave = (self.versao, *chave)
+        pagina = self._paginas.get(chave)
+        if pagina is None:
+            pagina = renderizar()
+            with self._lock:
+                if len(self._paginas) >= self.limite:
+                    self._paginas.clear()
+                self._paginas[chave] = pagina
+        return pagina
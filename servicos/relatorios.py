@@ -0,0 +1,353 @@
+import hashlib
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+
+from models.models import db, Atividade, Materia, RelatorioPdf, User
+from servicos.estatisticas import obter_estatisticas
+
+# Muda quando o layout do PDF muda, para invalidar os relatórios já gerados
+VERSAO_LAYOUT = 2
+ATIVIDADES_NO_RELATORIO = 50
+
+# Tempo que um relatório fica reservado para o worker que o pegou
+RESERVA_RELATORIO = timedelta(minutes=5)
+
+
+def chave_relatorio(user):
+    """Hash dos dados que aparecem no relatório; muda quando algum deles muda"""
+    versao = obter_estatisticas(user.id).versao
+    dados = f"{VERSAO_LAYOUT}:{user.id}:{versao}:{user.name}:{user.email}:{user.photo}"
+    return hashlib.sha256(dados.encode()).hexdigest()
+
+
+def caminho_relatorio(pasta, user_id, chave):
+    return os.path.join(pasta, str(user_id), f"{chave}.pdf")
+
+
+def solicitar_relatorio(user_id, chave):
+    """
+    Coloca na fila a geração do relatório com esta chave (sem commit)
+
+    Um pedido já pendente para a mesma chave é reaproveitado; um pedido para
+    dados antigos é trocado pelo novo. Retorna o status do pedido.
+    """
+    pedido = db.session.get(RelatorioPdf, user_id)
+    if pedido is None:
+        pedido = RelatorioPdf(user_id=user_id)
+        db.session.add(pedido)
+    elif pedido.chave == chave and pedido.status in ("pendente", "gerando"):
+        return pedido.status
+    pedido.chave = chave
+    pedido.status = "pendente"
+    pedido.tentativas = 0
+    pedido.proxima_tentativa = datetime.utcnow()
+    pedido.ultimo_erro = None
+    return pedido.status
+
+
+def status_relatorio(pasta, user_id, chave):
+    """'pronto', 'pendente', 'gerando', 'falhou' ou None (nunca pedido)"""
+    if os.path.exists(caminho_relatorio(pasta, user_id, chave)):
+        return "pronto"
+    pedido = db.session.get(RelatorioPdf, user_id)
+    # "pronto" sem o arquivo: foi apagado do disco e precisa ser gerado de novo
+    if pedido is None or pedido.chave != chave or pedido.status == "pronto":
+        return None
+    return pedido.status
+
+
+def remover_relatorios(pasta, user_id):
+    """Apaga os PDFs e o pedido de relatório do usuário (sem commit)"""
+    shutil.rmtree(os.path.join(pasta, str(user_id)), ignore_errors=True)
+    RelatorioPdf.query.filter_by(user_id=user_id).delete()
+
+
+def gerar_pdf(user, destino):
+    """Monta o relatório de dados do usuário e grava em `destino`"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import (
+        SimpleDocTemplate,
+        Paragraph,
+        Spacer,
+        Table,
+        TableStyle,
+    )
+    from reportlab.lib.units import inch
+
+    doc = SimpleDocTemplate(destino, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Título do documento
+    title_style = ParagraphStyle(
+        "CustomTitle",
+        parent=styles["Heading1"],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=1,  # Centralizado
+    )
+    story.append(Paragraph("Relatório de Dados - FocusUp", title_style))
+    story.append(Spacer(1, 12))
+
+    # Informações do usuário
+    story.append(Paragraph("Informações do Usuário", styles["Heading2"]))
+    data_cadastro = getattr(user, "date_created", None)
+    user_data = [
+        ["ID", str(user.id)],
+        ["Nome", user.name or "N/A"],
+        ["Email", user.email],
+        [
+            "Data de Cadastro",
+            data_cadastro.strftime("%d/%m/%Y %H:%M") if data_cadastro else "N/A",
+        ],
+        ["Foto", user.photo or "N/A"],
+    ]
+
+    user_table = Table(user_data, colWidths=[2 * inch, 4 * inch])
+    user_table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, 0), 12),
+                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+                ("BACKGROUND", (0, 1), (-1, -1), colors.white),
+                ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ]
+        )
+    )
+    story.append(user_table)
+    story.append(Spacer(1, 20))
+
+    # Matérias
+    story.append(Paragraph("Matérias Cadastradas", styles["Heading2"]))
+    materias = Materia.query.filter_by(user_id=user.id).order_by(Materia.id).all()
+    if materias:
+        materias_data = [["Nome", "Data de Criação"]]
+        for materia in materias:
+            data_criacao = getattr(materia, "date_created", None)
+            materias_data.append(
+                [
+                    materia.nome,
+                    data_criacao.strftime("%d/%m/%Y %H:%M") if data_criacao else "N/A",
+                ]
+            )
+
+        materias_table = Table(materias_data, colWidths=[3 * inch, 3 * inch])
+        materias_table.setStyle(
+            TableStyle(
+                [
+                    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgreen),
+                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                    ("FONTSIZE", (0, 0), (-1, 0), 12),
+                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+                    ("BACKGROUND", (0, 1), (-1, -1), colors.white),
+                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
+                ]
+            )
+        )
+        story.append(materias_table)
+    else:
+        story.append(Paragraph("Nenhuma matéria cadastrada.", styles["Normal"]))
+    story.append(Spacer(1, 20))
+
+    # Atividades: só as mais recentes vêm do banco; o total sai das estatísticas
+    stats = obter_estatisticas(user.id)
+    story.append(Paragraph("Histórico de Atividades", styles["Heading2"]))
+    atividades_recentes = (
+        Atividade.query.filter_by(user_id=user.id)
+        .order_by(Atividade.data_criacao.desc())
+        .limit(ATIVIDADES_NO_RELATORIO)
+        .all()
+    )
+    if atividades_recentes:
+        atividades_data = [["Matéria", "Assunto", "Duração", "Data", "Descrição"]]
+        for atividade in atividades_recentes:
+            data_formatada = (
+                atividade.data.strftime("%d/%m/%Y") if atividade.data else "N/A"
+            )
+            descricao_curta = (
+                (atividade.descricao[:50] + "...")
+                if atividade.descricao and len(atividade.descricao) > 50
+                else atividade.descricao or "N/A"
+            )
+            atividades_data.append(
+                [
+                    atividade.materia,
+                    atividade.assunto_primario,
+                    atividade.duracao or "N/A",
+                    data_formatada,
+                    descricao_curta,
+                ]
+            )
+
+        atividades_table = Table(
+            atividades_data,
+            colWidths=[1.5 * inch, 1.5 * inch, 1 * inch, 1.2 * inch, 2.3 * inch],
+        )
+        atividades_table.setStyle(
+            TableStyle(
+                [
+                    ("BACKGROUND", (0, 0), (-1, 0), colors.lightyellow),
+                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                    ("FONTSIZE", (0, 0), (-1, 0), 10),
+                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+                    ("BACKGROUND", (0, 1), (-1, -1), colors.white),
+                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
+                    ("FONTSIZE", (0, 1), (-1, -1), 8),
+                ]
+            )
+        )
+        story.append(atividades_table)
+
+        if stats.total_atividades > ATIVIDADES_NO_RELATORIO:
+            story.append(
+                Paragraph(
+                    f"<i>Mostrando as {ATIVIDADES_NO_RELATORIO} atividades mais recentes de um total de {stats.total_atividades}.</i>",
+                    styles["Normal"],
+                )
+            )
+    else:
+        story.append(Paragraph("Nenhuma atividade registrada.", styles["Normal"]))
+    story.append(Spacer(1, 20))
+
+    # Estatísticas
+    story.append(Paragraph("Estatísticas Gerais", styles["Heading2"]))
+
+    horas_totais = stats.total_minutos // 60
+    minutos_restantes = stats.total_minutos % 60
+
+    # O PDF é reaproveitado enquanto os dados não mudam, então mostra a última
+    # alteração dos dados (que faz parte da chave), não o momento da geração.
+    # Data e hora de Brasília (UTC-3)
+    brasilia_tz = timezone(timedelta(hours=-3))
+    atualizado_em = stats.atualizado_em or datetime.utcnow()
+    dados_ate = (
+        atualizado_em.replace(tzinfo=timezone.utc)
+        .astimezone(brasilia_tz)
+        .strftime("%d/%m/%Y %H:%M:%S")
+    )
+
+    stats_data = [
+        ["Total de Atividades", str(stats.total_atividades)],
+        ["Total de Matérias", str(stats.total_materias)],
+        ["Tempo Total Estudado", f"{horas_totais}h {minutos_restantes}min"],
+        ["Dados atualizados até", dados_ate + " (Horário de Brasília)"],
+    ]
+
+    stats_table = Table(stats_data, colWidths=[3 * inch, 3 * inch])
+    stats_table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.lightcoral),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, 0), 12),
+                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+                ("BACKGROUND", (0, 1), (-1, -1), colors.white),
+                ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ]
+        )
+    )
+    story.append(stats_table)
+    story.append(Spacer(1, 20))
+
+    # Rodapé
+    footer_style = ParagraphStyle(
+        "Footer",
+        parent=styles["Normal"],
+        fontSize=10,
+        textColor=colors.gray,
+        alignment=1,
+    )
+    story.append(
+        Paragraph("Relatório gerado automaticamente pelo FocusUp", footer_style)
+    )
+
+    doc.build(story)
+
+
+def _gerar_para_disco(pasta, user, chave):
+    """Gera o PDF em um arquivo temporário e o publica com um rename atômico"""
+    caminho = caminho_relatorio(pasta, user.id, chave)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        gerar_pdf(user, temporario)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    # Versões antigas do relatório não são mais servidas
+    for nome in os.listdir(os.path.dirname(caminho)):
+        if nome.endswith(".pdf") and nome != os.path.basename(caminho):
+            os.remove(os.path.join(os.path.dirname(caminho), nome))
+    return caminho
+
+
+def processar_relatorios(pasta, tamanho_lote=10, max_tentativas=3):
+    """
+    Gera os relatórios pedidos; retorna (gerados, falhas)
+
+    Os pedidos são reservados com SKIP LOCKED, então vários workers podem
+    rodar juntos. Se o usuário pedir outro relatório enquanto este é gerado,
+    o pedido novo continua na fila.
+    """
+    agora = datetime.utcnow()
+    lote = (
+        RelatorioPdf.query.filter(
+            RelatorioPdf.status.in_(("pendente", "gerando")),
+            RelatorioPdf.proxima_tentativa <= agora,
+        )
+        .order_by(RelatorioPdf.proxima_tentativa)
+        .limit(tamanho_lote)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    reservados = []
+    for pedido in lote:
+        # Se o worker morrer no meio, o pedido volta para a fila
+        pedido.status = "gerando"
+        pedido.proxima_tentativa = agora + RESERVA_RELATORIO
+        reservados.append((pedido.user_id, pedido.chave))
+    db.session.commit()
+
+    gerados = falhas = 0
+    for user_id, chave in reservados:
+        filtro = RelatorioPdf.query.filter_by(user_id=user_id, chave=chave)
+        try:
+            user = db.session.get(User, user_id)
+            if user is not None:
+                _gerar_para_disco(pasta, user, chave)
+            filtro.update(
+                {"status": "pronto", "concluido_em": datetime.utcnow()},
+                synchronize_session=False,
+            )
+            gerados += 1
+        except Exception as erro:
+            db.session.rollback()
+            pedido = filtro.first()
+            if pedido is not None:
+                pedido.tentativas += 1
+                pedido.ultimo_erro = str(erro)
+                if pedido.tentativas >= max_tentativas:
+                    pedido.status = "falhou"
+                else:
+                    pedido.status = "pendente"
+                    pedido.proxima_tentativa = datetime.utcnow() + timedelta(
+                        seconds=30 * pedido.tentativas
+                    )
+            falhas += 1
+        db.session.commit()
+    return gerados, falhas
@@ -0,0 +1,95 @@
+import gzip
+import hashlib
+import time
+import zlib
+
+# Tipos que valem a pena comprimir. text/event-stream fica de fora: cada
+# evento precisa chegar ao navegador na hora, sem esperar o compressor.
+TIPOS_COMPRIMIVEIS = {
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+    "text/calendar",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+
+def adicionar_etag_fraca(
+    resposta, requisicao, token_csrf=None, segredo_csrf=None, validade_csrf=None
+):
+    """
+    ETag fraca pelo hash do corpo; devolve 304 se o navegador já tem a página
+
+    O token CSRF muda a cada requisição, então fica fora do hash; no lugar
+    dele entra o segredo CSRF da sessão, para que uma página guardada por
+    outra sessão (com outro token) nunca seja confirmada com 304. Para uma
+    página em cache nunca trazer um token vencido, a ETag também muda a cada
+    metade da validade do token.
+    """
+    corpo = resposta.get_data()
+    if token_csrf:
+        if not segredo_csrf:
+            return resposta
+        corpo = corpo.replace(token_csrf.encode(), b"")
+    resumo = hashlib.sha1(corpo)
+    if token_csrf:
+        resumo.update(hashlib.sha256(segredo_csrf.encode()).digest())
+        if validade_csrf:
+            resumo.update(str(int(time.time() // (validade_csrf / 2))).encode())
+    resposta.set_etag(resumo.hexdigest(), weak=True)
+    return resposta.make_conditional(requisicao)
+
+
+def _comprimir_pedacos(pedacos, nivel):
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for pedaco in pedacos:
+            if isinstance(pedaco, str):
+                pedaco = pedaco.encode()
+            dados = compressor.compress(pedaco)
+            if dados:
+                yield dados
+        yield compressor.flush()
+    finally:
+        if hasattr(pedacos, "close"):
+            pedacos.close()
+
+
+def comprimir_resposta(resposta, requisicao, nivel=6, tamanho_minimo=1024):
+    """
+    Comprime a resposta com gzip, se o navegador aceitar e valer a pena
+
+    Respostas em streaming são comprimidas pedaço a pedaço, sem juntar o corpo.
+    """
+    if resposta.mimetype not in TIPOS_COMPRIMIVEIS:
+        return resposta
+    resposta.vary.add("Accept-Encoding")
+    if (
+        resposta.status_code != 200
+        or requisicao.method == "HEAD"
+        or resposta.content_encoding
+        or resposta.cache_control.no_transform
+        or not requisicao.accept_encodings["gzip"]
+    ):
+        return resposta
+
+    if resposta.is_streamed or resposta.direct_passthrough:
+        resposta.response = _comprimir_pedacos(resposta.response, nivel)
+        resposta.direct_passthrough = False
+        resposta.headers.pop("Content-Length", None)
+    else:
+        dados = resposta.get_data()
+        if len(dados) < tamanho_minimo:
+            return resposta
+        resposta.set_data(gzip.compress(dados, nivel))
+    resposta.content_encoding = "gzip"
+    # A ETag descreve o corpo sem compressão; a forte deixa de valer
+    etag, fraca = resposta.get_etag()
+    if etag and not fraca:
+        resposta.set_etag(etag, weak=True)
+    return resposta
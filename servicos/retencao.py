@@ -0,0 +1,232 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, literal, select, tuple_
+
+from models.models import db, Notificacao, NotificacaoArquivada
+from servicos.notificacoes import ajustar_nao_lidas
+
+# Colunas copiadas para o arquivo; o id original vai para notificacao_id
+COLUNAS_NOTIFICACAO = (
+    "user_id",
+    "tipo",
+    "titulo",
+    "mensagem",
+    "lida",
+    "data_criacao",
+    "link",
+    "icone",
+)
+
+
+# Prefixo do título das notificações de resumo
+PREFIXO_RESUMO = "Resumo: "
+
+
+def _arquivar_e_excluir(ids, arquivar):
+    """Copia as notificações para o arquivo (opcional) e as remove da tabela principal"""
+    notificacoes = Notificacao.__table__
+    if arquivar:
+        colunas = [notificacoes.c[coluna] for coluna in COLUNAS_NOTIFICACAO]
+        db.session.execute(
+            insert(NotificacaoArquivada.__table__).from_select(
+                ["notificacao_id", *COLUNAS_NOTIFICACAO, "data_arquivamento"],
+                select(notificacoes.c.id, *colunas, literal(datetime.utcnow())).where(
+                    notificacoes.c.id.in_(ids)
+                ),
+            )
+        )
+    db.session.execute(notificacoes.delete().where(notificacoes.c.id.in_(ids)))
+
+
+def expurgar_lidas(dias, arquivar=True, tamanho_lote=500, pausa=0.1):
+    """
+    Remove as notificações lidas há mais de `dias` dias, em lotes pequenos
+
+    Cada lote é uma transação curta, percorrendo a chave primária, com uma
+    pausa entre lotes para não segurar locks nem disputar com as requisições.
+    Retorna o total removido.
+    """
+    corte = datetime.utcnow() - timedelta(days=dias)
+    removidas = 0
+    ultimo_id = 0
+    while True:
+        ids = [
+            id_
+            for (id_,) in db.session.query(Notificacao.id)
+            .filter(
+                Notificacao.id > ultimo_id,
+                Notificacao.lida.is_(True),
+                Notificacao.data_criacao < corte,
+            )
+            .order_by(Notificacao.id)
+            .limit(tamanho_lote)
+        ]
+        if not ids:
+            break
+        _arquivar_e_excluir(ids, arquivar)
+        db.session.commit()
+
+        removidas += len(ids)
+        ultimo_id = ids[-1]
+        time.sleep(pausa)
+    return removidas
+
+
+def _mensagem_resumo(total, titulo, inicio, fim):
+    return (
+        f"{total} notificações '{titulo}' entre "
+        f"{inicio.strftime('%d/%m/%Y')} e {fim.strftime('%d/%m/%Y')}."
+    )
+
+
+def _grupos_repetidos(tipos, corte, tamanho_lote):
+    """(user_id, tipo, titulo) com mais de uma notificação, em lotes pela chave"""
+    chave = (Notificacao.user_id, Notificacao.tipo, Notificacao.titulo)
+    ultimo = None
+    while True:
+        consulta = db.session.query(*chave).filter(
+            Notificacao.tipo.in_(tipos),
+            Notificacao.data_criacao < corte,
+            # Resumos não são resumidos de novo
+            Notificacao.resumo_total.is_(None),
+        )
+        if ultimo is not None:
+            consulta = consulta.filter(tuple_(*chave) > tuple_(*ultimo))
+        grupos = (
+            consulta.group_by(*chave)
+            .having(func.count(Notificacao.id) > 1)
+            .order_by(*chave)
+            .limit(tamanho_lote)
+            .all()
+        )
+        # Encerra a transação da leitura antes de processar os grupos
+        db.session.commit()
+        yield from grupos
+        if len(grupos) < tamanho_lote:
+            return
+        ultimo = tuple(grupos[-1])
+
+
+def _resumir_lote(user_id, tipo, titulo, corte, arquivar, tamanho_lote):
+    """
+    Move um lote das notificações do grupo para o resumo do usuário
+
+    Tudo numa transação: o resumo e as notificações do lote ficam travados
+    (FOR UPDATE) até o commit, então uma marcação de lida concorrente espera
+    e o contador de não lidas não é descontado duas vezes. Retorna o tamanho
+    do lote (0 quando o grupo acabou).
+    """
+    lote = (
+        db.session.query(
+            Notificacao.id,
+            Notificacao.lida,
+            Notificacao.data_criacao,
+            Notificacao.icone,
+        )
+        .filter(
+            Notificacao.user_id == user_id,
+            Notificacao.tipo == tipo,
+            Notificacao.titulo == titulo,
+            Notificacao.data_criacao < corte,
+        )
+        .order_by(Notificacao.id)
+        .limit(tamanho_lote)
+        .with_for_update()
+        .all()
+    )
+    if not lote:
+        return 0
+
+    titulo_resumo = f"{PREFIXO_RESUMO}{titulo}"[:200]
+    resumo = (
+        Notificacao.query.filter_by(user_id=user_id, tipo=tipo, titulo=titulo_resumo)
+        .filter(Notificacao.resumo_total.isnot(None))
+        .order_by(Notificacao.id)
+        .with_for_update()
+        .first()
+    )
+    nao_lidas = sum(1 for _, lida, _, _ in lote if not lida)
+    inicio = min(data for _, _, data, _ in lote)
+    fim = max(data for _, _, data, _ in lote)
+
+    if resumo is None:
+        resumo_nao_lido_antes = False
+        resumo = Notificacao(
+            user_id=user_id,
+            tipo=tipo,
+            titulo=titulo_resumo,
+            icone=lote[-1].icone,
+            lida=True,
+            resumo_total=0,
+            resumo_inicio=inicio,
+        )
+        db.session.add(resumo)
+    else:
+        resumo_nao_lido_antes = not resumo.lida
+        inicio = min(inicio, resumo.resumo_inicio or inicio)
+        fim = max(fim, resumo.data_criacao or fim)
+
+    resumo.resumo_total += len(lote)
+    resumo.resumo_inicio = inicio
+    resumo.mensagem = _mensagem_resumo(resumo.resumo_total, titulo, inicio, fim)
+    resumo.data_criacao = fim
+    resumo.lida = not (resumo_nao_lido_antes or nao_lidas)
+
+    _arquivar_e_excluir([id_ for id_, _, _, _ in lote], arquivar)
+    # As não lidas do lote passam a contar como, no máximo, o próprio resumo
+    ajustar_nao_lidas(
+        user_id, -nao_lidas + (0 if resumo.lida else 1) - int(resumo_nao_lido_antes)
+    )
+    db.session.commit()
+    return len(lote)
+
+
+def resumir_notificacoes(tipos, apos_horas, arquivar=True, tamanho_lote=500, pausa=0.1):
+    """
+    Junta notificações repetidas (mesmo usuário, tipo e título) em uma só
+
+    Só entram notificações com mais de `apos_horas` horas. Cada grupo vai para
+    uma notificação de resumo, reaproveitando o resumo que o usuário já tiver
+    para aquele título; ele fica não lido se alguma notificação juntada não
+    estava lida. Grupos e notificações são percorridos em lotes de
+    `tamanho_lote`, cada lote numa transação curta. Retorna
+    (resumos criados ou atualizados, notificações removidas).
+    """
+    corte = datetime.utcnow() - timedelta(hours=apos_horas)
+    resumos = 0
+    removidas = 0
+    for user_id, tipo, titulo in _grupos_repetidos(tipos, corte, tamanho_lote):
+        while True:
+            movidas = _resumir_lote(
+                user_id, tipo, titulo, corte, arquivar, tamanho_lote
+            )
+            if not movidas:
+                break
+            removidas += movidas
+            time.sleep(pausa)
+        resumos += 1
+    return resumos, removidas
+
+
+def expurgar_arquivo(dias, tamanho_lote=500, pausa=0.1):
+    """Apaga do arquivo, em lotes, as notificações arquivadas há mais de `dias` dias"""
+    corte = datetime.utcnow() - timedelta(days=dias)
+    removidas = 0
+    while True:
+        ids = [
+            id_
+            for (id_,) in db.session.query(NotificacaoArquivada.id)
+            .filter(NotificacaoArquivada.data_arquivamento < corte)
+            .order_by(NotificacaoArquivada.id)
+            .limit(tamanho_lote)
+        ]
+        if not ids:
+            break
+        NotificacaoArquivada.query.filter(NotificacaoArquivada.id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        removidas += len(ids)
+        time.sleep(pausa)
+    return removidas
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from models.models import db, AtividadeDiaria, UserStats
+
+FUSO_PADRAO = "America/Sao_Paulo"
+
+# Cache em memória (LRU): user_id -> ((versao, dia_local), (atual, maior))
+CACHE_SEQUENCIAS_LIMITE = 10_000
+_cache_sequencias = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def obter_fuso(nome):
+    """Retorna o ZoneInfo do fuso informado, caindo para UTC se for inválido"""
+    try:
+        return ZoneInfo(nome or FUSO_PADRAO)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def fuso_valido(nome):
+    """Indica se o nome é um fuso horário IANA conhecido"""
+    try:
+        ZoneInfo(nome)
+        return True
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        return False
+
+
+def dia_local(momento, fuso):
+    """Converte um datetime UTC (sem tzinfo) para a data no fuso do usuário"""
+    return momento.replace(tzinfo=timezone.utc).astimezone(obter_fuso(fuso)).date()
+
+
+def hoje_local(fuso):
+    """Data de hoje no fuso do usuário"""
+    return datetime.now(obter_fuso(fuso)).date()
+
+
+def calcular_sequencias(dias, hoje):
+    """
+    Calcula (sequência atual, maior sequência) a partir dos dias com atividade
+
+    `dias` deve estar em ordem crescente e sem repetições. A sequência atual
+    conta os dias consecutivos terminando em `hoje`.
+    """
+    maior = 0
+    corrente = 0
+    anterior = None
+    for dia in dias:
+        if anterior is not None and dia - anterior == timedelta(days=1):
+            corrente += 1
+        else:
+            corrente = 1
+        maior = max(maior, corrente)
+        anterior = dia
+
+    atual = corrente if anterior == hoje else 0
+    return atual, maior
+
+
+def obter_sequencias(user):
+    """Sequência atual e maior sequência do usuário, com cache por versão dos dados"""
+    stats = db.session.get(UserStats, user.id)
+    chave = (stats.versao if stats else None, hoje_local(user.fuso_horario))
+
+    with _cache_lock:
+        em_cache = _cache_sequencias.get(user.id)
+        if em_cache and em_cache[0] == chave:
+            _cache_sequencias.move_to_end(user.id)
+            return em_cache[1]
+
+    # Uma única consulta sobre os dias distintos (já no fuso do usuário). Dias
+    # futuros (ex.: atividades importadas com data adiante) não contam.
+    dias = [
+        dia
+        for (dia,) in db.session.query(AtividadeDiaria.dia)
+        .filter(AtividadeDiaria.user_id == user.id, AtividadeDiaria.dia <= chave[1])
+        .order_by(AtividadeDiaria.dia)
+    ]
+    resultado = calcular_sequencias(dias, chave[1])
+    with _cache_lock:
+        _cache_sequencias[user.id] = (chave, resultado)
+        _cache_sequencias.move_to_end(user.id)
+        while len(_cache_sequencias) > CACHE_SEQUENCIAS_LIMITE:
+            _cache_sequencias.popitem(last=False)
+    return resultado
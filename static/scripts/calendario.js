@@ -1,3 +1,27 @@
+// A API manda cada evento como lista de valores; aqui viram eventos do FullCalendar
+function montarEventos(data) {
+    const atividades = data.atividades.map(([id, titulo, dia, materia, descricao, duracao]) => ({
+        id: `atividade_${id}`,
+        title: `📚 ${titulo}`,
+        start: dia,
+        backgroundColor: '#1a73e8',
+        borderColor: '#0d47a1',
+        extendedProps: { tipo: 'atividade', materia, descricao, duracao }
+    }));
+    const metas = data.metas.map(([id, titulo, dia, status, materia, descricao]) => {
+        const cor = status === 'concluido' ? '#2e7d32' : '#ff9800';
+        return {
+            id: `meta_${id}`,
+            title: `🎯 ${titulo}`,
+            start: dia,
+            backgroundColor: cor,
+            borderColor: cor,
+            extendedProps: { tipo: 'meta', status, descricao, materia }
+        };
+    });
+    return atividades.concat(metas);
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     const calendarEl = document.getElementById('calendario');
 
@@ -16,10 +40,15 @@ document.addEventListener('DOMContentLoaded', function() {
             day: 'Dia'
         },
         events: function(fetchInfo, successCallback, failureCallback) {
-            fetch('/api/calendario_eventos')
+            // Só o período visível; o navegador revalida com ETag (304 se nada mudou)
+            const params = new URLSearchParams({
+                start: fetchInfo.startStr,
+                end: fetchInfo.endStr
+            });
+            fetch(`/api/calendario_eventos?${params}`)
                 .then(response => response.json())
                 .then(data => {
-                    successCallback(data.eventos);
+                    successCallback(montarEventos(data));
                 })
                 .catch(error => {
                     console.error('Erro ao carregar eventos:', error);
@@ -157,6 +186,14 @@ document.addEventListener('DOMContentLoaded', function() {
         modal.classList.add('show');
     };
 
+    window.copiarLinkCalendario = function() {
+        const campo = document.getElementById('linkCalendario');
+        const botao = campo.nextElementSibling;
+        navigator.clipboard.writeText(campo.value)
+            .then(() => { botao.innerHTML = '<i class="fa-solid fa-check"></i> Copiado'; })
+            .catch(() => campo.select());
+    };
+
     window.fecharModal = function() {
         const modal = document.getElementById('eventoModal');
         modal.classList.remove('show');
@@ -1,56 +1,70 @@
+// Filtros, ordenação e paginação são feitos no servidor; aqui só buscamos as páginas
+const formFiltros = document.getElementById('filtros-atividades');
+const listaAtividades = document.getElementById('lista-atividades');
+const carregarMais = document.getElementById('carregar-mais');
+const semResultados = document.getElementById('sem-resultados');
+let carregandoAtividades = false;
+
+function parametrosFiltros() {
+    const params = new URLSearchParams();
+    new FormData(formFiltros).forEach((valor, chave) => {
+        if (valor) params.set(chave, valor);
+    });
+    return params;
+}
+
+function buscarAtividades(cursor) {
+    const params = parametrosFiltros();
+    if (cursor) params.set('cursor', cursor);
+    carregandoAtividades = true;
+
+    return fetch(`/api/atividades?${params}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) return;
+            if (cursor) {
+                listaAtividades.insertAdjacentHTML('beforeend', data.html);
+            } else {
+                listaAtividades.innerHTML = data.html;
+            }
+            carregarMais.dataset.cursor = data.proximo_cursor || '';
+            carregarMais.style.display = data.proximo_cursor ? '' : 'none';
+            semResultados.style.display = listaAtividades.children.length ? 'none' : '';
+        })
+        .catch(error => console.error('Erro ao buscar atividades:', error))
+        .finally(() => { carregandoAtividades = false; });
+}
+
+// Recarrega a primeira página sempre que um filtro muda
 function filtrarAtividades() {
-            const input = document.getElementById('buscar-atividade');
-            const filter = input.value.toLowerCase();
-            const atividades = document.querySelectorAll('.atividade-item');
-            
-            atividades.forEach(atividade => {
-                const materia = atividade.dataset.materia.toLowerCase();
-                const assunto = atividade.dataset.assunto.toLowerCase();
-                
-                if (materia.includes(filter) || assunto.includes(filter)) {
-                    atividade.style.display = 'flex';
-                } else {
-                    atividade.style.display = 'none';
-                }
-            });
-        }
+    const params = parametrosFiltros();
+    history.replaceState(null, '', params.toString() ? `?${params}` : location.pathname);
+    buscarAtividades(null);
+}
+
+function carregarMaisAtividades() {
+    const cursor = carregarMais.dataset.cursor;
+    if (!cursor || carregandoAtividades) return;
+    buscarAtividades(cursor);
+}
 
-        // Função para ordenar atividades
-    function ordenarAtividades() {
-            const select = document.getElementById('ordenar');
-            const lista = document.getElementById('lista-atividades');
-            const atividades = Array.from(document.querySelectorAll('.atividade-item'));
-            
-            atividades.sort((a, b) => {
-                switch(select.value) {
-                    case 'materia':
-                        return a.dataset.materia.localeCompare(b.dataset.materia);
-                    case 'recente':
-                        return b.dataset.data.localeCompare(a.dataset.data);
-                    case 'antiga':
-                        return a.dataset.data.localeCompare(b.dataset.data);
-                    default:
-                        return 0;
-                }
-            });
-            
-            atividades.forEach(atividade => lista.appendChild(atividade));
-        }
+if (formFiltros) {
+    let esperaBusca = null;
+    document.getElementById('buscar-atividade').addEventListener('input', function() {
+        clearTimeout(esperaBusca);
+        esperaBusca = setTimeout(filtrarAtividades, 300);
+    });
+    formFiltros.querySelectorAll('select, input[type="date"]').forEach(campo => {
+        campo.addEventListener('change', filtrarAtividades);
+    });
+    formFiltros.addEventListener('submit', function(event) {
+        event.preventDefault();
+        filtrarAtividades();
+    });
 
-        // Calcular total de horas (exemplo simplificado)
-        document.addEventListener('DOMContentLoaded', function() {
-            const duracoes = document.querySelectorAll('.meta-item i.fa-clock');
-            let totalMinutos = 0;
-            
-            duracoes.forEach(item => {
-                const texto = item.parentElement.textContent.trim();
-                const match = texto.match(/(\d+):(\d+)/);
-                if (match) {
-                    totalMinutos += parseInt(match[1]) * 60 + parseInt(match[2]);
-                }
-            });
-            
-            const horas = Math.floor(totalMinutos / 60);
-            const minutos = totalMinutos % 60;
-            document.getElementById('total-horas').textContent = `${horas}h${minutos > 0 ? minutos + 'm' : ''}`;
-        });
\ No newline at end of file
+    if ('IntersectionObserver' in window) {
+        new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting) carregarMaisAtividades();
+        }, { rootMargin: '200px' }).observe(carregarMais);
+    }
+}
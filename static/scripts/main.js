@@ -19,28 +19,42 @@
         }
 
         // Função para atualizar badge de notificações
+        function renderNotificationBadge(naoLidas) {
+            const badge = document.getElementById('notificationBadge');
+            const previousCount = parseInt(badge.textContent) || 0;
+            if (naoLidas > 0) {
+                badge.textContent = naoLidas > 99 ? '99+' : naoLidas;
+                badge.style.display = 'inline-block';
+
+                // Mostrar notificação do navegador se houver novas
+                if (naoLidas > previousCount && previousCount > 0) {
+                    showBrowserNotification('Novas notificações', `Você tem ${naoLidas} notificações não lidas.`);
+                }
+            } else {
+                badge.textContent = '0';
+                badge.style.display = 'none';
+            }
+        }
+
         function updateNotificationBadge() {
             fetch('/api/notificacoes_nao_lidas')
                 .then(response => response.json())
-                .then(data => {
-                    const badge = document.getElementById('notificationBadge');
-                    const previousCount = parseInt(badge.textContent) || 0;
-                    if (data.nao_lidas > 0) {
-                        badge.textContent = data.nao_lidas > 99 ? '99+' : data.nao_lidas;
-                        badge.style.display = 'inline-block';
-
-                        // Mostrar notificação do navegador se houver novas
-                        if (data.nao_lidas > previousCount && previousCount > 0) {
-                            showBrowserNotification('Novas notificações', `Você tem ${data.nao_lidas} notificações não lidas.`);
-                        }
-                    } else {
-                        badge.style.display = 'none';
-                    }
-                })
+                .then(data => renderNotificationBadge(data.nao_lidas))
                 .catch(error => console.error('Erro ao buscar notificações:', error));
         }
 
-        // Função para mostrar notificações do navegador
+        // Polling a cada 30 segundos do contador (uma coluna lida pela chave
+        // primária). Abas em segundo plano não consultam; ao voltar, atualiza.
+        function startNotificationPolling() {
+            updateNotificationBadge();
+            setInterval(function() {
+                if (!document.hidden) updateNotificationBadge();
+            }, 30000);
+            document.addEventListener('visibilitychange', function() {
+                if (!document.hidden) updateNotificationBadge();
+            });
+        }
+
         function showBrowserNotification(title, body) {
             if ('Notification' in window) {
                 if (Notification.permission === 'granted') {
@@ -67,11 +81,16 @@
                 });
             });
 
-            // Atualizar badge de notificações
-            updateNotificationBadge();
+            // Inicializar tema baseado na preferência do usuário
+            if (document.body.dataset.tema === 'escuro') {
+                document.body.classList.add('dark-mode');
+                document.getElementById('themeIcon').classList.remove('fa-moon');
+                document.getElementById('themeIcon').classList.add('fa-sun');
+                document.getElementById('themeToggle').classList.add('dark');
+            }
 
-            // Atualizar badge a cada 30 segundos
-            setInterval(updateNotificationBadge, 30000);
+            // Atualizar badge de notificações
+            startNotificationPolling();
         });
 
         // Função para alternar tema
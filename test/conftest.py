@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+import pytest
+
+# O app conecta no banco ao ser importado: os testes usam um SQLite temporário
+_pasta_banco = tempfile.mkdtemp(prefix="focusup-testes-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_pasta_banco, 'testes.db')}"
+os.environ.setdefault("SECRET_KEY", "chave-dos-testes")
+
+import app as focusup  # noqa: E402
+from models.models import db, User  # noqa: E402
+from servicos.badges import limpar_cache_catalogo  # noqa: E402
+from servicos.busca import TABELA_FTS  # noqa: E402
+from servicos.sequencia import _cache_sequencias  # noqa: E402
+
+SENHA_TESTE = "Senha@123"
+
+
+@pytest.fixture(scope="session")
+def app():
+    focusup.app.config.update(
+        TESTING=True, WTF_CSRF_ENABLED=False, SESSION_COOKIE_SECURE=False
+    )
+    return focusup.app
+
+
+@pytest.fixture
+def contexto(app):
+    """Contexto da aplicação com o banco vazio (só os badges padrão)"""
+    with app.app_context():
+        for tabela in reversed(db.metadata.sorted_tables):
+            db.session.execute(tabela.delete())
+        db.session.execute(db.text(f"DELETE FROM {TABELA_FTS}"))
+        db.session.commit()
+        limpar_cache_catalogo()
+        _cache_sequencias.clear()
+        # Todos os logins dos testes vêm do mesmo IP
+        focusup.tentativas_login.clear()
+        focusup.tentativas_cadastro.clear()
+        focusup.criar_badges_padrao()
+        yield
+        db.session.remove()
+
+
+@pytest.fixture(scope="session")
+def hash_senha(app):
+    # O bcrypt é lento de propósito: calcula o hash uma vez só
+    return focusup.bcrypt.generate_password_hash(SENHA_TESTE).decode()
+
+
+@pytest.fixture
+def criar_usuario(contexto, hash_senha):
+    """Cria um usuário com a senha de teste e devolve o id"""
+
+    def criar(email="aluno@focusup.com", **campos):
+        usuario = User(
+            email=email,
+            password=hash_senha,
+            name="Aluno",
+            **campos,
+        )
+        db.session.add(usuario)
+        db.session.commit()
+        return usuario.id
+
+    return criar
+
+
+@pytest.fixture
+def cliente(app, criar_usuario):
+    """Cliente de teste já logado; o id do usuário fica em cliente.user_id"""
+    email = "logado@focusup.com"
+    user_id = criar_usuario(email)
+    cliente = app.test_client()
+    resposta = cliente.post("/login", data={"email": email, "password": SENHA_TESTE})
+    assert resposta.location == "/dashboard"
+    cliente.user_id = user_id
+    return cliente
@@ -0,0 +1,114 @@
+import re
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from models.models import db, Atividade
+from servicos.atividades import ORDENACOES, pagina_atividades
+
+# (matéria, duração, data): valores repetidos e nulos testam o desempate pelo id
+ATIVIDADES = [
+    ("Física", "01:00", date(2026, 3, 1)),
+    ("Química", None, date(2026, 3, 2)),
+    ("Física", "00:30", None),
+    ("Artes", "01:00", date(2026, 3, 1)),
+    ("Química", "02:00", None),
+    ("Biologia", None, date(2026, 2, 27)),
+    ("Física", "01:00", date(2026, 3, 1)),
+]
+
+
+@pytest.fixture
+def atividades(criar_usuario):
+    user_id = criar_usuario()
+    outro_id = criar_usuario("outro@focusup.com")
+    criacao = datetime(2026, 3, 5, 12, 0)
+    for n, (materia, duracao, data) in enumerate(ATIVIDADES):
+        for dono in (user_id, outro_id):
+            db.session.add(
+                Atividade(
+                    materia=materia,
+                    assunto_primario=f"Assunto {n}",
+                    duracao=duracao,
+                    data=data,
+                    # Cadastros no mesmo instante também empatam
+                    data_criacao=criacao + timedelta(minutes=n // 2),
+                    user_id=dono,
+                )
+            )
+    db.session.commit()
+    return user_id
+
+
+def _ordenadas(user_id, ordem):
+    """Ordem esperada: nulos primeiro na crescente e por último na decrescente"""
+    coluna, decrescente = ORDENACOES[ordem]
+    todas = Atividade.query.filter_by(user_id=user_id).all()
+    todas.sort(
+        key=lambda a: (
+            getattr(a, coluna.key) is not None,
+            getattr(a, coluna.key) or 0,
+            a.id,
+        )
+    )
+    return [a.id for a in (reversed(todas) if decrescente else todas)]
+
+
+def _percorrer(user_id, ordem, limite, **filtros):
+    ids, cursor, paginas = [], None, 0
+    while True:
+        pagina, cursor = pagina_atividades(
+            user_id, ordem, cursor=cursor, limite=limite, **filtros
+        )
+        ids += [a.id for a in pagina]
+        paginas += 1
+        if cursor is None:
+            return ids, paginas
+
+
+@pytest.mark.parametrize("ordem", sorted(ORDENACOES))
+@pytest.mark.parametrize("limite", [1, 2, 3, 7])
+def test_cursor_percorre_todas_sem_repetir(atividades, ordem, limite):
+    ids, paginas = _percorrer(atividades, ordem, limite)
+    assert ids == _ordenadas(atividades, ordem)
+    assert paginas == -(-len(ATIVIDADES) // limite)
+
+
+def test_cursor_respeita_os_filtros(atividades):
+    ids, _ = _percorrer(atividades, "recente", 1, materia="Física")
+    assert ids == [i for i in _ordenadas(atividades, "recente") if i in ids]
+    assert len(ids) == 3
+
+    ids, _ = _percorrer(atividades, "antiga", 2, inicio=date(2026, 3, 1))
+    assert len(ids) == 4
+
+
+def test_api_recusa_cursor_invalido(cliente):
+    resposta = cliente.get("/api/atividades?cursor=nao-e-um-cursor")
+    assert resposta.status_code == 400
+    assert resposta.get_json()["success"] is False
+
+
+def test_api_continua_do_cursor(cliente):
+    for n in range(25):
+        db.session.add(
+            Atividade(
+                materia="Física",
+                assunto_primario=f"Assunto {n}",
+                data=date(2026, 3, 1),
+                user_id=cliente.user_id,
+            )
+        )
+    db.session.commit()
+
+    primeira = cliente.get("/api/atividades").get_json()
+    segunda = cliente.get(
+        f"/api/atividades?cursor={primeira['proximo_cursor']}"
+    ).get_json()
+    assuntos = [
+        re.findall(r'data-assunto="([^"]+)"', pagina["html"])
+        for pagina in (primeira, segunda)
+    ]
+    assert [len(pagina) for pagina in assuntos] == [20, 5]
+    assert len(set(assuntos[0] + assuntos[1])) == 25
+    assert segunda["proximo_cursor"] is None
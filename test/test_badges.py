@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+import servicos.badges as badges
+from models.models import db, Atividade, Notificacao, User, UserBadge
+from servicos.badges import (
+    catalogo_badges,
+    conceder_badges_retroativos,
+    verificar_badges,
+)
+from servicos.estatisticas import obter_estatisticas
+
+
+@pytest.fixture
+def estudante(criar_usuario):
+    """Usuário com uma atividade e a linha de estatísticas já gravada"""
+    user_id = criar_usuario()
+    db.session.add(
+        Atividade(materia="Física", assunto_primario="Óptica", user_id=user_id)
+    )
+    db.session.commit()
+    obter_estatisticas(user_id)
+    db.session.commit()
+    return user_id
+
+
+def _badges_do_usuario(user_id):
+    return UserBadge.query.filter_by(user_id=user_id).count()
+
+
+def test_concessao_e_idempotente(estudante):
+    concedidos = verificar_badges(estudante, "primeira_atividade", "10_horas")
+    db.session.commit()
+    assert [badge["nome"] for badge in concedidos] == ["Primeira Atividade"]
+
+    assert verificar_badges(estudante, "primeira_atividade", "10_horas") == []
+    db.session.commit()
+    assert _badges_do_usuario(estudante) == 1
+
+
+def test_concessao_concorrente_cai_no_indice_unico(estudante):
+    badge_id = catalogo_badges()["primeira_atividade"]["id"]
+
+    def concessao_concorrente(session, flush_context, instances):
+        # Outra requisição grava o mesmo badge depois da checagem desta
+        with db.engine.begin() as conexao:
+            conexao.execute(
+                UserBadge.__table__.insert(),
+                {"user_id": estudante, "badge_id": badge_id},
+            )
+
+    event.listen(db.session, "before_flush", concessao_concorrente)
+    try:
+        assert verificar_badges(estudante, "primeira_atividade") == []
+    finally:
+        event.remove(db.session, "before_flush", concessao_concorrente)
+
+    # O savepoint desfez só a inserção recusada; a transação segue utilizável
+    db.session.commit()
+    assert _badges_do_usuario(estudante) == 1
+
+
+def test_retroativos_pulam_quem_ja_tem_o_badge(criar_usuario):
+    user_ids = [criar_usuario(f"aluno{n}@focusup.com") for n in range(3)]
+    for user_id in user_ids:
+        db.session.add(
+            Atividade(materia="Física", assunto_primario="Óptica", user_id=user_id)
+        )
+    db.session.commit()
+    verificar_badges(user_ids[0], "primeira_atividade")
+    db.session.commit()
+
+    resultado = conceder_badges_retroativos(["primeira_atividade"])
+    assert resultado == {"primeira_atividade": 2}
+    assert [_badges_do_usuario(user_id) for user_id in user_ids] == [1, 1, 1]
+    assert Notificacao.query.filter_by(tipo="conquista").count() == 2
+
+    # Rodar de novo não concede nada
+    resultado = conceder_badges_retroativos(["primeira_atividade"])
+    assert resultado == {"primeira_atividade": 0}
+
+
+def test_lote_retroativo_com_conflito_refaz_linha_a_linha(criar_usuario):
+    user_ids = [criar_usuario(f"aluno{n}@focusup.com") for n in range(3)]
+    badge_id = catalogo_badges()["primeira_atividade"]["id"]
+    # Concedido por uma requisição depois que o lote foi montado
+    db.session.add(UserBadge(user_id=user_ids[1], badge_id=badge_id))
+    db.session.commit()
+
+    inseridos = badges._inserir_user_badges(badge_id, user_ids, datetime.utcnow())
+    db.session.commit()
+    assert inseridos == [user_ids[0], user_ids[2]]
+    assert [_badges_do_usuario(user_id) for user_id in user_ids] == [1, 1, 1]
+    assert db.session.get(User, user_ids[1]).notificacoes_nao_lidas == 0
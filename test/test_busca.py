@@ -0,0 +1,110 @@
+from models.models import db, Atividade, Meta
+from servicos.busca import (
+    TABELA_FTS,
+    buscar,
+    indexar_atividades_inseridas,
+    reindexar_sqlite,
+)
+
+
+def _indice():
+    return db.session.execute(
+        db.text(f"SELECT rowid, titulo, conteudo, user_id FROM {TABELA_FTS}")
+    ).all()
+
+
+def _encontrados(user_id, consulta):
+    return [(r["tipo"], r["id"]) for r in buscar(user_id, consulta)]
+
+
+def _confere_com_reindexacao():
+    """O índice mantido pelos eventos é igual ao reconstruído do zero"""
+    indice = sorted(_indice())
+    reindexar_sqlite(db.session.connection())
+    assert sorted(_indice()) == indice
+    db.session.rollback()
+
+
+def test_insercao_indexa_atividades_e_metas(criar_usuario):
+    user_id = criar_usuario()
+    outro_id = criar_usuario("outro@focusup.com")
+    atividade = Atividade(
+        materia="Física",
+        assunto_primario="Óptica geométrica",
+        descricao="Lentes e espelhos",
+        user_id=user_id,
+    )
+    meta = Meta(titulo="Revisar óptica", descricao="Antes da prova", user_id=user_id)
+    db.session.add_all([atividade, meta])
+    db.session.commit()
+
+    # Sem acento, por prefixo e em qualquer coluna indexada
+    assert sorted(_encontrados(user_id, "optica")) == [
+        ("atividade", atividade.id),
+        ("meta", meta.id),
+    ]
+    assert _encontrados(user_id, "espelho") == [("atividade", atividade.id)]
+    assert _encontrados(user_id, "fisica") == [("atividade", atividade.id)]
+    assert _encontrados(outro_id, "optica") == []
+    _confere_com_reindexacao()
+
+
+def test_edicao_reindexa(criar_usuario):
+    user_id = criar_usuario()
+    atividade = Atividade(materia="Física", assunto_primario="Óptica", user_id=user_id)
+    meta = Meta(titulo="Revisar óptica", user_id=user_id)
+    db.session.add_all([atividade, meta])
+    db.session.commit()
+
+    atividade.assunto_primario = "Termodinâmica"
+    meta.titulo = "Revisar calor"
+    db.session.commit()
+
+    assert _encontrados(user_id, "optica") == []
+    assert _encontrados(user_id, "termodinamica") == [("atividade", atividade.id)]
+    assert _encontrados(user_id, "calor") == [("meta", meta.id)]
+    assert len(_indice()) == 2
+    _confere_com_reindexacao()
+
+
+def test_exclusao_remove_do_indice(criar_usuario):
+    user_id = criar_usuario()
+    atividade = Atividade(materia="Física", assunto_primario="Óptica", user_id=user_id)
+    meta = Meta(titulo="Revisar óptica", user_id=user_id)
+    fica = Atividade(materia="Física", assunto_primario="Ondas", user_id=user_id)
+    db.session.add_all([atividade, meta, fica])
+    db.session.commit()
+
+    db.session.delete(atividade)
+    db.session.delete(meta)
+    db.session.commit()
+
+    assert _encontrados(user_id, "optica") == []
+    assert [rowid for rowid, *_ in _indice()] == [fica.id * 2]
+    _confere_com_reindexacao()
+
+
+def test_insercao_em_massa(criar_usuario):
+    user_id = criar_usuario()
+    existente = Atividade(materia="Física", assunto_primario="Óptica", user_id=user_id)
+    db.session.add(existente)
+    db.session.commit()
+
+    # Como na importação: executemany não dispara os eventos do ORM
+    db.session.execute(
+        Atividade.__table__.insert(),
+        [
+            {
+                "materia": "Química",
+                "assunto_primario": f"Reação {n}",
+                "user_id": user_id,
+            }
+            for n in range(3)
+        ],
+    )
+    assert _encontrados(user_id, "reacao") == []
+    indexar_atividades_inseridas(user_id, existente.id)
+    db.session.commit()
+
+    assert len(_encontrados(user_id, "reacao")) == 3
+    _confere_com_reindexacao()
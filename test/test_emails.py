@@ -0,0 +1,153 @@
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+from flask_mail import Mail
+
+from models.models import db, EmailPendente
+from servicos.emails import enfileirar_email, processar_emails
+from servicos.notificacoes import criar_notificacao
+
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class CaixaDeEntrada:
+    """Handler do aiosmtpd que guarda as mensagens e recusa destinatários"""
+
+    def __init__(self):
+        self.mensagens = []
+        self.recusados = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.recusados:
+            return "550 Caixa de correio indisponível"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.mensagens.append(envelope)
+        return "250 Mensagem aceita"
+
+
+def _configurar_mail(app, monkeypatch, porta):
+    monkeypatch.setitem(app.config, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setitem(app.config, "MAIL_PORT", porta)
+    monkeypatch.setitem(app.config, "MAIL_USE_TLS", False)
+    monkeypatch.setitem(app.config, "MAIL_USE_SSL", False)
+    monkeypatch.setitem(app.config, "MAIL_USERNAME", None)
+    monkeypatch.setitem(app.config, "MAIL_PASSWORD", None)
+    monkeypatch.setitem(app.config, "MAIL_DEFAULT_SENDER", "focusup@localhost")
+    monkeypatch.setitem(app.config, "MAIL_SUPPRESS_SEND", False)
+    # Mail(app) troca o estado em app.extensions; o monkeypatch devolve o original
+    monkeypatch.setitem(app.extensions, "mail", app.extensions["mail"])
+    return Mail(app)
+
+
+@pytest.fixture
+def smtp(app, contexto, monkeypatch):
+    """Servidor SMTP local (aiosmtpd) e o Mail do app apontando para ele"""
+    caixa = CaixaDeEntrada()
+    controlador = Controller(caixa, hostname="127.0.0.1", port=_porta_livre())
+    controlador.start()
+    caixa.mail = _configurar_mail(app, monkeypatch, controlador.port)
+    yield caixa
+    controlador.stop()
+
+
+def _vencer(email):
+    """Antecipa a próxima tentativa para o email entrar no próximo lote"""
+    email.proxima_tentativa = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_envia_os_emails_enfileirados(smtp):
+    enfileirar_email("a@focusup.com", "Assunto A", "Corpo A")
+    enfileirar_email("b@focusup.com", "Assunto B", "Corpo B")
+    db.session.commit()
+
+    assert processar_emails(smtp.mail, max_por_segundo=0) == (2, 0)
+
+    assert sorted(m.rcpt_tos[0] for m in smtp.mensagens) == [
+        "a@focusup.com",
+        "b@focusup.com",
+    ]
+    assert b"Subject: Assunto A" in smtp.mensagens[0].content
+    for email in EmailPendente.query.all():
+        assert email.status == "enviado"
+        assert email.data_envio is not None
+        assert email.tentativas == 0
+
+    # Nada mais a enviar
+    assert processar_emails(smtp.mail, max_por_segundo=0) == (0, 0)
+
+
+def test_notificacao_de_conquista_enfileira_email(smtp, criar_usuario):
+    quer_email = criar_usuario("quer@focusup.com")
+    sem_email = criar_usuario("sem@focusup.com", notificacoes_email=False)
+    for user_id in (quer_email, sem_email):
+        criar_notificacao(user_id, "conquista", "Badge", "Parabéns!")
+    criar_notificacao(quer_email, "sistema", "Aviso", "Sem email")
+    db.session.commit()
+
+    emails = EmailPendente.query.all()
+    assert [email.destinatario for email in emails] == ["quer@focusup.com"]
+    assert emails[0].assunto == "Badge - FocusUp"
+
+    assert processar_emails(smtp.mail, max_por_segundo=0) == (1, 0)
+    assert smtp.mensagens[0].rcpt_tos == ["quer@focusup.com"]
+
+
+def test_recusa_reagenda_com_backoff_ate_desistir(smtp):
+    smtp.recusados.add("recusa@focusup.com")
+    recusado = enfileirar_email("recusa@focusup.com", "Assunto", "Corpo")
+    aceito = enfileirar_email("aceita@focusup.com", "Assunto", "Corpo")
+    db.session.commit()
+
+    antes = datetime.utcnow()
+    assert processar_emails(smtp.mail, max_por_segundo=0, max_tentativas=3) == (1, 1)
+    assert aceito.status == "enviado"
+    assert recusado.status == "pendente"
+    assert recusado.tentativas == 1
+    assert "550" in recusado.ultimo_erro
+    espera = recusado.proxima_tentativa - antes
+    assert timedelta(seconds=59) < espera < timedelta(minutes=1, seconds=5)
+
+    # Ainda não venceu: o worker não pega o email de novo
+    assert processar_emails(smtp.mail, max_por_segundo=0, max_tentativas=3) == (0, 0)
+
+    # A espera dobra a cada falha
+    _vencer(recusado)
+    antes = datetime.utcnow()
+    assert processar_emails(smtp.mail, max_por_segundo=0, max_tentativas=3) == (0, 1)
+    assert recusado.tentativas == 2
+    espera = recusado.proxima_tentativa - antes
+    assert timedelta(seconds=119) < espera < timedelta(minutes=2, seconds=5)
+
+    _vencer(recusado)
+    assert processar_emails(smtp.mail, max_por_segundo=0, max_tentativas=3) == (0, 1)
+    assert recusado.status == "falhou"
+    assert recusado.tentativas == 3
+
+    # Depois de desistir, o email sai da fila
+    _vencer(recusado)
+    assert processar_emails(smtp.mail, max_por_segundo=0, max_tentativas=3) == (0, 0)
+    assert len(smtp.mensagens) == 1
+
+
+def test_falha_de_conexao_devolve_o_lote_para_a_fila(app, contexto, monkeypatch):
+    # Ninguém escutando nesta porta
+    mail = _configurar_mail(app, monkeypatch, _porta_livre())
+    emails = [enfileirar_email(f"{n}@focusup.com", "Assunto", "Corpo") for n in "ab"]
+    db.session.commit()
+
+    assert processar_emails(mail, max_por_segundo=0) == (0, 2)
+    for email in emails:
+        assert email.status == "pendente"
+        assert email.tentativas == 1
+        assert email.ultimo_erro
+        assert email.proxima_tentativa > datetime.utcnow()
@@ -0,0 +1,102 @@
+from datetime import date
+
+from models.models import db, Atividade, AtividadeDiaria, Materia, Meta, UserStats
+from servicos.estatisticas import (
+    CONTADORES,
+    calcular_estatisticas,
+    reconstruir_atividades_diarias,
+)
+
+
+def _contadores(user_id):
+    stats = db.session.get(UserStats, user_id)
+    return {contador: getattr(stats, contador) for contador in CONTADORES}
+
+
+def _acumulados_diarios(user_id):
+    return {
+        linha.dia: (linha.quantidade, linha.minutos)
+        for linha in AtividadeDiaria.query.filter_by(user_id=user_id)
+    }
+
+
+def _conferir_com_reconstrucao(user_id):
+    """Os valores mantidos por incremento batem com os recalculados do zero"""
+    # As requisições usam outra sessão: descarta o que esta já tinha carregado
+    db.session.rollback()
+    contadores = _contadores(user_id)
+    diarios = _acumulados_diarios(user_id)
+
+    assert contadores == calcular_estatisticas([user_id])[user_id]
+    reconstruir_atividades_diarias([user_id])
+    assert diarios == _acumulados_diarios(user_id)
+    db.session.rollback()
+    return contadores, diarios
+
+
+def _adicionar_atividade(cliente, materia, duracao, data=""):
+    resposta = cliente.post(
+        "/adicionar_atividade",
+        data={
+            "materia": materia,
+            "assunto_primario": "Revisão",
+            "duracao": duracao,
+            "data": data,
+        },
+    )
+    assert resposta.status_code == 302
+    db.session.rollback()
+    return Atividade.query.order_by(Atividade.id.desc()).first().id
+
+
+def test_atividades_criadas_editadas_e_excluidas(cliente):
+    user_id = cliente.user_id
+    primeira = _adicionar_atividade(cliente, "Física", "01:30", "2026-01-10")
+    segunda = _adicionar_atividade(cliente, "Química", "00:45")
+    _adicionar_atividade(cliente, "Física", "00:20", "2026-01-10")
+
+    contadores, diarios = _conferir_com_reconstrucao(user_id)
+    assert contadores["total_atividades"] == 3
+    assert contadores["total_minutos"] == 155
+    assert diarios[date(2026, 1, 10)] == (2, 110)
+    assert len(diarios) == 2
+
+    cliente.post(
+        f"/editar_atividade/{primeira}",
+        data={"materia": "Física", "assunto_primario": "Revisão", "duracao": "02:00"},
+    )
+    contadores, diarios = _conferir_com_reconstrucao(user_id)
+    assert contadores["total_minutos"] == 185
+    assert diarios[date(2026, 1, 10)] == (2, 140)
+
+    cliente.post(f"/excluir_atividade/{segunda}")
+    contadores, diarios = _conferir_com_reconstrucao(user_id)
+    assert contadores["total_atividades"] == 2
+    assert contadores["total_minutos"] == 140
+    # O dia que ficou sem atividades deixa de existir
+    assert list(diarios) == [date(2026, 1, 10)]
+
+
+def test_materias_e_metas(cliente):
+    user_id = cliente.user_id
+    for nome in ("Física", "Química"):
+        cliente.post("/adicionar_materia", data={"materia": nome})
+    for titulo in ("Meta um", "Meta dois"):
+        cliente.post("/criar_meta", data={"titulo": titulo})
+
+    contadores, _ = _conferir_com_reconstrucao(user_id)
+    assert contadores["total_materias"] == 2
+    assert contadores["metas_ativas"] == 2
+
+    meta_um, meta_dois = [meta.id for meta in Meta.query.order_by(Meta.id)]
+    cliente.post(f"/concluir_meta/{meta_um}")
+    contadores, _ = _conferir_com_reconstrucao(user_id)
+    assert (contadores["metas_ativas"], contadores["metas_concluidas"]) == (1, 1)
+
+    cliente.post(f"/deletar_meta/{meta_dois}")
+    cliente.post(f"/deletar_meta/{meta_um}")
+    materia = Materia.query.filter_by(user_id=user_id, nome="Física").one().id
+    cliente.post(f"/excluir_materia/{materia}")
+    contadores, _ = _conferir_com_reconstrucao(user_id)
+    assert contadores["total_materias"] == 1
+    assert (contadores["metas_ativas"], contadores["metas_concluidas"]) == (0, 0)
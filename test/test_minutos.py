@@ -0,0 +1,84 @@
+import os
+import sqlite3
+
+from alembic import command
+from alembic.config import Config
+
+import app as focusup
+from models.models import db, Atividade, Materia, parse_duration_to_minutes
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _atividade(user_id, materia, duracao):
+    atividade = Atividade(
+        materia=materia, assunto_primario="Assunto", duracao=duracao, user_id=user_id
+    )
+    db.session.add(atividade)
+    return atividade
+
+
+def test_duracao_sincroniza_minutos():
+    atividade = Atividade(duracao="01:30")
+    assert atividade.duracao_minutos == 90
+    atividade.duracao = "00:45"
+    assert atividade.duracao_minutos == 45
+    atividade.duracao = None
+    assert atividade.duracao_minutos is None
+    assert parse_duration_to_minutes("abc") == 0
+
+
+def test_tempo_por_materia_soma_no_banco(criar_usuario):
+    user_id = criar_usuario()
+    outro_id = criar_usuario("outro@focusup.com")
+    _atividade(user_id, "Física", "01:00")
+    _atividade(user_id, "Física", "00:30")
+    _atividade(user_id, "Química", "02:00")
+    _atividade(user_id, "Química", None)
+    _atividade(outro_id, "Física", "05:00")
+    db.session.commit()
+
+    assert focusup.tempo_por_materia_do_usuario(user_id) == {
+        "Física": 90,
+        "Química": 120,
+    }
+
+
+def test_materias_ordenadas_por_tempo(criar_usuario):
+    user_id = criar_usuario()
+    for nome in ("Artes", "Física", "Química"):
+        db.session.add(Materia(nome=nome, user_id=user_id))
+    _atividade(user_id, "Física", "00:30")
+    _atividade(user_id, "Química", "01:00")
+    db.session.commit()
+
+    nomes = [m.nome for m in focusup.materias_ordenadas_por_tempo(user_id)]
+    assert nomes == ["Química", "Física", "Artes"]
+
+
+def test_migracao_preenche_duracao_minutos(tmp_path):
+    banco = tmp_path / "migracao.db"
+    conexao = sqlite3.connect(banco)
+    conexao.execute(
+        "CREATE TABLE tb_atividades (id INTEGER PRIMARY KEY, duracao VARCHAR(10))"
+    )
+    # Mais de um lote da migração (TAMANHO_LOTE = 1000)
+    duracoes = ["01:15", "00:05", None, "xx", "10:00"] * 500
+    conexao.executemany(
+        "INSERT INTO tb_atividades (duracao) VALUES (?)", [(d,) for d in duracoes]
+    )
+    conexao.commit()
+
+    config = Config()
+    config.set_main_option("script_location", os.path.join(RAIZ, "alembic"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{banco}")
+    command.stamp(config, "741e1f18573e")
+    command.upgrade(config, "5c0e7a3b9d21")
+
+    esperados = {"01:15": 75, "00:05": 5, None: None, "xx": 0, "10:00": 600}
+    linhas = conexao.execute(
+        "SELECT duracao, duracao_minutos FROM tb_atividades ORDER BY id"
+    ).fetchall()
+    conexao.close()
+    assert len(linhas) == len(duracoes)
+    assert all(minutos == esperados[duracao] for duracao, minutos in linhas)
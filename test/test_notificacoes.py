@@ -0,0 +1,110 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models.models import db, Notificacao
+from servicos.notificacoes import NOTIFICACOES_POR_PAGINA, pagina_notificacoes
+
+
+@pytest.fixture
+def caixa(criar_usuario):
+    """Dez notificações, em pares com o mesmo data_criacao, e outras de outro usuário"""
+    user_id = criar_usuario()
+    outro_id = criar_usuario("outro@focusup.com")
+    inicio = datetime(2026, 3, 1, 8, 0)
+    for n in range(10):
+        for dono in (user_id, outro_id):
+            db.session.add(
+                Notificacao(
+                    user_id=dono,
+                    tipo="lembrete" if n % 3 == 0 else "sistema",
+                    titulo=f"Notificação {n}",
+                    mensagem="Mensagem",
+                    lida=n % 2 == 0,
+                    data_criacao=inicio + timedelta(minutes=n // 2),
+                )
+            )
+    db.session.commit()
+    return user_id
+
+
+def _esperadas(user_id, **filtros):
+    todas = Notificacao.query.filter_by(user_id=user_id, **filtros).all()
+    todas.sort(key=lambda n: (n.data_criacao, n.id), reverse=True)
+    return [n.id for n in todas]
+
+
+def _percorrer(user_id, limite, tipo=None, lida=None):
+    ids, cursor = [], None
+    while True:
+        pagina, cursor = pagina_notificacoes(
+            user_id, tipo, lida, cursor=cursor, limite=limite
+        )
+        assert len(pagina) <= limite
+        ids += [n.id for n in pagina]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("limite", [1, 3, 4, 10])
+def test_cursor_percorre_a_caixa_sem_repetir(caixa, limite):
+    assert _percorrer(caixa, limite) == _esperadas(caixa)
+
+
+def test_cursor_com_filtros(caixa):
+    assert _percorrer(caixa, 2, lida=False) == _esperadas(caixa, lida=False)
+    assert _percorrer(caixa, 1, tipo="lembrete") == _esperadas(caixa, tipo="lembrete")
+    assert len(_esperadas(caixa, tipo="lembrete")) == 4
+
+
+def test_api_continua_do_cursor_e_recusa_cursor_invalido(cliente):
+    # O login também notifica: a caixa fica só com as notificações do teste
+    Notificacao.query.filter_by(user_id=cliente.user_id).delete()
+    inicio = datetime(2026, 3, 1, 8, 0)
+    for n in range(30):
+        db.session.add(
+            Notificacao(
+                user_id=cliente.user_id,
+                tipo="sistema",
+                titulo=f"Notificação {n}",
+                mensagem="Mensagem",
+                data_criacao=inicio + timedelta(seconds=n),
+            )
+        )
+    db.session.commit()
+
+    primeira = cliente.get("/api/notificacoes").get_json()
+    assert primeira["proximo_cursor"]
+    segunda = cliente.get(
+        f"/api/notificacoes?cursor={primeira['proximo_cursor']}"
+    ).get_json()
+    numeros = [
+        [int(n) for n in re.findall(r"Notificação (\d+)", pagina["html"])]
+        for pagina in (primeira, segunda)
+    ]
+    assert numeros[0] == list(range(29, 29 - NOTIFICACOES_POR_PAGINA, -1))
+    assert numeros[0] + numeros[1] == list(range(29, -1, -1))
+
+    resposta = cliente.get("/api/notificacoes?cursor=invalido")
+    assert resposta.status_code == 400
+
+
+def test_listagem_nao_conta_o_historico(app, cliente):
+    consultas = []
+
+    def registrar(conexao, cursor, sql, parametros, contexto, executemany):
+        consultas.append(sql.lower())
+
+    with app.app_context():
+        motor = db.engine
+    event.listen(motor, "before_cursor_execute", registrar)
+    try:
+        resposta = cliente.get("/listar_noticacoes")
+    finally:
+        event.remove(motor, "before_cursor_execute", registrar)
+
+    assert resposta.status_code == 200
+    assert consultas
+    assert not [sql for sql in consultas if "count(" in sql]